@@ -0,0 +1,154 @@
+'''
+runs many invocations concurrently on an asyncio event loop.
+
+    vm = AsyncVM(cfs, budget=10000)
+    result = await vm.invoke_static('Kernels', 'collatz', [27], timeout=1.0)
+
+every invocation runs as a green thread (see scheduler) driven by its own task, which gives the
+loop back after every budget instructions. invocations share the loaded classes and the heap.
+a timeout, or cancelling the task awaiting invoke_static, stops the invocation and the java
+threads it started, and releases their monitors.
+
+a thread prints to the stdout of its invocation. when stdout has an async drain() (an
+asyncio.StreamWriter) the thread is parked until the output is drained.
+
+methods are not compiled by default: a call into compiled code runs to its end within one
+time slice, so with a compile_threshold a long running int method can hold the loop.
+'''
+import asyncio
+import logging
+from typing import Any, Dict, List, Mapping, Optional, TextIO
+from python_jvm.class_parser import ClassFile
+from python_jvm.executer import DEFAULT_MAX_DEPTH, Thread, _run_slice, find_method, resolve_method
+from python_jvm.heap import Heap, JavaObject
+from python_jvm.scheduler import BLOCKED, READY, RUNNING, GreenThread, Scheduler
+
+DEFAULT_BUDGET = 10000
+
+
+class AsyncVM(Scheduler):
+    def __init__(self, cfs: Mapping[str, ClassFile], heap: Optional[Heap] = None, budget: int = DEFAULT_BUDGET,
+                 stdout: Optional[TextIO] = None, max_depth: int = DEFAULT_MAX_DEPTH,
+                 compile_threshold: Optional[int] = None):
+        super().__init__(cfs, heap, quantum=budget, max_depth=max_depth, compile_threshold=compile_threshold)
+        self.stdout = stdout
+        self._tasks: Dict[GreenThread, 'asyncio.Task[Any]'] = {}
+        self._wakeups: Dict[GreenThread, 'asyncio.Future[None]'] = {}
+        # the threads started by the threads of an invocation, by its first thread
+        self._started: Dict[GreenThread, List[GreenThread]] = {}
+        self._invocation: Dict[GreenThread, GreenThread] = {}
+
+    async def invoke_static(self, _class: str, name: str, args: List[Any], descriptor: Optional[str] = None,
+                            timeout: Optional[float] = None, stdout: Optional[TextIO] = None,
+                            heap: Optional[Heap] = None) -> Any:
+        '''
+        run the static method _class.name (the first overload if descriptor is None) and return its result.
+        raises asyncio.TimeoutError if it does not return within timeout seconds.
+        heap isolates the objects of the invocation from the others (default: the heap of the vm).
+        '''
+        if descriptor is None:
+            method = find_method(self.cfs, _class, name)
+            if method is None:
+                raise Exception(f'{_class}.{name} not found')
+            descriptor = method.descriptor
+        target = resolve_method(self.cfs, _class, name, descriptor, False)
+        g = self.spawn(target, args, stdout=stdout if stdout is not None else self.stdout, heap=heap)
+        self._invocation[g] = g
+        self._started[g] = []
+        try:
+            if timeout is None:
+                return await self._tasks[g]
+            return await asyncio.wait_for(self._tasks[g], timeout)
+        finally:
+            for started in self._started.pop(g):
+                task = self._tasks.get(started)
+                if task is not None:
+                    task.cancel()
+            self._invocation.pop(g, None)
+
+    def run(self):
+        raise Exception('an AsyncVM runs its threads on the event loop, see invoke_static')
+
+    def start(self, java_thread: JavaObject, parent: Optional[Thread] = None) -> GreenThread:
+        g = super().start(java_thread, parent)
+        invocation = self._invocation.get(self._green[parent]) if parent is not None else None
+        if invocation is not None:
+            self._invocation[g] = invocation
+            self._started[invocation].append(g)
+        return g
+
+    def wake(self, thread: Thread):
+        if thread in self._green:  # not stopped meanwhile, e.g. a cancelled joiner
+            super().wake(thread)
+
+    def _make_ready(self, g: GreenThread):
+        task = self._tasks.get(g)
+        if task is None:
+            self._tasks[g] = asyncio.get_running_loop().create_task(self._drive(g))
+            return
+        wakeup = self._wakeups.pop(g, None)
+        if wakeup is not None and not wakeup.done():
+            wakeup.set_result(None)
+
+    def _timer(self, g: GreenThread, ms: int, obj: Any):
+        g.timer = next(self._sequence)
+        asyncio.get_running_loop().call_later(ms / 1000, self._expire, g, g.timer, obj)
+
+    def write(self, thread: Thread, text: str) -> Optional[bool]:
+        out = thread.stdout
+        drain = getattr(out, 'drain', None)
+        if drain is None:
+            out.write(text)
+            return None
+        out.write(text.encode())
+        if not thread.yieldable:
+            return None  # buffered by the writer
+        self.park(thread, 'output')
+        asyncio.get_running_loop().create_task(self._drain(thread, drain))
+        return True
+
+    async def _drain(self, thread: Thread, drain: Any):
+        try:
+            await drain()
+        except Exception as e:
+            logging.warning(f'output is lost: {e}')
+        finally:
+            g = self._green.get(thread)
+            if g is not None and g.state == BLOCKED:
+                self.wake(thread)
+
+    async def _drive(self, g: GreenThread) -> Any:
+        thread = g.thread
+        loop = asyncio.get_running_loop()
+        try:
+            while thread.frames:
+                if g.state != READY:
+                    wakeup = self._wakeups[g] = loop.create_future()
+                    await wakeup
+                    continue
+                g.state = RUNNING
+                self.current = g
+                try:
+                    left = _run_slice(thread, self.quantum)
+                finally:
+                    self.current = None
+                self.stats.instructions += self.quantum - left
+                self.stats.switches += 1
+                if g.state == RUNNING:
+                    g.state = READY
+                await asyncio.sleep(0)
+            self._terminate(g)
+            return g.result
+        except BaseException as e:
+            g.error = e
+            self._stop(g)
+            if g is not self._invocation.get(g) and not isinstance(e, asyncio.CancelledError):
+                logging.error(f'{g.name} stopped: {e!r}')  # nobody awaits a started thread
+                return None
+            raise
+        finally:
+            del self._tasks[g]
+            self._wakeups.pop(g, None)
+            self._green.pop(thread, None)
+            self._invocation.pop(g, None)
+            self.threads.remove(g)
@@ -0,0 +1,177 @@
+'''
+class data sharing archive.
+
+stores parsed and linked classes (constant pool, method index and decoded instructions)
+so a later run can map the file and unpickle only the classes it touches.
+
+    python -m python_jvm.archive create -o app.jsa -cp build/classes:lib/app.jar
+    python -m python_jvm.archive list app.jsa
+'''
+import argparse
+import glob
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+import zipfile
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+from python_jvm.class_parser import ClassFile
+from python_jvm.classloader import classpath_sources, iter_parse
+
+MAGIC = b'PJVMCDS\x01'
+_HEADER = struct.Struct('>8sQ')  # magic, length of the pickled index
+
+
+class ArchivedClass(NamedTuple):
+    offset: int  # from the end of the index
+    length: int
+    path: str  # source class file or archive
+    member: Optional[str]  # member name when path is an archive
+    mtime_ns: int
+    size: int
+    sha1: str  # digest of the class file bytes
+
+
+def create_archive(output: str, classpath: Optional[str] = None, files: Iterable[str] = (), workers: Optional[int] = 1) -> Dict[str, ArchivedClass]:
+    '''
+    parse and link every class in classpath and files, and write them to output.
+    classes are parsed over a process pool of workers processes (None: one per core).
+    when a class name appears twice, the first one wins (files before classpath).
+    '''
+    sources: List[Tuple[str, Optional[str]]] = [(f, None) for f in files]
+    if classpath:
+        sources += classpath_sources(classpath)
+    blobs: List[bytes] = []
+    index: Dict[str, ArchivedClass] = {}
+    offset = 0
+    for parsed in iter_parse(sources, workers, link=True):
+        if parsed.error is not None:
+            logging.warning(f'skipped {parsed.source}: {parsed.error}')
+            continue
+        if parsed.name in index:
+            continue
+        st = os.stat(parsed.path)
+        index[parsed.name] = ArchivedClass(offset, len(parsed.blob), os.path.abspath(parsed.path), parsed.member, st.st_mtime_ns, st.st_size, parsed.sha1)
+        blobs.append(parsed.blob)
+        offset += len(parsed.blob)
+
+    index_blob = pickle.dumps({name: tuple(a) for name, a in index.items()}, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp = output + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(index_blob)))
+        f.write(index_blob)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, output)
+    return index
+
+
+class ClassArchive(Mapping[str, ClassFile]):
+    '''
+    read side of the archive, a Mapping from class name to ClassFile like the cfs dict.
+    the file is memory mapped and a class is unpickled on first lookup.
+    a class whose source changed is treated as missing, so it can be passed as the parent
+    of a ClassLoader which then parses the current class file instead.
+
+    validate: 'mtime' compares mtime and size of the source, 'hash' compares the sha1 of its bytes,
+    'none' trusts the archive.
+    '''
+
+    def __init__(self, path: str, validate: str = 'mtime'):
+        if validate not in ('mtime', 'hash', 'none'):
+            raise ValueError(f'unknown validation {validate}')
+        self.path = path
+        self.validate = validate
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise Exception(f'{path} is not a class archive')
+        self.index: Dict[str, ArchivedClass] = {
+            name: ArchivedClass(*a) for name, a in pickle.loads(self._mm[_HEADER.size:_HEADER.size + index_length]).items()
+        }
+        self._data_start = _HEADER.size + index_length
+        self.loaded: Dict[str, ClassFile] = {}
+        self._valid: Dict[str, bool] = {}
+
+    def _read_source(self, a: ArchivedClass) -> bytes:
+        if a.member is None:
+            with open(a.path, 'rb') as f:
+                return f.read()
+        with zipfile.ZipFile(a.path) as z:
+            return z.read(a.member)
+
+    def is_valid(self, class_name: str) -> bool:
+        valid = self._valid.get(class_name)
+        if valid is None:
+            a = self.index[class_name]
+            try:
+                if self.validate == 'mtime':
+                    st = os.stat(a.path)
+                    valid = st.st_mtime_ns == a.mtime_ns and st.st_size == a.size
+                elif self.validate == 'hash':
+                    valid = hashlib.sha1(self._read_source(a)).hexdigest() == a.sha1
+                else:
+                    valid = True
+            except (OSError, KeyError):
+                valid = False
+            if not valid:
+                logging.info(f'{class_name} in {self.path} is stale')
+            self._valid[class_name] = valid
+        return valid
+
+    def __getitem__(self, class_name: str) -> ClassFile:
+        c = self.loaded.get(class_name)
+        if c is not None:
+            return c
+        if class_name not in self.index or not self.is_valid(class_name):
+            raise KeyError(class_name)
+        a = self.index[class_name]
+        start = self._data_start + a.offset
+        c = pickle.loads(self._mm[start:start + a.length])
+        self.loaded[class_name] = c
+        return c
+
+    def __contains__(self, class_name: object) -> bool:
+        return isinstance(class_name, str) and class_name in self.index and self.is_valid(class_name)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self.index if self.is_valid(name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def close(self):
+        self._mm.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog='python -m python_jvm.archive', description='class data sharing archive')
+    sub = parser.add_subparsers(dest='command', required=True)
+    create = sub.add_parser('create', help='parse and link classes into an archive')
+    create.add_argument('-o', '--output', required=True)
+    create.add_argument('-cp', '--classpath', help=f'directories and jars separated by {os.pathsep!r}')
+    create.add_argument('-j', '--workers', type=int, default=None, help='parser processes (default: one per core)')
+    create.add_argument('files', nargs='*', help='class files or glob patterns')
+    ls = sub.add_parser('list', help='list archived classes')
+    ls.add_argument('archive')
+    ls.add_argument('--validate', default='mtime', choices=['mtime', 'hash', 'none'])
+    args = parser.parse_args(argv)
+
+    if args.command == 'create':
+        files = [f for pattern in args.files for f in sorted(glob.glob(pattern))]
+        index = create_archive(args.output, args.classpath, files, args.workers)
+        print(f'archived {len(index)} classes to {args.output}')
+    else:
+        archive = ClassArchive(args.archive, args.validate)
+        for name, a in sorted(archive.index.items()):
+            state = 'ok' if archive.is_valid(name) else 'stale'
+            print(f'{name}\t{a.length}\t{state}\t{a.path}' + (f'!{a.member}' if a.member else ''))
+        archive.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
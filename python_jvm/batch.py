@@ -0,0 +1,259 @@
+'''
+runs one static method over many inputs on a pool of forked worker processes.
+
+    python -m python_jvm.batch -cp build/classes 'Kernels.collatz(I)I' inputs.jsonl
+
+the parent loads and links the whole classpath once, then forks the workers, which share the
+parsed classes copy-on-write. so parsing and linking is paid once per batch, not once per input.
+every input is a list of java arguments (a line of json on the command line, a bare value is
+one argument), converted by the descriptor of the method: json lists become java arrays, strings
+are java strings (or a char) and null is null. results stream back in input order, or as they
+complete with ordered=False.
+
+    with BatchRunner(cfs, 'Kernels', 'collatz', '(I)I', workers=8) as runner:
+        for r in runner.run([n] for n in range(1, 100000)):
+            print(r.index, r.result)
+        print(runner.stats)
+
+forking is not available on every platform, workers=1 runs the batch in this process.
+'''
+import argparse
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+from python_jvm.class_parser import ClassFile
+from python_jvm.classloader import ClassLoader
+from python_jvm.compiler import DEFAULT_COMPILE_THRESHOLD
+from python_jvm.executer import ResolvedMethod, Thread, find_method, link_classes, resolve_method
+from python_jvm.heap import Heap, PrimitiveArray, ReferenceArray
+from python_jvm.util import parse_method, parse_method_descriptor
+
+
+class ArgumentError(Exception):
+    pass
+
+
+class BatchResult(NamedTuple):
+    index: int  # position of the input
+    result: Any
+    stdout: str
+    error: Optional[str]
+    worker: int  # pid of the process which ran it
+    seconds: float
+
+
+class WorkerStats:
+    __slots__ = ('pid', 'inputs', 'errors', 'seconds')
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.inputs = 0
+        self.errors = 0
+        self.seconds = 0.0  # busy running inputs
+
+    @property
+    def throughput(self) -> float:
+        '''inputs per busy second'''
+        return self.inputs / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return f'WorkerStats(pid={self.pid}, inputs={self.inputs}, errors={self.errors}, seconds={self.seconds:.3f}, throughput={self.throughput:.1f}/s)'
+
+
+_worker: Optional[Tuple[Thread, ResolvedMethod]] = None  # of this (worker) process
+
+
+def _init_worker(cfs: Mapping[str, ClassFile], target: ResolvedMethod, compile_threshold: Optional[int]):
+    global _worker
+    _worker = (Thread(cfs, compile_threshold=compile_threshold), target)
+
+
+def _portable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (PrimitiveArray, ReferenceArray)):
+        return [_portable(v) for v in value]
+    return repr(value)  # other objects stay in the heap of the worker
+
+
+# values of the integral types
+_RANGES = {
+    'B': (-0x80, 0x7F),
+    'C': (0, 0xFFFF),
+    'S': (-0x8000, 0x7FFF),
+    'I': (-0x80000000, 0x7FFFFFFF),
+    'J': (-0x8000000000000000, 0x7FFFFFFFFFFFFFFF),
+}
+
+
+def _java_value(heap: Heap, descriptor: str, value: Any) -> Any:
+    '''the json value as a java value of type descriptor, arrays are allocated from heap'''
+    kind = descriptor[0]
+    if kind == '[':
+        if value is None:
+            return None
+        if isinstance(value, list):
+            array = heap.new_array(descriptor, len(value))
+            for i, v in enumerate(value):
+                array[i] = _java_value(heap, descriptor[1:], v)
+            return array
+    elif kind == 'L':
+        if value is None or (isinstance(value, str) and descriptor == 'Ljava/lang/String;'):
+            return value
+    elif kind == 'Z':
+        if isinstance(value, bool) or value in (0, 1):
+            return int(value)
+    elif kind in _RANGES:
+        if kind == 'C' and isinstance(value, str) and len(value) == 1:
+            value = ord(value)
+        low, high = _RANGES[kind]
+        if isinstance(value, int) and not isinstance(value, bool) and low <= value <= high:
+            return value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if kind == 'D':
+            return float(value)
+        try:
+            return struct.unpack('f', struct.pack('f', value))[0]
+        except OverflowError:
+            pass
+    raise ArgumentError(f'{value!r} is not a {descriptor}')
+
+
+def _java_args(heap: Heap, target: ResolvedMethod, args: List[Any]) -> List[Any]:
+    params, _ = parse_method_descriptor(target.descriptor)
+    if len(args) != len(params):
+        raise ArgumentError(f'{target.label} takes {len(params)} arguments, not {len(args)}')
+    return [_java_value(heap, p, a) for p, a in zip(params, args)]
+
+
+def _run_input(task: Tuple[int, List[Any]]) -> BatchResult:
+    index, args = task
+    thread, target = _worker
+    thread.stdout = io.StringIO()
+    start = time.perf_counter()
+    try:
+        result, error = _portable(thread.invoke(target, _java_args(thread.heap, target, args))), None
+    except Exception as e:
+        result, error = None, f'{type(e).__name__}: {e}'
+    return BatchResult(index, result, thread.stdout.getvalue(), error, os.getpid(), time.perf_counter() - start)
+
+
+class BatchRunner:
+    '''
+    invokes _class.name (the first overload if descriptor is None) over batches of inputs.
+    the classes of cfs are loaded and linked when the runner is created, and the pool of workers
+    (default: one per core) is forked on the first run and reused until close.
+    '''
+
+    def __init__(self, cfs: Mapping[str, ClassFile], _class: str, name: str, descriptor: Optional[str] = None,
+                 workers: Optional[int] = None, chunksize: int = 16,
+                 compile_threshold: Optional[int] = DEFAULT_COMPILE_THRESHOLD):
+        start = time.perf_counter()
+        self.linked = link_classes(cfs)
+        # a plain dict, so the workers never go back to the class path
+        self.cfs: Dict[str, ClassFile] = {n: cfs[n] for n in cfs}
+        if descriptor is None:
+            method = find_method(self.cfs, _class, name)
+            if method is None:
+                raise Exception(f'{_class}.{name} not found')
+            descriptor = method.descriptor
+        self.target = resolve_method(self.cfs, _class, name, descriptor, False)
+        self.preload_seconds = time.perf_counter() - start
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.compile_threshold = compile_threshold
+        self.stats: Dict[int, WorkerStats] = {}
+        self._pool: Any = None
+
+    def _map(self, tasks: Iterable[Tuple[int, List[Any]]], ordered: bool) -> Iterator[BatchResult]:
+        if self.workers == 1:
+            if _worker is None or _worker[1] is not self.target:
+                _init_worker(self.cfs, self.target, self.compile_threshold)
+            return map(_run_input, tasks)
+        if self._pool is None:
+            # the workers never collect what exists at the fork, so the collector does not
+            # write to (and copy) the pages of the parsed classes
+            gc.freeze()
+            try:
+                self._pool = multiprocessing.get_context('fork').Pool(
+                    self.workers, _init_worker, (self.cfs, self.target, self.compile_threshold))
+            finally:
+                gc.unfreeze()
+        if ordered:
+            return self._pool.imap(_run_input, tasks, self.chunksize)
+        return self._pool.imap_unordered(_run_input, tasks, self.chunksize)
+
+    def run(self, inputs: Iterable[List[Any]], ordered: bool = True) -> Iterator[BatchResult]:
+        '''stream the results of inputs, in input order or as they complete'''
+        for r in self._map(enumerate(inputs), ordered):
+            s = self.stats.get(r.worker)
+            if s is None:
+                s = self.stats[r.worker] = WorkerStats(r.worker)
+            s.inputs += 1
+            s.errors += r.error is not None
+            s.seconds += r.seconds
+            yield r
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self) -> 'BatchRunner':
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+
+def run_batch(cfs: Mapping[str, ClassFile], _class: str, name: str, inputs: Iterable[List[Any]],
+              descriptor: Optional[str] = None, workers: Optional[int] = None, ordered: bool = True) -> List[BatchResult]:
+    '''run a whole batch and return its results, see BatchRunner'''
+    with BatchRunner(cfs, _class, name, descriptor, workers) as runner:
+        return list(runner.run(inputs, ordered))
+
+
+def _read_inputs(lines: Iterable[str]) -> Iterator[List[Any]]:
+    for line in lines:
+        if line.strip():
+            value = json.loads(line)
+            yield value if isinstance(value, list) else [value]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog='python -m python_jvm.batch', description='run a static method over many inputs')
+    parser.add_argument('-cp', '--classpath', required=True, help=f'directories and jars separated by {os.pathsep!r}')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--chunksize', type=int, default=16, help='inputs sent to a worker at once')
+    parser.add_argument('--unordered', action='store_true', help='print results as they complete')
+    parser.add_argument('method', help='<class>.<method>[<descriptor>], e.g. Kernels.collatz(I)I')
+    parser.add_argument('inputs', nargs='?', help='json lines of arguments (default: stdin)')
+    args = parser.parse_args(argv)
+
+    _class, name, descriptor = parse_method(args.method)
+    source = open(args.inputs) if args.inputs else contextlib.nullcontext(sys.stdin)
+    start = time.perf_counter()
+    with source as lines, BatchRunner(ClassLoader(args.classpath), _class, name, descriptor, args.workers, args.chunksize) as runner:
+        print(f'{runner.linked} methods linked in {runner.preload_seconds:.3f}s', file=sys.stderr)
+        for r in runner.run(_read_inputs(lines), ordered=not args.unordered):
+            out = {'index': r.index, 'result': r.result} if r.error is None else {'index': r.index, 'error': r.error}
+            if r.stdout:
+                out['stdout'] = r.stdout
+            print(json.dumps(out))
+    elapsed = time.perf_counter() - start
+    for s in runner.stats.values():
+        print(s, file=sys.stderr)
+    total = sum(s.inputs for s in runner.stats.values())
+    print(f'{total} inputs in {elapsed:.3f}s, {total / elapsed:.1f}/s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
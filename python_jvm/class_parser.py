@@ -1,197 +1,361 @@
 from dataclasses import dataclass, field  # , KW_ONLY
-from typing import Dict, Generic, List, Type, TypeVar
-from python_jvm.util import hexdump, parse_int
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 import logging
-import mmap
+import struct
+
+_U2 = struct.Struct('>H')
+_U2U2 = struct.Struct('>HH')
+_U2U4 = struct.Struct('>HI')
+_U2U2U2U2 = struct.Struct('>HHHH')
+_CODE_HEADER = struct.Struct('>HHI')
+
+Buffer = Union[bytes, memoryview]
 
 
 class REPR:
+    __slots__ = ()
+
     def __repr__(self):
-        attr_exp = ",".join([f'{k} = {v}' for k, v in vars(self).items()])
+        attrs = [(k, getattr(self, k)) for cls in type(self).__mro__ for k in getattr(cls, '__slots__', ()) if not k.startswith('_')]
+        attr_exp = ",".join([f'{k} = {v}' for k, v in attrs])
         return f'''{str(type(self))}({attr_exp})'''
 
 
 class CONSTANT(REPR):
-    pass
+    __slots__ = ()
 
 
 class CONSTANT_Methodref(CONSTANT):
+    __slots__ = ('class_index', 'name_and_type_index')
     class_index: int  # 2 bytes
     name_and_type_index: int  # 2bytes
 
-    def __init__(self, f):
-        self.class_index = parse_int(f.read(2))
-        self.name_and_type_index = parse_int(f.read(2))
+    def __init__(self, class_index: int, name_and_type_index: int):
+        self.class_index = class_index
+        self.name_and_type_index = name_and_type_index
 
 
 class CONSTANT_Class(CONSTANT):
+    __slots__ = ('name_index',)
     name_index: int  # 2bytes
 
-    def __init__(self, f):
-        self.name_index = parse_int(f.read(2))
+    def __init__(self, name_index: int):
+        self.name_index = name_index
 
 
 class CONSTANT_NameAndType(CONSTANT):
+    __slots__ = ('name_index', 'descriptor_index')
     name_index: int  # 2bytes
     descriptor_index: int  # 2 bytes
 
-    def __init__(self, f):
-        self.name_index = parse_int(f.read(2))
-        self.descriptor_index = parse_int(f.read(2))
+    def __init__(self, name_index: int, descriptor_index: int):
+        self.name_index = name_index
+        self.descriptor_index = descriptor_index
 
 
 class CONSTANT_Utf8(CONSTANT):
+    __slots__ = ('info',)
     info: bytes
 
-    def __init__(self, f):
-        length = parse_int(f.read(2))
-        self.info = f.read(length)
+    def __init__(self, info: bytes):
+        self.info = info
 
 
 class CONSTANT_Integer(CONSTANT):
+    __slots__ = ('value',)
     value: int
 
-    def __init__(self, f):
-        self.value = parse_int(f.read(4))
+    def __init__(self, value: int):
+        self.value = value
+
+
+class CONSTANT_Float(CONSTANT):
+    __slots__ = ('value',)
+    value: float
+
+    def __init__(self, value: float):
+        self.value = value
+
+
+class CONSTANT_Long(CONSTANT):
+    __slots__ = ('value',)
+    value: int
+
+    def __init__(self, value: int):
+        self.value = value
+
+
+class CONSTANT_Double(CONSTANT):
+    __slots__ = ('value',)
+    value: float
+
+    def __init__(self, value: float):
+        self.value = value
 
 
 class CONSTANT_Fieldref(CONSTANT):
+    __slots__ = ('class_index', 'name_and_type_index')
     class_index: int  # 2 bytes
     name_and_type_index: int  # 2 bytes
 
-    def __init__(self, f):
-        self.class_index = parse_int(f.read(2))
-        self.name_and_type_index = parse_int(f.read(2))
+    def __init__(self, class_index: int, name_and_type_index: int):
+        self.class_index = class_index
+        self.name_and_type_index = name_and_type_index
 
 
 class CONSTANT_String(CONSTANT):
+    __slots__ = ('string_index',)
     string_index: int  # 2 bytes
 
-    def __init__(self, f):
-        self.string_index = parse_int(f.read(2))
+    def __init__(self, string_index: int):
+        self.string_index = string_index
 
 
 class CONSTANT_InvokeDynamic(CONSTANT):
+    __slots__ = ('bootstrap_method_att_inex', 'name_and_type_index')
     bootstrap_method_att_inex: int
     name_and_type_index: int
 
-    def __init__(self, f):
-        self.bootstrap_method_att_inex = parse_int(f.read(2))
-        self.name_and_type_index = parse_int(f.read(2))
+    def __init__(self, bootstrap_method_att_inex: int, name_and_type_index: int):
+        self.bootstrap_method_att_inex = bootstrap_method_att_inex
+        self.name_and_type_index = name_and_type_index
 
 
 class CONSTANT_InterfaceMethodref(CONSTANT):
+    __slots__ = ('class_index', 'name_and_type_index')
     class_index: int
     name_and_type_index: int
 
-    def __init__(self, f):
-        self.class_index = parse_int(f.read(2))
-        self.name_and_type_index = parse_int(f.read(2))
+    def __init__(self, class_index: int, name_and_type_index: int):
+        self.class_index = class_index
+        self.name_and_type_index = name_and_type_index
 
 
 class CONSTANT_MethodHandle(CONSTANT):
+    __slots__ = ('reference_kind', 'reference_index')
     reference_kind: int
     reference_index: int
 
-    def __init__(self, f):
-        self.reference_kind = parse_int(f.read(1))
-        self.reference_index = parse_int(f.read(2))
+    def __init__(self, reference_kind: int, reference_index: int):
+        self.reference_kind = reference_kind
+        self.reference_index = reference_index
 
 
 class CONSTANT_MethodType(CONSTANT):
+    __slots__ = ('descriptor_index',)
     descriptor_index: int
 
-    def __init__(self, f):
-        self.descriptor_index = parse_int(f.read(2))
+    def __init__(self, descriptor_index: int):
+        self.descriptor_index = descriptor_index
 
 
 class Attribute(REPR):
+    __slots__ = ('attribute_name_index', 'attribute_length', 'info')
     attribute_name_index: int
     attribute_length: int
-    info: bytes
+    info: Buffer  # view into the class file bytes
+
+    def __init__(self, attribute_name_index: int, attribute_length: int, info: Buffer):
+        self.attribute_name_index = attribute_name_index
+        self.attribute_length = attribute_length
+        self.info = info
+
+    def __getstate__(self):
+        return (self.attribute_name_index, self.attribute_length, bytes(self.info))
 
-    def __init__(self, f):
-        self.attribute_name_index = parse_int(f.read(2))
-        self.attribute_length = parse_int(f.read(4))
-        self.info = f.read(self.attribute_length)
+    def __setstate__(self, state):
+        self.attribute_name_index, self.attribute_length, self.info = state
+
+
+ACC_PRIVATE = 0x0002
+ACC_STATIC = 0x0008
+ACC_FINAL = 0x0010
+ACC_SYNCHRONIZED = 0x0020
+ACC_INTERFACE = 0x0200
+ACC_ABSTRACT = 0x0400
 
 
 class Method(REPR):
+    __slots__ = ('access_flags', 'name_index', 'descriptor_index', 'attribute_count', 'attribute_info',
+                 'name', 'descriptor', 'code_attribute', '_code')
     access_flags: bytes
     name_index: int
     descriptor_index: int
     attribute_count: int
     attribute_info: List[Attribute]
-
-    def __init__(self, f):
-        self.access_flags = f.read(2)
-        self.name_index = parse_int(f.read(2))
-        self.descriptor_index = parse_int(f.read(2))
-        self.attribute_count = parse_int(f.read(2))
-        self.attribute_info = []
-        for _ in range(self.attribute_count):
-            self.attribute_info.append(Attribute(f))
+    # filled by index_classfile
+    name: str
+    descriptor: str
+    code_attribute: Optional[Attribute]
+
+    def __init__(self, access_flags: bytes, name_index: int, descriptor_index: int, attribute_info: List[Attribute]):
+        self.access_flags = access_flags
+        self.name_index = name_index
+        self.descriptor_index = descriptor_index
+        self.attribute_count = len(attribute_info)
+        self.attribute_info = attribute_info
+        self.name = ''
+        self.descriptor = ''
+        self.code_attribute = None
+        self._code: Optional[Code] = None
+
+    @property
+    def code(self) -> Optional['Code']:
+        '''Code attribute, parsed on first access'''
+        if self._code is None and self.code_attribute is not None:
+            self._code = Code(self.code_attribute.info)
+        return self._code
+
+    @property
+    def is_static(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_STATIC)
+
+    @property
+    def is_synchronized(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_SYNCHRONIZED)
+
+    @property
+    def is_private(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_PRIVATE)
+
+    @property
+    def is_final(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_FINAL)
+
+    @property
+    def is_abstract(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_ABSTRACT)
 
 
 class Field(REPR):
-    access_flag: bytes
+    __slots__ = ('access_flags', 'name_index', 'descriptor_index', 'attribute_count', 'attribute_info',
+                 'name', 'descriptor')
+    access_flags: bytes
     name_index: int
     descriptor_index: int
-    attributes_count: int
+    attribute_count: int
     attribute_info: List[Attribute]
+    # filled by index_classfile
+    name: str
+    descriptor: str
 
-    def __init__(self, f):
-        self.access_flags = f.read(2)
-        self.name_index = parse_int(f.read(2))
-        self.descriptor_index = parse_int(f.read(2))
-        self.attribute_count = parse_int(f.read(2))
-        self.attribute_info = []
-        for _ in range(self.attribute_count):
-            self.attribute_info.append(Attribute(f))
+    def __init__(self, access_flags: bytes, name_index: int, descriptor_index: int, attribute_info: List[Attribute]):
+        self.access_flags = access_flags
+        self.name_index = name_index
+        self.descriptor_index = descriptor_index
+        self.attribute_count = len(attribute_info)
+        self.attribute_info = attribute_info
+        self.name = ''
+        self.descriptor = ''
+
+    @property
+    def is_static(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_STATIC)
+
+
+class ExceptionHandler(REPR):
+    __slots__ = ('start_pc', 'end_pc', 'handler_pc', 'catch_type')
+    start_pc: int  # 2 bytes, byte offsets into Code.code, end_pc is exclusive
+    end_pc: int  # 2 bytes
+    handler_pc: int  # 2 bytes
+    catch_type: int  # 2 bytes, constant pool index of CONSTANT_Class, 0 catches everything (finally)
+
+    def __init__(self, start_pc: int, end_pc: int, handler_pc: int, catch_type: int):
+        self.start_pc = start_pc
+        self.end_pc = end_pc
+        self.handler_pc = handler_pc
+        self.catch_type = catch_type
+
+    def __getstate__(self):
+        return (self.start_pc, self.end_pc, self.handler_pc, self.catch_type)
+
+    def __setstate__(self, state):
+        self.start_pc, self.end_pc, self.handler_pc, self.catch_type = state
 
 
 class Code(REPR):
+    '''
+    see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-4.html#jvms-4.7.3
+    '''
+    __slots__ = ('max_stack', 'max_locals', 'code_length', 'code', 'exception_table', 'attributes', 'handlers',
+                 'decoded', 'instructions', 'unfused', 'fusions', 'invocations', 'backedges', 'compiled', 'memo')
     max_stack: int
     max_locals: int
     code_length: int
-    code: bytes
-
-    def __init__(self, f):
-        self.max_stack = parse_int(f[0:2])
-        self.max_locals = parse_int(f[2:4])
-        self.code_length = parse_int(f[4:8])
-        self.code = f[8:]
+    code: Buffer  # the bytecode, a view into the class file bytes
+    exception_table: List[ExceptionHandler]
+    attributes: List[Attribute]  # e.g. LineNumberTable
+    handlers: Any  # exceptions.HandlerIndex of exception_table, built on the first throw into the method
+    decoded: Optional[list]  # decoder.Instruction list, see executer.link_code
+    instructions: Optional[list]  # decoded instructions bound to handlers, see executer.link_code
+    unfused: Optional[list]  # instructions before executer.fuse, one handler per instruction
+    fusions: Optional[Dict[str, int]]  # superinstruction -> times used in this method
+    # run time profile, see compiler
+    invocations: int
+    backedges: int
+    compiled: Any  # python function, None: not compiled yet, False: not compilable
+    memo: Any  # memo.MethodCache of results by arguments, see memo.memoize
+
+    def __init__(self, f: Buffer):
+        self.max_stack, self.max_locals, self.code_length = _CODE_HEADER.unpack_from(f, 0)
+        pos = 8 + self.code_length
+        self.code = f[8:pos]
+        count = _U2.unpack_from(f, pos)[0]
+        pos += 2
+        self.exception_table = [ExceptionHandler(*_U2U2U2U2.unpack_from(f, pos + 8 * i)) for i in range(count)]
+        self.attributes, _ = _parse_attributes(f, pos + 8 * count)
+        self.handlers = None
+        self.decoded = None
+        self.instructions = None
+        self.unfused = None
+        self.fusions = None
+        self.invocations = 0
+        self.backedges = 0
+        self.compiled = None
+        self.memo = None
+
+    def __getstate__(self):
+        return (self.max_stack, self.max_locals, self.code_length, bytes(self.code), self.exception_table, self.attributes,
+                self.decoded, self.instructions, self.unfused, self.fusions)
+
+    def __setstate__(self, state):
+        (self.max_stack, self.max_locals, self.code_length, self.code, self.exception_table, self.attributes,
+         self.decoded, self.instructions, self.unfused, self.fusions) = state
+        self.handlers = None
+        self.invocations = 0
+        self.backedges = 0
+        self.compiled = None
+        self.memo = None
 
 
 class BootstrapMethod(REPR):
+    __slots__ = ('bootstrap_method_ref', 'num_bootstrap_arguments', 'bootstrap_arguments')
     bootstrap_method_ref: int  # 2 bytes
     num_bootstrap_arguments: int  # 2 bytes
     bootstrap_arguments: List[int]  # 2bytes * n
 
-    def __init__(self, f):
-        self.bootstrap_method_ref = parse_int(f.read(2))
-        self.num_bootstrap_arguments = parse_int(f.read(2))
-        self.bootstrap_arguments = []
-        for _ in range(self.num_bootstrap_arguments):
-            self.bootstrap_arguments.append(parse_int(f.read(2)))
+    def __init__(self, bootstrap_method_ref: int, bootstrap_arguments: List[int]):
+        self.bootstrap_method_ref = bootstrap_method_ref
+        self.num_bootstrap_arguments = len(bootstrap_arguments)
+        self.bootstrap_arguments = bootstrap_arguments
 
 
 class BootstrapMethods(REPR):
     '''
     see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-4.html#jvms-4.7.23
     '''
+    __slots__ = ('num_bootstrap_methods', 'bootstrap_methods')
     num_bootstrap_methods: int  # 2 bytes
     bootstrap_methods: List[BootstrapMethod]
 
-    def __init__(self, b):
-        print(hexdump(b))
-        with mmap.mmap(-1, len(b)) as f:
-            f.write(b)
-            f.seek(0)
-            self.num_bootstrap_methods = parse_int(f.read(2))
-            self.bootstrap_methods = []
-            for _ in range(self.num_bootstrap_methods):
-                self.bootstrap_methods.append(BootstrapMethod(f))
+    def __init__(self, b: Buffer):
+        self.num_bootstrap_methods = _U2.unpack_from(b, 0)[0]
+        self.bootstrap_methods = []
+        pos = 2
+        for _ in range(self.num_bootstrap_methods):
+            ref, n = _U2U2.unpack_from(b, pos)
+            self.bootstrap_methods.append(BootstrapMethod(ref, list(struct.unpack_from(f'>{n}H', b, pos + 4))))
+            pos += 4 + 2 * n
 
 
 tCONSTANT = TypeVar('tCONSTANT',
@@ -213,77 +377,192 @@ class ClassFile:
     constant_pool: Dict[int, tCONSTANT] = field(default_factory=dict)  # type: ignore
     access_flags: bytes = field(default_factory=bytes)  # 2bytes
     this_class: int = field(default_factory=int)  # 2bytes
-    super_class: bytes = field(default_factory=bytes)  # 2bytes
+    super_class: int = field(default_factory=int)  # 2bytes, 0 for java/lang/Object
     interfaces_count: int = field(default_factory=int)  # 2bytes
-    # skip interfaces
+    interfaces: List[int] = field(default_factory=list)  # constant pool indexes of CONSTANT_Class
     fields_count: int = field(default_factory=int)  # 2bytes
     fields: List[Field] = field(default_factory=list)
     methods_count: int = field(default_factory=int)  # 2bytes
     methods: List[Method] = field(default_factory=list)
     attributes_count: int = field(default_factory=int)  # 2bytes
     attributes: List[Attribute] = field(default_factory=list)
+    # link-time index, built by index_classfile
+    name: str = ''
+    super_name: Optional[str] = None  # None for java/lang/Object
+    interface_names: List[str] = field(default_factory=list)  # the direct superinterfaces
+    method_index: Dict[Tuple[str, str], Method] = field(default_factory=dict)  # (name, descriptor) -> method
+    methods_by_name: Dict[str, List[Method]] = field(default_factory=dict)  # name -> overloads
+    field_index: Dict[str, int] = field(default_factory=dict)  # name -> slot in fields
+    attribute_index: Dict[str, Attribute] = field(default_factory=dict)  # name -> class attribute
+    bootstrap_methods: Optional[BootstrapMethods] = None  # parsed BootstrapMethods, cached by executer.find_bootstrap_methods
+    resolved: Dict[int, Any] = field(default_factory=dict)  # constant pool index -> resolved entry, filled lazily by the interpreter
+    layout: Any = None  # heap.Layout of instances, built on first allocation
+    vtable: Any = None  # executer.VTable, built on the first virtual call dispatched on the class
+    # static fields, see executer.link_statics and executer.initialize
+    static_layout: Any = None  # heap.Layout of the static fields, slots index statics
+    statics: Optional[List[Any]] = None  # values of the static fields
+    initialized: Any = None  # None, the executer.Thread running <clinit>, True, or the error <clinit> raised
+
+    @property
+    def is_interface(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_INTERFACE)
+
+    @property
+    def is_final(self) -> bool:
+        return bool(int.from_bytes(self.access_flags, 'big') & ACC_FINAL)
+
+    def __getstate__(self):
+        # resolved entries, the layout and the vtable depend on other classes, they are rebuilt at run time.
+        # the class is initialized again in the process which loads it
+        state = self.__dict__.copy()
+        state['resolved'] = {}
+        state['layout'] = None
+        state['vtable'] = None
+        state['static_layout'] = None
+        state['statics'] = None
+        state['initialized'] = None
+        return state
+
+
+# tag -> (type, struct of the fixed size body)
+# see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-4.html#jvms-4.4
+_CONSTANT_TYPES: Dict[int, Tuple[type, Optional[struct.Struct]]] = {
+    1: (CONSTANT_Utf8, None),
+    3: (CONSTANT_Integer, struct.Struct('>i')),
+    4: (CONSTANT_Float, struct.Struct('>f')),
+    5: (CONSTANT_Long, struct.Struct('>q')),
+    6: (CONSTANT_Double, struct.Struct('>d')),
+    7: (CONSTANT_Class, _U2),
+    8: (CONSTANT_String, _U2),
+    9: (CONSTANT_Fieldref, _U2U2),
+    10: (CONSTANT_Methodref, _U2U2),
+    11: (CONSTANT_InterfaceMethodref, _U2U2),
+    12: (CONSTANT_NameAndType, _U2U2),
+    15: (CONSTANT_MethodHandle, struct.Struct('>BH')),
+    16: (CONSTANT_MethodType, _U2),
+    18: (CONSTANT_InvokeDynamic, _U2U2),
+}
 
 
 def constant_pool_type(b: bytes) -> type:
     '''
-    see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-4.html#jvms-4.4 
+    see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-4.html#jvms-4.4
     '''
-    i = parse_int(b)
-    if i == 1:
-        return CONSTANT_Utf8
-    elif i == 3:
-        return CONSTANT_Integer
-    elif i == 7:
-        return CONSTANT_Class
-    elif i == 8:
-        return CONSTANT_String
-    elif i == 9:
-        return CONSTANT_Fieldref
-    elif i == 10:
-        return CONSTANT_Methodref
-    elif i == 11:
-        return CONSTANT_InterfaceMethodref
-    elif i == 12:
-        return CONSTANT_NameAndType
-    elif i == 15:
-        return CONSTANT_MethodHandle
-    elif i == 16:
-        return CONSTANT_MethodType
-    elif i == 18:
-        return CONSTANT_InvokeDynamic
-    else:
+    i = int.from_bytes(b, byteorder='big')
+    if i not in _CONSTANT_TYPES:
         raise Exception(f'unknown constant pool type {i}')
+    return _CONSTANT_TYPES[i][0]
 
 
-def read_classfile(filepath: str) -> ClassFile:
+def _parse_attributes(buf: Buffer, pos: int) -> Tuple[List[Attribute], int]:
+    count = _U2.unpack_from(buf, pos)[0]
+    pos += 2
+    attributes = []
+    for _ in range(count):
+        name_index, length = _U2U4.unpack_from(buf, pos)
+        pos += 6
+        attributes.append(Attribute(name_index, length, buf[pos:pos + length]))
+        pos += length
+    return attributes, pos
+
 
+def parse_classfile(data: Buffer) -> ClassFile:
+    '''
+    parse class file bytes.
+    attribute bodies (and so Code.code) are views into data, not copies.
+    '''
+    buf = memoryview(data)
+    minor_version, major_version, constant_pool_count = struct.unpack_from('>HHH', buf, 4)
+    c = ClassFile(
+        magic=bytes(buf[0:4]),
+        minor_version=minor_version,
+        major_version=major_version,
+    )
+    pos = 10
+    constant_pool = c.constant_pool
+    cpi = 1
+    while cpi < constant_pool_count:
+        tag = buf[pos]
+        cpt, body = _CONSTANT_TYPES.get(tag, (None, None))
+        if cpt is None:
+            raise Exception(f'unknown constant pool type {tag}')
+        if body is None:  # CONSTANT_Utf8
+            length = _U2.unpack_from(buf, pos + 1)[0]
+            constant_pool[cpi] = CONSTANT_Utf8(bytes(buf[pos + 3:pos + 3 + length]))
+            pos += 3 + length
+        else:
+            constant_pool[cpi] = cpt(*body.unpack_from(buf, pos + 1))
+            pos += 1 + body.size
+        # long and double take two entries
+        cpi += 2 if tag == 5 or tag == 6 else 1
+
+    c.access_flags = bytes(buf[pos:pos + 2])
+    c.this_class = _U2.unpack_from(buf, pos + 2)[0]
+    c.super_class = _U2.unpack_from(buf, pos + 4)[0]
+    c.interfaces_count = _U2.unpack_from(buf, pos + 6)[0]
+    pos += 8
+    c.interfaces = list(struct.unpack_from(f'>{c.interfaces_count}H', buf, pos))
+    pos += 2 * c.interfaces_count
+
+    c.fields_count = _U2.unpack_from(buf, pos)[0]
+    pos += 2
+    for _ in range(c.fields_count):
+        access_flags = bytes(buf[pos:pos + 2])
+        _, name_index, descriptor_index, _ = _U2U2U2U2.unpack_from(buf, pos)
+        attributes, pos = _parse_attributes(buf, pos + 6)
+        c.fields.append(Field(access_flags, name_index, descriptor_index, attributes))
+
+    c.methods_count = _U2.unpack_from(buf, pos)[0]
+    pos += 2
+    for _ in range(c.methods_count):
+        access_flags = bytes(buf[pos:pos + 2])
+        _, name_index, descriptor_index, _ = _U2U2U2U2.unpack_from(buf, pos)
+        attributes, pos = _parse_attributes(buf, pos + 6)
+        c.methods.append(Method(access_flags, name_index, descriptor_index, attributes))
+
+    c.attributes, pos = _parse_attributes(buf, pos)
+    c.attributes_count = len(c.attributes)
+    index_classfile(c)
+    return c
+
+
+def read_classfile(filepath: str) -> ClassFile:
+    # a single read per file, the parsed class keeps views into these bytes
     with open(filepath, 'rb') as f:
-        # read header
-        c = ClassFile(
-            magic=f.read(4),
-            minor_version=parse_int(f.read(2)),
-            major_version=parse_int(f.read(2)),
-        )
-        constant_pool_count = parse_int(f.read(2)) - 1
-        for cpi in range(constant_pool_count):
-            cpt = constant_pool_type(f.read(1))
-            cp = cpt(f)
-            c.constant_pool[cpi + 1] = cp
-
-        c.access_flags = f.read(2)
-        c.this_class = parse_int(f.read(2))
-        c.super_class = f.read(2)
-        c.interfaces_count = parse_int(f.read(2))
-        c.fields_count = parse_int(f.read(2))
-        for _ in range(c.fields_count):
-            c.fields.append(Field(f))
-        c.methods_count = parse_int(f.read(2))
-
-        for _ in range(c.methods_count):
-            c.methods.append(Method(f))
-
-        c.attributes_count = parse_int(f.read(2))
-
-        for _ in range(c.attributes_count):
-            c.attributes.append(Attribute(f))
+        return parse_classfile(f.read())
+
+
+def index_classfile(c: ClassFile) -> ClassFile:
+    '''
+    build lookup tables keyed by decoded names, once per class.
+    Code attributes are parsed lazily on first access of Method.code.
+    '''
+    def utf8(index: int) -> str:
+        cp: CONSTANT_Utf8 = c.constant_pool[index]
+        assert isinstance(cp, CONSTANT_Utf8)
+        return cp.info.decode()
+
+    cp_class: CONSTANT_Class = c.constant_pool[c.this_class]
+    c.name = utf8(cp_class.name_index)
+    if c.super_class:
+        cp_super: CONSTANT_Class = c.constant_pool[c.super_class]
+        # some compilers emit java/lang/Object as its own superclass
+        c.super_name = utf8(cp_super.name_index) if utf8(cp_super.name_index) != c.name else None
+    for index in c.interfaces:
+        cp_interface: CONSTANT_Class = c.constant_pool[index]
+        c.interface_names.append(utf8(cp_interface.name_index))
+    for m in c.methods:
+        m.name = utf8(m.name_index)
+        m.descriptor = utf8(m.descriptor_index)
+        for a in m.attribute_info:
+            if utf8(a.attribute_name_index) == 'Code':
+                m.code_attribute = a
+        c.method_index[(m.name, m.descriptor)] = m
+        c.methods_by_name.setdefault(m.name, []).append(m)
+    for slot, f in enumerate(c.fields):
+        f.name = utf8(f.name_index)
+        f.descriptor = utf8(f.descriptor_index)
+        c.field_index[f.name] = slot
+    for a in c.attributes:
+        c.attribute_index[utf8(a.attribute_name_index)] = a
     return c
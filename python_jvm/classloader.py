@@ -0,0 +1,282 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+from python_jvm.class_parser import ClassFile, parse_classfile
+
+
+class ClassPathEntry:
+    def find(self, class_name: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def source(self, class_name: str) -> Tuple[str, Optional[str]]:
+        '''file the class is read from, and the archive member if any'''
+        raise NotImplementedError
+
+    def __contains__(self, class_name: str) -> bool:
+        raise NotImplementedError
+
+    def names(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class DirectoryEntry(ClassPathEntry):
+    '''classes as files under a directory, e.g. <root>/java/lang/Object.class'''
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, class_name: str) -> str:
+        return os.path.join(self.root, *class_name.split('/')) + '.class'
+
+    def find(self, class_name: str) -> Optional[bytes]:
+        try:
+            with open(self._path(class_name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def source(self, class_name: str) -> Tuple[str, Optional[str]]:
+        return self._path(class_name), None
+
+    def __contains__(self, class_name: str) -> bool:
+        return os.path.isfile(self._path(class_name))
+
+    def names(self) -> Iterable[str]:
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith('.class'):
+                    path = os.path.relpath(os.path.join(dirpath, filename), self.root)
+                    yield path[:-len('.class')].replace(os.sep, '/')
+
+    def __repr__(self):
+        return f'DirectoryEntry({self.root})'
+
+
+class ArchiveEntry(ClassPathEntry):
+    '''
+    classes in a .jar/.zip archive.
+    only the central directory is read up front, members are decompressed on demand.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self.index: Dict[str, zipfile.ZipInfo] = {
+            info.filename[:-len('.class')]: info
+            for info in self.archive.infolist()
+            if info.filename.endswith('.class')
+        }
+
+    def find(self, class_name: str) -> Optional[bytes]:
+        info = self.index.get(class_name)
+        return self.archive.read(info) if info is not None else None
+
+    def source(self, class_name: str) -> Tuple[str, Optional[str]]:
+        return self.path, self.index[class_name].filename
+
+    def __contains__(self, class_name: str) -> bool:
+        return class_name in self.index
+
+    def names(self) -> Iterable[str]:
+        return self.index.keys()
+
+    def close(self):
+        self.archive.close()
+
+    def __repr__(self):
+        return f'ArchiveEntry({self.path})'
+
+
+class ClassPath:
+    '''
+    ordered list of directories and archives, searched like java -cp.
+    a string is split with os.pathsep, and an entry ending with * adds every .jar/.zip in that directory.
+    '''
+
+    def __init__(self, entries: Union[str, Iterable[str]]):
+        if isinstance(entries, str):
+            entries = entries.split(os.pathsep)
+        self.entries: List[ClassPathEntry] = []
+        for e in entries:
+            if not e:
+                continue
+            if e.endswith('*'):
+                paths = sorted(p for p in glob.glob(os.path.join(os.path.dirname(e) or '.', '*')) if p.lower().endswith(('.jar', '.zip')))
+            else:
+                paths = [e]
+            for path in paths:
+                if os.path.isdir(path):
+                    self.entries.append(DirectoryEntry(path))
+                elif zipfile.is_zipfile(path):
+                    self.entries.append(ArchiveEntry(path))
+                else:
+                    logging.warning(f'classpath entry {path} is not a directory or an archive')
+
+    def find(self, class_name: str) -> Optional[bytes]:
+        for e in self.entries:
+            b = e.find(class_name)
+            if b is not None:
+                return b
+        return None
+
+    def __contains__(self, class_name: str) -> bool:
+        return any(class_name in e for e in self.entries)
+
+    def names(self) -> Iterator[str]:
+        seen = set()
+        for e in self.entries:
+            for name in e.names():
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def close(self):
+        for e in self.entries:
+            if isinstance(e, ArchiveEntry):
+                e.close()
+
+
+class ClassLoader(Mapping[str, ClassFile]):
+    '''
+    loads classes from a ClassPath the first time they are looked up.
+    it is a Mapping from class name to ClassFile, so it can be used wherever the cfs dict is used.
+    the parent (e.g. the dict returned by load_classes) is asked first.
+    '''
+
+    def __init__(self, classpath: Union[str, Iterable[str], ClassPath], parent: Optional[Mapping[str, ClassFile]] = None):
+        self.classpath = classpath if isinstance(classpath, ClassPath) else ClassPath(classpath)
+        self.parent = parent
+        self.loaded: Dict[str, ClassFile] = {}
+
+    def __getitem__(self, class_name: str) -> ClassFile:
+        c = self.loaded.get(class_name)
+        if c is not None:
+            return c
+        if self.parent is not None and class_name in self.parent:
+            return self.parent[class_name]
+        b = self.classpath.find(class_name)
+        if b is None:
+            raise KeyError(class_name)
+        c = parse_classfile(b)
+        if c.name != class_name:
+            raise Exception(f'{class_name} is found but it defines {c.name}')
+        logging.debug(f'loaded {class_name}')
+        self.loaded[class_name] = c
+        return c
+
+    def __contains__(self, class_name: object) -> bool:
+        if not isinstance(class_name, str):
+            return False
+        return class_name in self.loaded or (self.parent is not None and class_name in self.parent) or class_name in self.classpath
+
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        if self.parent is not None:
+            for name in self.parent:
+                seen.add(name)
+                yield name
+        for name in self.classpath.names():
+            if name not in seen:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def close(self):
+        self.classpath.close()
+
+
+class ParsedClass(NamedTuple):
+    path: str
+    member: Optional[str]  # member name when path is an archive
+    name: Optional[str]
+    blob: Optional[bytes]  # pickled ClassFile
+    seconds: float  # read + parse time in the worker
+    error: Optional[str]
+    sha1: Optional[str]  # digest of the class file bytes
+
+    @property
+    def source(self) -> str:
+        return f'{self.path}!{self.member}' if self.member else self.path
+
+
+class BulkLoadResult(NamedTuple):
+    classes: Dict[str, ClassFile]
+    timings: Dict[str, float]  # source -> seconds
+    failures: Dict[str, str]  # source -> error
+    elapsed: float
+
+
+def classpath_sources(classpath: Union[str, Iterable[str], ClassPath]) -> List[Tuple[str, Optional[str]]]:
+    '''(path, archive member) of every class on the classpath, first occurrence of a name only'''
+    cp = classpath if isinstance(classpath, ClassPath) else ClassPath(classpath)
+    sources = []
+    seen = set()
+    for e in cp.entries:
+        for name in e.names():
+            if name not in seen:
+                seen.add(name)
+                sources.append(e.source(name))
+    return sources
+
+
+_worker_archives: Dict[str, zipfile.ZipFile] = {}  # archives opened by this (worker) process
+
+
+def _parse_source(task: Tuple[str, Optional[str], bool]) -> ParsedClass:
+    path, member, link = task
+    start = time.perf_counter()
+    try:
+        if member is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        else:
+            if path not in _worker_archives:
+                _worker_archives[path] = zipfile.ZipFile(path)
+            data = _worker_archives[path].read(member)
+        cf = parse_classfile(data)
+        if link:
+            from python_jvm.executer import link_code
+            for m in cf.methods:
+                if m.code is not None:
+                    link_code(m.code)
+        blob = pickle.dumps(cf, protocol=pickle.HIGHEST_PROTOCOL)
+        return ParsedClass(path, member, cf.name, blob, time.perf_counter() - start, None, hashlib.sha1(data).hexdigest())
+    except Exception as e:
+        return ParsedClass(path, member, None, None, time.perf_counter() - start, f'{type(e).__name__}: {e}', None)
+
+
+def iter_parse(sources: Iterable[Tuple[str, Optional[str]]], workers: Optional[int] = None, link: bool = False, chunksize: int = 16) -> Iterator[ParsedClass]:
+    '''
+    parse (path, archive member) sources over a process pool, yielding results in source order.
+    workers=None uses one process per core, workers=1 parses in this process.
+    a failing source is reported in ParsedClass.error and does not stop the batch.
+    '''
+    tasks = [(path, member, link) for path, member in sources]
+    if workers == 1:
+        yield from map(_parse_source, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_parse_source, tasks, chunksize=chunksize)
+
+
+def bulk_load(sources: Iterable[Tuple[str, Optional[str]]], workers: Optional[int] = None, link: bool = False, chunksize: int = 16) -> BulkLoadResult:
+    '''parse every source eagerly, see iter_parse. when a class name appears twice, the first one wins.'''
+    start = time.perf_counter()
+    classes: Dict[str, ClassFile] = {}
+    timings: Dict[str, float] = {}
+    failures: Dict[str, str] = {}
+    for parsed in iter_parse(sources, workers, link, chunksize):
+        timings[parsed.source] = parsed.seconds
+        if parsed.error is not None:
+            logging.warning(f'failed to parse {parsed.source}: {parsed.error}')
+            failures[parsed.source] = parsed.error
+        elif parsed.name not in classes:
+            classes[parsed.name] = pickle.loads(parsed.blob)
+    return BulkLoadResult(classes, timings, failures, time.perf_counter() - start)
@@ -0,0 +1,397 @@
+'''
+compiles hot methods from bytecode to python functions.
+
+the interpreter counts invocations and backward branches per Code, and compiles a method once
+either count passes Thread.compile_threshold. only static methods taking and returning ints,
+made of the int instructions in _MethodCompiler.compile_block, are compiled; other methods stay interpreted
+(Code.compiled is False). the generated function is a state machine over the basic blocks,
+locals are python variables and the operand stack is turned into expressions:
+
+    def HelloWorld_fibonacci(thread, l0, *, _pc=0):
+        thread.compiled_depth += 1
+        try:
+            pc = _pc
+            while True:
+                if pc == 0:
+                    pc = 4 if (l0 != 0) else 2
+                ...
+        finally:
+            thread.compiled_depth -= 1
+
+_pc enters the method at a loop header with an empty stack (on stack replacement).
+compiled methods call each other directly up to MAX_COMPILED_DEPTH nested calls, deeper calls
+are interpreted so deep java recursion does not hit the python recursion limit.
+'''
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional
+from python_jvm.class_parser import CONSTANT_Class, CONSTANT_Integer, CONSTANT_Methodref, CONSTANT_NameAndType, ClassFile, Code
+from python_jvm.decoder import BRANCHES, LOOKUPSWITCH, TABLESWITCH, Instruction, mnemonic
+from python_jvm.util import parse_method_descriptor
+
+MAX_COMPILED_DEPTH = 200
+DEFAULT_COMPILE_THRESHOLD = 1000
+_INT_TYPES = frozenset('IZBCS')
+_RETURNS = frozenset(['ireturn', 'return'])
+
+
+class CompileError(Exception):
+    pass
+
+
+def _wrap(expr: str) -> str:
+    '''wrap to java int (32bit two's complement), see executer._i32'''
+    return f'((({expr}) + 2147483648) & 4294967295) - 2147483648'
+
+
+def _div(value1: int, value2: int) -> int:
+    q = abs(value1) // abs(value2)  # java rounds toward zero
+    return ((-q if (value1 < 0) != (value2 < 0) else q) + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+
+
+def _statics(thread: Any, target: Any, field: Any) -> Any:
+    '''the storage of a static field which was not linked when the method was compiled'''
+    from python_jvm.executer import Frame, _link_static
+    return field.values if field.values is not None else _link_static(Frame(thread, target, [], None), field)
+
+
+def _rem(value1: int, value2: int) -> int:
+    r = abs(value1) % abs(value2)  # sign follows the dividend
+    return -r if value1 < 0 else r
+
+
+def _call(thread: Any, target: Any, args: List[int]) -> Any:
+    '''
+    call from compiled code to a method which is not compiled (yet), past MAX_COMPILED_DEPTH,
+    or of a class which was not initialized when the caller was compiled
+    '''
+    c = target.c
+    if c is not None and c.initialized is not True:
+        return thread.invoke(target, args)
+    code = target.code
+    if code.compiled is None:
+        code.invocations += 1
+        if code.invocations >= thread.compile_threshold:
+            compile_method(thread.cfs, target)
+    if code.compiled and thread.compiled_depth < MAX_COMPILED_DEPTH:
+        return code.compiled(thread, *args)
+    return thread.invoke(target, args)
+
+
+_BINARY = {
+    'iadd': lambda a, b: _wrap(f'{a} + {b}'),
+    'isub': lambda a, b: _wrap(f'{a} - {b}'),
+    'imul': lambda a, b: _wrap(f'{a} * {b}'),
+    'idiv': lambda a, b: f'_div({a}, {b})',
+    'irem': lambda a, b: f'_rem({a}, {b})',
+    'ishl': lambda a, b: _wrap(f'{a} << ({b} & 31)'),
+    'ishr': lambda a, b: f'({a} >> ({b} & 31))',
+    'iushr': lambda a, b: _wrap(f'({a} & 4294967295) >> ({b} & 31)'),
+    'iand': lambda a, b: f'({a} & {b})',
+    'ior': lambda a, b: f'({a} | {b})',
+    'ixor': lambda a, b: f'({a} ^ {b})',
+}
+
+# conditional branch -> (operands, comparison)
+_CONDITIONS = {
+    'ifeq': (1, '=='), 'ifne': (1, '!='), 'iflt': (1, '<'), 'ifge': (1, '>='), 'ifgt': (1, '>'), 'ifle': (1, '<='),
+    'if_icmpeq': (2, '=='), 'if_icmpne': (2, '!='), 'if_icmplt': (2, '<'),
+    'if_icmpge': (2, '>='), 'if_icmpgt': (2, '>'), 'if_icmple': (2, '<='),
+}
+
+_SIMPLE = re.compile(r'^(-?\d+|[a-z]\d+)$')  # a literal or a variable
+
+
+class _MethodCompiler:
+    def __init__(self, cfs: Any, target: Any):
+        self.cfs = cfs
+        self.target = target
+        self.c: ClassFile = target.c
+        self.code: Code = target.code
+        self.decoded: List[Instruction] = self.code.decoded
+        self.namespace: Dict[str, Any] = {'_div': _div, '_rem': _rem, '_call': _call, '_statics': _statics}
+        self.temps = 0
+        self.depths: Dict[int, int] = {0: 0}  # block start -> stack depth on entry
+
+    def constant(self, value: Any) -> str:
+        name = f'k{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def temp(self) -> str:
+        self.temps += 1
+        return f't{self.temps}'
+
+    def leaders(self) -> List[int]:
+        starts = {0}
+        for i, ins in enumerate(self.decoded):
+            name = mnemonic(ins.opcode)
+            if ins.opcode in BRANCHES:
+                starts.add(ins.operand)
+                starts.add(i + 1)
+            elif ins.opcode == TABLESWITCH:
+                starts.update((ins.operand[0], *ins.operand[2]))
+                starts.add(i + 1)
+            elif ins.opcode == LOOKUPSWITCH:
+                starts.update((ins.operand[0], *ins.operand[1].values()))
+                starts.add(i + 1)
+            elif name in _RETURNS:
+                starts.add(i + 1)
+        return sorted(s for s in starts if s < len(self.decoded))
+
+    def resolve(self, pool_index: int) -> Any:
+        from python_jvm.executer import resolve_method
+        cp = self.c.constant_pool
+        ref = cp[pool_index]
+        if not isinstance(ref, CONSTANT_Methodref):
+            raise CompileError(f'unexpected constant {ref}')
+        cp_class: CONSTANT_Class = cp[ref.class_index]
+        cp_name_type: CONSTANT_NameAndType = cp[ref.name_and_type_index]
+        class_name = cp[cp_class.name_index].info.decode()
+        name = cp[cp_name_type.name_index].info.decode()
+        descriptor = cp[cp_name_type.descriptor_index].info.decode()
+        check_int_descriptor(descriptor)
+        try:
+            return resolve_method(self.cfs, class_name, name, descriptor, False)
+        except Exception as e:
+            raise CompileError(f'{class_name}.{name}{descriptor}: {e}')
+
+    def static_field(self, i: int) -> str:
+        '''the expression of the static int field of the getstatic or putstatic at i'''
+        from python_jvm.executer import _member_ref
+        field = self.code.unfused[i][1]
+        class_name, name, descriptor = _member_ref(self.c, field.pool_index)
+        if descriptor not in _INT_TYPES:
+            raise CompileError(f'static field {class_name}.{name} of type {descriptor}')
+        if field.values is not None:
+            return f'{self.constant(field.values)}[{field.index!r}]'
+        f = self.constant(field)
+        return f'_statics(thread, {self.constant(self.target)}, {f})[{f}.index]'
+
+    def jump(self, lines: List[str], stack: List[str], start: int, target: int, condition: Optional[str] = None, fallthrough: Optional[int] = None):
+        '''end a block at start: spill the stack to s<n> and go to target (if condition, else fallthrough)'''
+        spills = [(f's{i}', e) for i, e in enumerate(stack) if e != f's{i}']
+        if spills and condition is not None:
+            c = self.temp()
+            lines.append(f'{c} = {condition}')
+            condition = c
+        if spills:
+            lines.append(f'{", ".join(n for n, _ in spills)} = {", ".join(e for _, e in spills)}')
+        for t in (target, fallthrough):
+            if t is None:
+                continue
+            if self.depths.setdefault(t, len(stack)) != len(stack):
+                raise CompileError(f'stack depth differs at {t}')
+        if condition is None:
+            lines.append(f'pc = {target}')
+            if target <= start:
+                lines.append('continue')
+        elif target <= start:
+            lines.append(f'if {condition}:')
+            lines.append(f'    pc = {target}')
+            lines.append('    continue')
+            lines.append(f'pc = {fallthrough}')
+        else:
+            lines.append(f'pc = {target} if {condition} else {fallthrough}')
+
+    def compile_block(self, start: int, end: int) -> List[str]:
+        lines: List[str] = []
+        stack = [f's{i}' for i in range(self.depths[start])]
+
+        def materialize(e: str) -> str:
+            if _SIMPLE.match(e):
+                return e
+            t = self.temp()
+            lines.append(f'{t} = {e}')
+            return t
+
+        def spill_refs(local: str):
+            '''before a local changes, stack entries reading it are evaluated'''
+            pattern = re.compile(rf'\b{local}\b')
+            for i, e in enumerate(stack):
+                if pattern.search(e):
+                    t = self.temp()
+                    lines.append(f'{t} = {e}')
+                    stack[i] = t
+
+        for i in range(start, end):
+            ins = self.decoded[i]
+            name = mnemonic(ins.opcode)
+            if name == 'nop':
+                pass
+            elif name.startswith('iconst_') or name in ('bipush', 'sipush'):
+                stack.append(str(ins.operand))
+            elif name in ('ldc', 'ldc_w'):
+                constant = self.c.constant_pool[ins.operand]
+                if not isinstance(constant, CONSTANT_Integer):
+                    raise CompileError(f'ldc of {constant}')
+                stack.append(str(((constant.value + 0x80000000) & 0xFFFFFFFF) - 0x80000000))
+            elif name.startswith('iload'):
+                stack.append(f'l{ins.operand}')
+            elif name.startswith('istore'):
+                value = stack.pop()
+                spill_refs(f'l{ins.operand}')
+                lines.append(f'l{ins.operand} = {value}')
+            elif name == 'iinc':
+                index, const = ins.operand
+                spill_refs(f'l{index}')
+                lines.append(f'l{index} = {_wrap(f"l{index} + {const}")}')
+            elif name == 'pop':
+                stack.pop()
+            elif name == 'dup':
+                stack.append(materialize(stack.pop()))
+                stack.append(stack[-1])
+            elif name == 'dup_x1':
+                value1 = materialize(stack.pop())
+                value2 = stack.pop()
+                stack += [value1, value2, value1]
+            elif name == 'swap':
+                stack[-1], stack[-2] = stack[-2], stack[-1]
+            elif name in _BINARY:
+                value2 = stack.pop()
+                value1 = stack.pop()
+                if name == 'idiv' or name == 'irem':
+                    # may throw, so evaluated in order with the calls and stores which follow
+                    stack.append(materialize(_BINARY[name](value1, value2)))
+                else:
+                    stack.append(_BINARY[name](value1, value2))
+            elif name == 'ineg':
+                stack.append(_wrap(f'-{stack.pop()}'))
+            elif name in _CONDITIONS:
+                n, op = _CONDITIONS[name]
+                value2 = stack.pop() if n == 2 else '0'
+                value1 = stack.pop()
+                self.jump(lines, stack, start, ins.operand, f'({value1} {op} {value2})', i + 1)
+                return lines
+            elif name in ('goto', 'goto_w'):
+                self.jump(lines, stack, start, ins.operand)
+                return lines
+            elif ins.opcode in (TABLESWITCH, LOOKUPSWITCH):
+                if ins.opcode == TABLESWITCH:
+                    default, low, targets = ins.operand
+                    table = {low + k: t for k, t in enumerate(targets)}
+                else:
+                    default, table = ins.operand
+                key = materialize(stack.pop())
+                for t in (default, *table.values()):
+                    if self.depths.setdefault(t, len(stack)) != len(stack):
+                        raise CompileError(f'stack depth differs at {t}')
+                if stack:
+                    raise CompileError('switch with operands on the stack')
+                lines.append(f'pc = {self.constant(table)}.get({key}, {default})')
+                lines.append('continue')
+                return lines
+            elif name == 'ireturn':
+                lines.append(f'return {stack.pop()}')
+                return lines
+            elif name == 'return':
+                lines.append('return None')
+                return lines
+            elif name == 'getstatic':
+                t = self.temp()
+                lines.append(f'{t} = {self.static_field(i)}')
+                stack.append(t)
+            elif name == 'putstatic':
+                value = stack.pop()
+                lines.append(f'{self.static_field(i)} = {value}')
+            elif name == 'invokestatic':
+                callee = self.resolve(ins.operand)
+                args = [stack.pop() for _ in range(callee.arg_count)][::-1]
+                f = self.constant(callee.native if callee.native is not None else callee)
+                if callee.native is not None:
+                    call = f'{f}({", ".join(args)})'
+                elif callee.c is not None and callee.c.initialized is not True:
+                    # initialized by thread.invoke on the first call
+                    call = f'_call(thread, {f}, [{", ".join(args)}])'
+                else:
+                    call = (f'{f}.code.compiled(thread, {"".join(a + ", " for a in args)})'
+                            f' if {f}.code.compiled and thread.compiled_depth < {MAX_COMPILED_DEPTH}'
+                            f' else _call(thread, {f}, [{", ".join(args)}])')
+                if callee.returns:
+                    t = self.temp()
+                    lines.append(f'{t} = {call}')
+                    stack.append(t)
+                else:
+                    lines.append(call)
+            else:
+                raise CompileError(f'unsupported instruction {name}')
+        # falls through to the next block
+        self.jump(lines, stack, start, end)
+        return lines
+
+    def compile(self) -> Callable[..., Any]:
+        leaders = self.leaders()
+        bounds = dict(zip(leaders, leaders[1:] + [len(self.decoded)]))
+        blocks: Dict[int, List[str]] = {}
+        pending = [0]
+        while pending:
+            start = pending.pop()
+            if start in blocks:
+                continue
+            if start not in bounds:
+                raise CompileError(f'branch into the middle of a block at {start}')
+            blocks[start] = self.compile_block(start, bounds[start])
+            pending += [t for t in self.depths if t not in blocks]
+
+        target = self.target
+        fn_name = re.sub(r'\W', '_', f'{target._class}_{target.name}')
+        n_params = target.arg_count
+        params = [f'l{i}' for i in range(n_params)] + [f'l{i}=None' for i in range(n_params, self.code.max_locals)]
+        source = [
+            f'def {fn_name}(thread, {"".join(p + ", " for p in params)}*, _pc=0):',
+            '    thread.compiled_depth += 1',
+            '    try:',
+            '        pc = _pc',
+            '        while True:',
+        ]
+        for start in sorted(blocks):
+            source.append(f'            if pc == {start}:')
+            source += [f'                {line}' for line in blocks[start]]
+        source += [
+            '    finally:',
+            '        thread.compiled_depth -= 1',
+            '',
+        ]
+        text = '\n'.join(source)
+        exec(compile(text, f'<compiled {target.label}>', 'exec'), self.namespace)
+        fn = self.namespace[fn_name]
+        fn.source = text
+        fn.entries = frozenset(start for start in blocks if self.depths[start] == 0)
+        return fn
+
+
+def check_int_descriptor(descriptor: str):
+    '''raise CompileError unless every parameter and the result (or void) is an int type'''
+    params, return_type = parse_method_descriptor(descriptor)
+    if any(p not in _INT_TYPES for p in params) or return_type not in _INT_TYPES and return_type != 'V':
+        raise CompileError(f'not an int method {descriptor}')
+
+
+def compile_method(cfs: Any, target: Any) -> Optional[Callable[..., Any]]:
+    '''
+    compile target (an executer.ResolvedMethod) and install it as target.code.compiled.
+    returns None and marks the Code as not compilable when it uses anything unsupported.
+    '''
+    code: Code = target.code
+    if code.compiled is not None:
+        return code.compiled or None
+    try:
+        if target.method is None or not target.method.is_static:
+            raise CompileError('not a static method')
+        if target.method.is_synchronized:
+            raise CompileError('synchronized')
+        if code.exception_table:
+            # handlers need the frames of the interpreter to unwind to
+            raise CompileError('exception handlers')
+        check_int_descriptor(target.descriptor)
+        code.compiled = _MethodCompiler(cfs, target).compile()
+        logging.debug(f'compiled {target.label}')
+    except CompileError as e:
+        logging.debug(f'not compiling {target.label}: {e}')
+        code.compiled = False
+        # stop counting loop iterations of this method
+        from python_jvm.executer import _backedge
+        for i, (handler, operand) in enumerate(code.instructions):
+            if handler is _backedge:
+                code.instructions[i] = operand
+    return code.compiled or None
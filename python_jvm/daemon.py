@@ -0,0 +1,198 @@
+'''
+a warm vm serving invocations over a unix socket.
+
+    python -m python_jvm.daemon serve /tmp/jvm.sock 'build/classes:lib/app.jar'
+    python -m python_jvm.daemon call /tmp/jvm.sock 'Kernels.gcd(II)I' 1071 462
+
+the daemon loads and links every class once, and keeps the compiled methods across requests.
+a request is one line of json, the method and its arguments:
+
+    ["Kernels.gcd(II)I", 1071, 462]
+
+the descriptor may be left out ("Kernels.gcd"), then the first overload is invoked.
+the response is one line too, {"result": 21, "stdout": "", "ms": 0.1} or {"error": "..."}.
+
+every request allocates from a heap of its own, so objects never leak from one request into
+another one while the classes (and the caches of memo) are shared. so are the static fields:
+a class is initialized once, by the first request using it. requests on one connection
+run one after the other, requests on different connections run concurrently (see aio).
+'''
+import asyncio
+import io
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Mapping, Optional
+from python_jvm.aio import DEFAULT_BUDGET, AsyncVM
+from python_jvm.class_parser import ClassFile
+from python_jvm.classloader import ClassLoader
+from python_jvm.compiler import DEFAULT_COMPILE_THRESHOLD
+from python_jvm.executer import link_classes
+from python_jvm.heap import DEFAULT_MAX_BYTES, Heap, PrimitiveArray, ReferenceArray
+from python_jvm.util import parse_method
+
+
+class DaemonError(Exception):
+    pass
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (PrimitiveArray, ReferenceArray)):
+        return [_jsonable(v) for v in value]
+    return repr(value)
+
+
+class Daemon:
+    '''
+    serves invocations of static methods on cfs. max_bytes bounds the heap of every request,
+    timeout (seconds) its run time. a call into compiled code runs to its end (see aio), so
+    with a compile_threshold the timeout does not stop a compiled method looping forever.
+    '''
+
+    def __init__(self, cfs: Mapping[str, ClassFile], budget: int = DEFAULT_BUDGET, timeout: Optional[float] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, compile_threshold: Optional[int] = DEFAULT_COMPILE_THRESHOLD):
+        self.cfs = cfs
+        self.vm = AsyncVM(cfs, budget=budget, compile_threshold=compile_threshold)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.requests = 0
+        self.errors = 0
+
+    def warm_up(self) -> int:
+        '''load every class on the class path and link its methods, returns the number of methods linked'''
+        return link_classes(self.cfs)
+
+    async def handle(self, request: Any) -> Dict[str, Any]:
+        '''run one decoded request and build its response'''
+        self.requests += 1
+        start = time.perf_counter()
+        stdout = io.StringIO()
+        try:
+            if not isinstance(request, list) or not request or not isinstance(request[0], str):
+                raise DaemonError(f'expected ["<class>.<method>", args...], got {request!r}')
+            _class, name, descriptor = parse_method(request[0])
+            if _class not in self.cfs:
+                raise DaemonError(f'class {_class} not found')
+            result = await self.vm.invoke_static(_class, name, request[1:], descriptor, timeout=self.timeout,
+                                                 stdout=stdout, heap=Heap(self.max_bytes))
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.errors += 1
+            return {'error': f'timed out after {self.timeout}s', 'stdout': stdout.getvalue()}
+        except Exception as e:
+            self.errors += 1
+            return {'error': f'{type(e).__name__}: {e}', 'stdout': stdout.getvalue()}
+        ms = (time.perf_counter() - start) * 1000
+        return {'result': _jsonable(result), 'stdout': stdout.getvalue(), 'ms': round(ms, 3)}
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {'error': f'malformed request: {e}'}
+                else:
+                    response = await self.handle(request)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path: str, ready: Optional[asyncio.Event] = None):
+        '''listen on the unix socket path until cancelled'''
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self._connection, path)
+        logging.info(f'serving on {path}')
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+class Client:
+    '''a blocking connection to a daemon'''
+
+    def __init__(self, path: str):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.file = self.socket.makefile('rwb')
+
+    def request(self, method: str, *args: Any) -> Dict[str, Any]:
+        self.file.write(json.dumps([method, *args]).encode() + b'\n')
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise DaemonError('the daemon closed the connection')
+        return json.loads(line)
+
+    def invoke(self, method: str, *args: Any) -> Any:
+        '''the result of method, DaemonError if it failed'''
+        response = self.request(method, *args)
+        if 'error' in response:
+            raise DaemonError(response['error'])
+        return response['result']
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self) -> 'Client':
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+
+def _argument(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+USAGE = '''usage: python -m python_jvm.daemon serve <socket> <classpath>
+       python -m python_jvm.daemon call <socket> <class>.<method>[<descriptor>] [args...]'''
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 3 and argv[0] == 'serve':
+        logging.basicConfig(level=logging.INFO)
+        daemon = Daemon(ClassLoader(argv[2]))
+        logging.info(f'{daemon.warm_up()} methods linked')
+        try:
+            asyncio.run(daemon.serve(argv[1]))
+        except KeyboardInterrupt:
+            pass
+    elif len(argv) >= 3 and argv[0] == 'call':
+        with Client(argv[1]) as client:
+            response = client.request(argv[2], *map(_argument, argv[3:]))
+        sys.stdout.write(response.get('stdout', ''))
+        if 'error' in response:
+            print(response['error'], file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(response['result']))
+    else:
+        print(USAGE, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+import struct
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+
+class Instruction(NamedTuple):
+    pc: int  # byte offset of the opcode in Code.code
+    opcode: int
+    operand: Any  # pre-parsed operand(s), branch targets are instruction indices
+
+
+# opcode -> (mnemonic, operand format for struct (big endian), implicit operand)
+# see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-6.html
+OPCODES: Dict[int, Tuple[str, str, Any]] = {
+    0x00: ('nop', '', None),
+    0x01: ('aconst_null', '', None),
+    0x02: ('iconst_m1', '', -1),
+    0x03: ('iconst_0', '', 0),
+    0x04: ('iconst_1', '', 1),
+    0x05: ('iconst_2', '', 2),
+    0x06: ('iconst_3', '', 3),
+    0x07: ('iconst_4', '', 4),
+    0x08: ('iconst_5', '', 5),
+    0x09: ('lconst_0', '', 0),
+    0x0a: ('lconst_1', '', 1),
+    0x0b: ('fconst_0', '', 0.0),
+    0x0c: ('fconst_1', '', 1.0),
+    0x0d: ('fconst_2', '', 2.0),
+    0x0e: ('dconst_0', '', 0.0),
+    0x0f: ('dconst_1', '', 1.0),
+    0x10: ('bipush', 'b', None),
+    0x11: ('sipush', 'h', None),
+    0x12: ('ldc', 'B', None),
+    0x13: ('ldc_w', 'H', None),
+    0x14: ('ldc2_w', 'H', None),
+    0x15: ('iload', 'B', None),
+    0x16: ('lload', 'B', None),
+    0x17: ('fload', 'B', None),
+    0x18: ('dload', 'B', None),
+    0x19: ('aload', 'B', None),
+    0x1a: ('iload_0', '', 0),
+    0x1b: ('iload_1', '', 1),
+    0x1c: ('iload_2', '', 2),
+    0x1d: ('iload_3', '', 3),
+    0x1e: ('lload_0', '', 0),
+    0x1f: ('lload_1', '', 1),
+    0x20: ('lload_2', '', 2),
+    0x21: ('lload_3', '', 3),
+    0x22: ('fload_0', '', 0),
+    0x23: ('fload_1', '', 1),
+    0x24: ('fload_2', '', 2),
+    0x25: ('fload_3', '', 3),
+    0x26: ('dload_0', '', 0),
+    0x27: ('dload_1', '', 1),
+    0x28: ('dload_2', '', 2),
+    0x29: ('dload_3', '', 3),
+    0x2a: ('aload_0', '', 0),
+    0x2b: ('aload_1', '', 1),
+    0x2c: ('aload_2', '', 2),
+    0x2d: ('aload_3', '', 3),
+    0x2e: ('iaload', '', None),
+    0x2f: ('laload', '', None),
+    0x30: ('faload', '', None),
+    0x31: ('daload', '', None),
+    0x32: ('aaload', '', None),
+    0x33: ('baload', '', None),
+    0x34: ('caload', '', None),
+    0x35: ('saload', '', None),
+    0x36: ('istore', 'B', None),
+    0x37: ('lstore', 'B', None),
+    0x38: ('fstore', 'B', None),
+    0x39: ('dstore', 'B', None),
+    0x3a: ('astore', 'B', None),
+    0x3b: ('istore_0', '', 0),
+    0x3c: ('istore_1', '', 1),
+    0x3d: ('istore_2', '', 2),
+    0x3e: ('istore_3', '', 3),
+    0x3f: ('lstore_0', '', 0),
+    0x40: ('lstore_1', '', 1),
+    0x41: ('lstore_2', '', 2),
+    0x42: ('lstore_3', '', 3),
+    0x43: ('fstore_0', '', 0),
+    0x44: ('fstore_1', '', 1),
+    0x45: ('fstore_2', '', 2),
+    0x46: ('fstore_3', '', 3),
+    0x47: ('dstore_0', '', 0),
+    0x48: ('dstore_1', '', 1),
+    0x49: ('dstore_2', '', 2),
+    0x4a: ('dstore_3', '', 3),
+    0x4b: ('astore_0', '', 0),
+    0x4c: ('astore_1', '', 1),
+    0x4d: ('astore_2', '', 2),
+    0x4e: ('astore_3', '', 3),
+    0x4f: ('iastore', '', None),
+    0x50: ('lastore', '', None),
+    0x51: ('fastore', '', None),
+    0x52: ('dastore', '', None),
+    0x53: ('aastore', '', None),
+    0x54: ('bastore', '', None),
+    0x55: ('castore', '', None),
+    0x56: ('sastore', '', None),
+    0x57: ('pop', '', None),
+    0x58: ('pop2', '', None),
+    0x59: ('dup', '', None),
+    0x5a: ('dup_x1', '', None),
+    0x5b: ('dup_x2', '', None),
+    0x5c: ('dup2', '', None),
+    0x5d: ('dup2_x1', '', None),
+    0x5e: ('dup2_x2', '', None),
+    0x5f: ('swap', '', None),
+    0x60: ('iadd', '', None),
+    0x61: ('ladd', '', None),
+    0x62: ('fadd', '', None),
+    0x63: ('dadd', '', None),
+    0x64: ('isub', '', None),
+    0x65: ('lsub', '', None),
+    0x66: ('fsub', '', None),
+    0x67: ('dsub', '', None),
+    0x68: ('imul', '', None),
+    0x69: ('lmul', '', None),
+    0x6a: ('fmul', '', None),
+    0x6b: ('dmul', '', None),
+    0x6c: ('idiv', '', None),
+    0x6d: ('ldiv', '', None),
+    0x6e: ('fdiv', '', None),
+    0x6f: ('ddiv', '', None),
+    0x70: ('irem', '', None),
+    0x71: ('lrem', '', None),
+    0x72: ('frem', '', None),
+    0x73: ('drem', '', None),
+    0x74: ('ineg', '', None),
+    0x75: ('lneg', '', None),
+    0x76: ('fneg', '', None),
+    0x77: ('dneg', '', None),
+    0x78: ('ishl', '', None),
+    0x79: ('lshl', '', None),
+    0x7a: ('ishr', '', None),
+    0x7b: ('lshr', '', None),
+    0x7c: ('iushr', '', None),
+    0x7d: ('lushr', '', None),
+    0x7e: ('iand', '', None),
+    0x7f: ('land', '', None),
+    0x80: ('ior', '', None),
+    0x81: ('lor', '', None),
+    0x82: ('ixor', '', None),
+    0x83: ('lxor', '', None),
+    0x84: ('iinc', 'Bb', None),
+    0x85: ('i2l', '', None),
+    0x86: ('i2f', '', None),
+    0x87: ('i2d', '', None),
+    0x88: ('l2i', '', None),
+    0x89: ('l2f', '', None),
+    0x8a: ('l2d', '', None),
+    0x8b: ('f2i', '', None),
+    0x8c: ('f2l', '', None),
+    0x8d: ('f2d', '', None),
+    0x8e: ('d2i', '', None),
+    0x8f: ('d2l', '', None),
+    0x90: ('d2f', '', None),
+    0x91: ('i2b', '', None),
+    0x92: ('i2c', '', None),
+    0x93: ('i2s', '', None),
+    0x94: ('lcmp', '', None),
+    0x95: ('fcmpl', '', None),
+    0x96: ('fcmpg', '', None),
+    0x97: ('dcmpl', '', None),
+    0x98: ('dcmpg', '', None),
+    0x99: ('ifeq', 'h', None),
+    0x9a: ('ifne', 'h', None),
+    0x9b: ('iflt', 'h', None),
+    0x9c: ('ifge', 'h', None),
+    0x9d: ('ifgt', 'h', None),
+    0x9e: ('ifle', 'h', None),
+    0x9f: ('if_icmpeq', 'h', None),
+    0xa0: ('if_icmpne', 'h', None),
+    0xa1: ('if_icmplt', 'h', None),
+    0xa2: ('if_icmpge', 'h', None),
+    0xa3: ('if_icmpgt', 'h', None),
+    0xa4: ('if_icmple', 'h', None),
+    0xa5: ('if_acmpeq', 'h', None),
+    0xa6: ('if_acmpne', 'h', None),
+    0xa7: ('goto', 'h', None),
+    0xa8: ('jsr', 'h', None),
+    0xa9: ('ret', 'B', None),
+    0xaa: ('tableswitch', '', None),
+    0xab: ('lookupswitch', '', None),
+    0xac: ('ireturn', '', None),
+    0xad: ('lreturn', '', None),
+    0xae: ('freturn', '', None),
+    0xaf: ('dreturn', '', None),
+    0xb0: ('areturn', '', None),
+    0xb1: ('return', '', None),
+    0xb2: ('getstatic', 'H', None),
+    0xb3: ('putstatic', 'H', None),
+    0xb4: ('getfield', 'H', None),
+    0xb5: ('putfield', 'H', None),
+    0xb6: ('invokevirtual', 'H', None),
+    0xb7: ('invokespecial', 'H', None),
+    0xb8: ('invokestatic', 'H', None),
+    0xb9: ('invokeinterface', 'HBx', None),
+    0xba: ('invokedynamic', 'Hxx', None),
+    0xbb: ('new', 'H', None),
+    0xbc: ('newarray', 'B', None),
+    0xbd: ('anewarray', 'H', None),
+    0xbe: ('arraylength', '', None),
+    0xbf: ('athrow', '', None),
+    0xc0: ('checkcast', 'H', None),
+    0xc1: ('instanceof', 'H', None),
+    0xc2: ('monitorenter', '', None),
+    0xc3: ('monitorexit', '', None),
+    0xc4: ('wide', '', None),
+    0xc5: ('multianewarray', 'HB', None),
+    0xc6: ('ifnull', 'h', None),
+    0xc7: ('ifnonnull', 'h', None),
+    0xc8: ('goto_w', 'i', None),
+    0xc9: ('jsr_w', 'i', None),
+}
+
+BRANCHES = frozenset([*range(0x99, 0xa9), 0xc6, 0xc7, 0xc8, 0xc9])
+TABLESWITCH = 0xaa
+LOOKUPSWITCH = 0xab
+WIDE = 0xc4
+IINC = 0x84
+
+_STRUCTS: Dict[str, struct.Struct] = {fmt: struct.Struct('>' + fmt) for _, fmt, _ in OPCODES.values() if fmt}
+_INT = struct.Struct('>i')
+
+
+def mnemonic(opcode: int) -> str:
+    return OPCODES[opcode][0] if opcode in OPCODES else f'unknown_{opcode:02x}'
+
+
+def _decode_switch(code: bytes, pc: int, opcode: int) -> Tuple[Any, int]:
+    '''
+    returns operand with byte offsets as pc (converted later) and the next pc.
+    see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-6.html#jvms-6.5.tableswitch
+    '''
+    p = pc + 1
+    p += (4 - p % 4) % 4  # 0-3 bytes padding
+    default = pc + _INT.unpack_from(code, p)[0]
+    if opcode == TABLESWITCH:
+        low = _INT.unpack_from(code, p + 4)[0]
+        high = _INT.unpack_from(code, p + 8)[0]
+        p += 12
+        n = high - low + 1
+        offsets = struct.unpack_from(f'>{n}i', code, p)
+        return (default, low, tuple(pc + o for o in offsets)), p + 4 * n
+    npairs = _INT.unpack_from(code, p + 4)[0]
+    p += 8
+    pairs = struct.unpack_from(f'>{2 * npairs}i', code, p)
+    return (default, {pairs[i]: pc + pairs[i + 1] for i in range(0, len(pairs), 2)}), p + 8 * npairs
+
+
+def decode(code: bytes) -> List[Instruction]:
+    '''
+    decode bytecode into an instruction list.
+    branch targets are converted from relative byte offsets to absolute instruction indices.
+    '''
+    raw: List[Instruction] = []
+    pc = 0
+    end = len(code)
+    while pc < end:
+        opcode = code[pc]
+        if opcode not in OPCODES:
+            raise Exception(f'unknown opcode {opcode:#04x} at {pc}')
+        _, fmt, operand = OPCODES[opcode]
+        next_pc = pc + 1
+        if opcode == WIDE:
+            # wide <opcode> indexbyte1 indexbyte2 [constbyte1 constbyte2]
+            opcode = code[pc + 1]
+            if opcode == IINC:
+                operand = struct.unpack_from('>Hh', code, pc + 2)
+                next_pc = pc + 6
+            else:
+                operand = struct.unpack_from('>H', code, pc + 2)[0]
+                next_pc = pc + 4
+        elif opcode == TABLESWITCH or opcode == LOOKUPSWITCH:
+            operand, next_pc = _decode_switch(code, pc, opcode)
+        elif fmt:
+            s = _STRUCTS[fmt]
+            values = s.unpack_from(code, next_pc)
+            operand = values[0] if len(values) == 1 else values
+            next_pc += s.size
+            if opcode in BRANCHES:
+                operand += pc
+        raw.append(Instruction(pc, opcode, operand))
+        pc = next_pc
+
+    index: Dict[int, int] = {ins.pc: i for i, ins in enumerate(raw)}
+
+    def to_index(target: int) -> int:
+        if target not in index:
+            raise Exception(f'branch target {target} is not an instruction boundary')
+        return index[target]
+
+    instructions: List[Instruction] = []
+    for ins in raw:
+        if ins.opcode in BRANCHES:
+            ins = ins._replace(operand=to_index(ins.operand))
+        elif ins.opcode == TABLESWITCH:
+            default, low, targets = ins.operand
+            ins = ins._replace(operand=(to_index(default), low, tuple(to_index(t) for t in targets)))
+        elif ins.opcode == LOOKUPSWITCH:
+            default, pairs = ins.operand
+            ins = ins._replace(operand=(to_index(default), {k: to_index(t) for k, t in pairs.items()}))
+        instructions.append(ins)
+    return instructions
+
@@ -0,0 +1,207 @@
+'''
+java exceptions.
+
+a java exception is a JavaObject of a subclass of java/lang/Throwable, thrown through python as
+a JavaThrowable. the errors the vm and the natives raise themselves (e.g. ZeroDivisionError of
+idiv, IndexOutOfBoundsError of String.charAt) stand for the java exception of the class they are
+registered with in errors, which is only allocated when a handler catches it. an exception no
+handler catches reaches the caller of Thread.invoke as it was raised.
+
+the exception table of a method is indexed on the first throw into it: the table is cut into
+ranges at every start and end, so the handlers covering a pc are found by one bisect.
+'''
+from bisect import bisect_right
+from typing import Dict, List, Mapping, Optional, Tuple
+from python_jvm import monitor, natives
+from python_jvm.natives import NullPointerError
+from python_jvm.class_parser import CONSTANT_Class, ClassFile, Code
+from python_jvm.heap import BUILTIN_LAYOUTS, Heap, JavaObject, Layout, NegativeArraySizeError, OutOfMemoryError, layout_of
+
+THROWABLE = 'java/lang/Throwable'
+THROWABLE_LAYOUT = BUILTIN_LAYOUTS[THROWABLE] = Layout(THROWABLE, None, [
+    ('detailMessage', 'Ljava/lang/String;'),
+    ('cause', 'Ljava/lang/Throwable;'),
+])
+_MESSAGE = THROWABLE_LAYOUT.slots['detailMessage']
+_CAUSE = THROWABLE_LAYOUT.slots['cause']
+
+# the throwables of the jdk the vm knows, class -> superclass (declared after it)
+_HIERARCHY = {
+    'java/lang/Exception': THROWABLE,
+    'java/lang/Error': THROWABLE,
+    'java/lang/RuntimeException': 'java/lang/Exception',
+    'java/lang/InterruptedException': 'java/lang/Exception',
+    'java/lang/CloneNotSupportedException': 'java/lang/Exception',
+    'java/lang/ArithmeticException': 'java/lang/RuntimeException',
+    'java/lang/ArrayStoreException': 'java/lang/RuntimeException',
+    'java/lang/ClassCastException': 'java/lang/RuntimeException',
+    'java/lang/IllegalArgumentException': 'java/lang/RuntimeException',
+    'java/lang/NumberFormatException': 'java/lang/IllegalArgumentException',
+    'java/lang/IllegalStateException': 'java/lang/RuntimeException',
+    'java/lang/IllegalMonitorStateException': 'java/lang/RuntimeException',
+    'java/lang/IndexOutOfBoundsException': 'java/lang/RuntimeException',
+    'java/lang/ArrayIndexOutOfBoundsException': 'java/lang/IndexOutOfBoundsException',
+    'java/lang/StringIndexOutOfBoundsException': 'java/lang/IndexOutOfBoundsException',
+    'java/lang/NegativeArraySizeException': 'java/lang/RuntimeException',
+    'java/lang/NullPointerException': 'java/lang/RuntimeException',
+    'java/lang/UnsupportedOperationException': 'java/lang/RuntimeException',
+    'java/util/NoSuchElementException': 'java/lang/RuntimeException',
+    'java/lang/AssertionError': 'java/lang/Error',
+    'java/lang/LinkageError': 'java/lang/Error',
+    'java/lang/ExceptionInInitializerError': 'java/lang/LinkageError',
+    'java/lang/NoClassDefFoundError': 'java/lang/LinkageError',
+    'java/lang/VirtualMachineError': 'java/lang/Error',
+    'java/lang/OutOfMemoryError': 'java/lang/VirtualMachineError',
+    'java/lang/StackOverflowError': 'java/lang/VirtualMachineError',
+}
+for _name, _super in _HIERARCHY.items():
+    BUILTIN_LAYOUTS[_name] = Layout(_name, BUILTIN_LAYOUTS[_super], [])
+
+
+class JavaThrowable(Exception):
+    '''a java exception thrown by athrow, throwable is the exception object'''
+
+    def __init__(self, throwable: JavaObject):
+        super().__init__(throwable)
+        self.throwable = throwable
+
+    def __str__(self):
+        return _to_string(self.throwable)
+
+
+# python errors raised for java exceptions, python class -> java class.
+# a subclass of a registered class is found through its mro.
+errors: Dict[type, str] = {
+    ZeroDivisionError: 'java/lang/ArithmeticException',  # idiv, irem, ldiv and lrem
+    natives.IntegerOverflowError: 'java/lang/ArithmeticException',
+    NullPointerError: 'java/lang/NullPointerException',
+    natives.NumberFormatError: 'java/lang/NumberFormatException',
+    natives.IndexOutOfBoundsError: 'java/lang/IndexOutOfBoundsException',
+    natives.ArrayIndexOutOfBoundsError: 'java/lang/ArrayIndexOutOfBoundsException',
+    natives.ArrayStoreError: 'java/lang/ArrayStoreException',
+    natives.ClassCastError: 'java/lang/ClassCastException',
+    natives.IllegalArgumentError: 'java/lang/IllegalArgumentException',
+    NegativeArraySizeError: 'java/lang/NegativeArraySizeException',
+    OutOfMemoryError: 'java/lang/OutOfMemoryError',
+    monitor.IllegalMonitorStateError: 'java/lang/IllegalMonitorStateException',
+}
+
+
+def java_class(error: BaseException) -> Optional[str]:
+    '''the class of the java exception error stands for, None if it is not one (an error of the vm)'''
+    if error.__class__ is JavaThrowable:
+        return error.throwable.layout.name
+    for t in error.__class__.__mro__:
+        name = errors.get(t)
+        if name is not None:
+            return name
+    return None
+
+
+def throwable_of(heap: Heap, cfs: Mapping[str, ClassFile], error: BaseException, class_name: str) -> JavaObject:
+    '''the exception object of error (of the java class class_name), allocated unless athrow threw it'''
+    if error.__class__ is JavaThrowable:
+        return error.throwable
+    throwable = heap.new(layout_of(cfs, class_name))
+    if isinstance(error, ZeroDivisionError):
+        throwable[_MESSAGE] = '/ by zero'
+    elif class_name != 'java/lang/NullPointerException':
+        throwable[_MESSAGE] = str(error)
+    return throwable
+
+
+def is_subclass(layout: Layout, class_name: str) -> bool:
+    while layout is not None:
+        if layout.name == class_name:
+            return True
+        layout = layout.super
+    return False
+
+
+class HandlerIndex:
+    '''
+    the handlers of a method by pc range. ranges[i] holds the handlers covering the instruction
+    indexes from bounds[i] up to bounds[i + 1], as (catch class or None for any, handler index)
+    in exception table order, which is the order the jvm tries them in.
+    '''
+    __slots__ = ('bounds', 'ranges')
+
+    def __init__(self, bounds: List[int], ranges: List[Tuple[Tuple[Optional[str], int], ...]]):
+        self.bounds = bounds
+        self.ranges = ranges
+
+    def find(self, pc: int, layout: Layout) -> Optional[int]:
+        '''the index of the handler of an exception of layout thrown at pc, None if there is none'''
+        i = bisect_right(self.bounds, pc) - 1
+        if i < 0:
+            return None
+        for catch_type, handler in self.ranges[i]:
+            if catch_type is None or is_subclass(layout, catch_type):
+                return handler
+        return None
+
+    def __repr__(self):
+        return f'HandlerIndex({list(zip(self.bounds, self.ranges))})'
+
+
+def index_handlers(c: ClassFile, code: Code) -> HandlerIndex:
+    '''build (and cache in Code.handlers) the index of the linked method code of class c'''
+    if code.handlers is not None:
+        return code.handlers
+    # byte offsets -> instruction indexes, the end of the code included
+    indexes = {ins.pc: i for i, ins in enumerate(code.decoded)}
+    indexes[code.code_length] = len(code.decoded)
+    entries = []
+    for e in code.exception_table:
+        catch_type = None
+        if e.catch_type:
+            cp_class: CONSTANT_Class = c.constant_pool[e.catch_type]
+            catch_type = c.constant_pool[cp_class.name_index].info.decode()
+        entries.append((indexes[e.start_pc], indexes[e.end_pc], catch_type, indexes[e.handler_pc]))
+    bounds = sorted({pc for start, end, _, _ in entries for pc in (start, end)})
+    ranges = [tuple((catch_type, handler) for start, end, catch_type, handler in entries if start <= pc < end) for pc in bounds]
+    code.handlers = HandlerIndex(bounds, ranges)
+    return code.handlers
+
+
+# java/lang/Throwable
+
+def _to_string(throwable: JavaObject) -> str:
+    name = throwable.layout.name.replace('/', '.')
+    message = throwable[_MESSAGE]
+    return name if message is None else f'{name}: {message}'
+
+
+def _init(throwable: JavaObject, message: Optional[str] = None, cause: Optional[JavaObject] = None):
+    throwable[_MESSAGE] = message
+    throwable[_CAUSE] = cause
+
+
+def _init_cause(throwable: JavaObject, cause: Optional[JavaObject]) -> JavaObject:
+    throwable[_CAUSE] = cause
+    return throwable
+
+
+def _print_stack_trace(throwable: JavaObject):
+    natives.err.write(_to_string(throwable) + '\n')
+
+
+for _name in (THROWABLE, *_HIERARCHY):
+    for _signature, _fn in {
+        '<init>()V': _init,
+        '<init>(Ljava/lang/String;)V': _init,
+        '<init>(Ljava/lang/String;Ljava/lang/Throwable;)V': _init,
+        '<init>(Ljava/lang/Throwable;)V': lambda t, cause: _init(t, None if cause is None else _to_string(cause), cause),
+    }.items():
+        natives.register(_name, _signature, _fn, static=False)
+for _signature, _fn in {
+    'getMessage()Ljava/lang/String;': lambda t: t[_MESSAGE],
+    'getLocalizedMessage()Ljava/lang/String;': lambda t: t[_MESSAGE],
+    'getCause()Ljava/lang/Throwable;': lambda t: t[_CAUSE],
+    'initCause(Ljava/lang/Throwable;)Ljava/lang/Throwable;': _init_cause,
+    'fillInStackTrace()Ljava/lang/Throwable;': lambda t: t,
+    'toString()Ljava/lang/String;': _to_string,
+    'printStackTrace()V': _print_stack_trace,
+}.items():
+    natives.register(THROWABLE, _signature, _fn, static=False)
+
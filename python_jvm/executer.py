@@ -1,403 +1,2505 @@
-import mmap
-import copy
-from textwrap import dedent
-from typing import Any, Dict, List, Optional, Union
-from python_jvm.class_parser import (BootstrapMethods, CONSTANT_Class, CONSTANT_Integer, CONSTANT_InvokeDynamic, CONSTANT_Methodref, CONSTANT_NameAndType, CONSTANT_String, Code,
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, TextIO, Tuple, Union
+from python_jvm.class_parser import (BootstrapMethods, CONSTANT_Class, CONSTANT_Double, CONSTANT_Float, CONSTANT_Integer, CONSTANT_Long, CONSTANT_InvokeDynamic, CONSTANT_MethodHandle, CONSTANT_MethodType,
+                                     CONSTANT_Methodref, CONSTANT_NameAndType, CONSTANT_String, Code,
                                      ClassFile,
                                      Method,
                                      CONSTANT_Utf8,
                                      CONSTANT_Fieldref,
                                      read_classfile)
-import logging
+from python_jvm import exceptions, monitor, natives
+from python_jvm.classloader import bulk_load
+from python_jvm.compiler import DEFAULT_COMPILE_THRESHOLD, MAX_COMPILED_DEPTH, compile_method
+from python_jvm.decoder import BRANCHES, IINC, Instruction, decode, mnemonic
+from python_jvm.heap import BUILTIN_LAYOUTS, Heap, JavaObject, Layout, NegativeArraySizeError, PrimitiveArray, Reference, ReferenceArray, layout_of
+from python_jvm.tracer import Tracer
 import glob
-from python_jvm.util import hexdump, parse_arg_num, parse_int
+import math
+import operator
+import struct
+from python_jvm.util import parse_method_descriptor
 
-std_method = {
-    'java/io/PrintStream': {
-        'println': lambda x: print(x[0])
-    }
-}
+# natives which need the calling frame, class -> name + descriptor -> function(frame, args).
+# args include the object ref, a return value is pushed by the function.
+# like a handler it returns True when it pushed or popped a frame, or parked the thread.
+intrinsics: Dict[str, Dict[str, Callable[['Frame', List[Any]], Optional[bool]]]] = {}
 
 
-def find_method(cfs: Dict[str, ClassFile], _class: str, name: str) -> Optional[Method]:
+def find_method(cfs: Mapping[str, ClassFile], _class: str, name: str, descriptor: Optional[str] = None) -> Optional[Method]:
     c = cfs[_class]
-    for m in c.methods:
-        cp_name: CONSTANT_Utf8 = c.constant_pool[m.name_index]
-        assert isinstance(cp_name, CONSTANT_Utf8)
-        if cp_name.info == name.encode():
-            return m
-    return None
+    if descriptor is not None:
+        return c.method_index.get((name, descriptor))
+    overloads = c.methods_by_name.get(name)
+    return overloads[0] if overloads else None
 
 
-def find_code(m: Method, cfs: Dict[str, ClassFile], _class: str) -> Optional[Code]:
-    c = cfs[_class]
-    for a in m.attribute_info:
-        cp_name: CONSTANT_Utf8 = c.constant_pool[a.attribute_name_index]
-        assert isinstance(cp_name, CONSTANT_Utf8)
-        if cp_name.info == b'Code':
-            return Code(a.info)
-    return None
+def find_code(m: Method, cfs: Mapping[str, ClassFile], _class: str) -> Optional[Code]:
+    return m.code
 
 
-def find_bootstrap_methods(cfs: Dict[str, ClassFile], _class: str) -> Optional[BootstrapMethods]:
+def find_bootstrap_methods(cfs: Mapping[str, ClassFile], _class: str) -> Optional[BootstrapMethods]:
     c = cfs[_class]
-    for a in c.attributes:
-        cp_name: CONSTANT_Utf8 = c.constant_pool[a.attribute_name_index]
-        assert isinstance(cp_name, CONSTANT_Utf8)
-        if cp_name.info == b'BootstrapMethods':
-            return BootstrapMethods(a.info)
-    return None
+    if c.bootstrap_methods is None and 'BootstrapMethods' in c.attribute_index:
+        c.bootstrap_methods = BootstrapMethods(c.attribute_index['BootstrapMethods'].info)
+    return c.bootstrap_methods
 
 
-def load_classes(classpath: str) -> Dict[str, ClassFile]:
+def load_classes(classpath: str, workers: int = 0) -> Dict[str, ClassFile]:
+    '''
+    parse every class file matching the glob.
+    workers > 0 parses them over a process pool of that size, and files which fail are logged and skipped.
+    '''
     files = glob.glob(classpath)
+    if workers > 0:
+        return bulk_load([(f, None) for f in files], workers).classes
     ret = {}
     for f in files:
         cf = read_classfile(f)
-        cp_class: CONSTANT_Class = cf.constant_pool[cf.this_class]
-        cp_name_utf8: CONSTANT_Utf8 = cf.constant_pool[cp_class.name_index]
-        class_name: str = cp_name_utf8.info.decode()
-        ret[class_name] = cf
+        ret[cf.name] = cf
     return ret
 
 
-def _merge_unsigned_bytes(byte1: int, byte2: int) -> int:
-    return int.from_bytes((byte1 << 8 | byte2).to_bytes(2, byteorder='big'), signed=True, byteorder='big')
+def _i32(value: int) -> int:
+    '''wrap to java int (32bit two's complement)'''
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
 
 
-def _new_instance(cfs: Dict[str, ClassFile], _class: str) -> Dict:
-    return {
-        '_class': 'Person',
-        'name': None,
-        'age': None
-    }
+def _i64(value: int) -> int:
+    '''wrap to java long (64bit two's complement)'''
+    return ((value + 0x8000000000000000) & 0xFFFFFFFFFFFFFFFF) - 0x8000000000000000
 
 
-def execute(code: Code, cfs: Dict[str, ClassFile], _class: str, local_variables, heap: Dict[Any, Any]):
-    c = cfs[_class]
-    with mmap.mmap(-1, len(code.code)) as mm:
-        mm.write(code.code)
-        mm.seek(0)
+_FLOAT = struct.Struct('f')
 
-        stack: List[Any] = []
-        heap: Dict[Any, Any] = heap if heap else {}
 
-        while True:
-            opcode: bytes = mm.read(1)
-
-            logging.debug(dedent(f'''
-            ########################
-            current class {_class}
-            current position {mm.tell() - 1}
-            opcode {hexdump(opcode)}
-            stack {stack}
-            heap {heap}
-            local_variables {local_variables}
-            ########################
-            '''))
-            if opcode == b'\x03':
-                logging.info('OPCODE: iconst_0')
-                stack.append(0)
-            elif opcode == b'\x04':
-                logging.info('OPCODE: iconst_1')
-                stack.append(1)
-            elif opcode == b'\x05':
-                logging.info('OPCODE: iconst_2')
-                stack.append(2)
-            elif opcode == b'\x06':
-                logging.info('OPCODE: iconst_3')
-                stack.append(3)
-            elif opcode == b'\x08':
-                logging.info('OPCODE: iconst_5')
-                stack.append(5)
-            elif opcode == b'\x10':
-                logging.info('OPCODE: bipush')
-                val = parse_int(mm.read(1))
-                stack.append(val)
-            elif opcode == b'\x11':
-                logging.info('OPCODE: sipush')
-                byte1 = parse_int(mm.read(1))
-                byte2 = parse_int(mm.read(1))
-                value = int.from_bytes((byte1 << 8 | byte2).to_bytes(2, byteorder='big'), signed=True, byteorder='big')
-                stack.append(value)
-            elif opcode == b'\x12':
-                logging.info('OPCODE: ldc')
-                pool_index = parse_int(mm.read(1))
-                symbol_name_index: Union[CONSTANT_String, CONSTANT_Integer] = c.constant_pool[pool_index]
-                if isinstance(symbol_name_index, CONSTANT_String):
-                    cp_str: CONSTANT_Utf8 = c.constant_pool[symbol_name_index.string_index]
-                    string = cp_str.info.decode()
-                    stack.append(string)
-                elif isinstance(symbol_name_index, CONSTANT_Integer):
-                    stack.append(symbol_name_index.value)
-                else:
-                    raise Exception(f'unexpected constant {symbol_name_index}')
-            elif opcode == b'\x15':
-                logging.info('OPCODE: iload')
-                index = parse_int(mm.read(1))
-                stack.append(local_variables[index])
-            elif opcode == b'\x1a':
-                logging.info('OPCODE: iload_0')
-                stack.append(local_variables[0])
-            elif opcode == b'\x1b':
-                logging.info('OPCODE: iload_1')
-                stack.append(local_variables[1])
-            elif opcode == b'\x1c':
-                logging.info('OPCODE: iload_2')
-                stack.append(local_variables[2])
-            elif opcode == b'\x1d':
-                logging.info('OPCODE: iload_3')
-                stack.append(local_variables[3])
-            elif opcode == b'\x2a':
-                logging.info('OPCODE: aload_0')
-                stack.append(local_variables[0])
-            elif opcode == b'\x2b':
-                logging.info('OPCODE: aload_1')
-                stack.append(local_variables[1])
-            elif opcode == b'\x36':
-                logging.info('OPCODE: istore')
-                val = stack.pop()
-                index = parse_int(mm.read(1))
-                local_variables[index] = val
-            elif opcode == b'\x3c':
-                logging.info('OPCODE: istore_1')
-                local_variables[1] = stack.pop()
-            elif opcode == b'\x3d':
-                logging.info('OPCODE: istore_2')
-                local_variables[2] = stack.pop()
-            elif opcode == b'\x3e':
-                logging.info('OPCODE: istore_3')
-                local_variables[3] = stack.pop()
-            elif opcode == b'\x4b':
-                logging.info('OPCODE: astore_0')
-                local_variables[0] = stack.pop()
-            elif opcode == b'\x4c':
-                logging.info('OPCODE: astore_1')
-                local_variables[1] = stack.pop()
-            elif opcode == b'\x59':
-                logging.info('OPCODE: dup')
-                copy_val = copy.deepcopy(stack[-1])
-                stack.append(copy_val)
-            elif opcode == b'\x60':
-                logging.info('OPCODE: iadd')
-                val1 = stack.pop()
-                val2 = stack.pop()
-                logging.debug(f"iadd {val1} + {val2}")
-                stack.append(val1 + val2)
-            elif opcode == b'\x64':
-                logging.info('OPCODE: isub')
-                value2 = stack.pop()
-                value1 = stack.pop()
-                stack.append(value1 - value2)
-            elif opcode == b'\x84':
-                logging.info('OPCODE: iinc')
-                target = parse_int(mm.read(1))
-                val = parse_int(mm.read(1))
-                local_variables[target] += val
-            elif opcode == b'\x9a':
-                logging.info('OPCODE: ifne')
-                branch1 = parse_int(mm.read(1))
-                branch2 = parse_int(mm.read(1))
-                value = stack.pop()
-                if value != 0:
-                    offset = int.from_bytes((branch1 << 8 | branch2).to_bytes(2, byteorder='big'), signed=True, byteorder='big') - 3
-                    logging.debug(f'seek to {offset}')
-                    mm.seek(offset, 1)
-            elif opcode == b'\xa0':
-                logging.info('OPCODE: if_icmpne')
-                branch1 = parse_int(mm.read(1))
-                branch2 = parse_int(mm.read(1))
-                value2 = stack.pop()
-                value1 = stack.pop()
-                logging.debug(f'value1: {value1} value2: {value2}')
-                if value1 != value2:
-                    offset = int.from_bytes((branch1 << 8 | branch2).to_bytes(2, byteorder='big'), signed=True, byteorder='big') - 3
-                    logging.debug(f'seek to {offset}')
-                    mm.seek(offset, 1)
-
-            elif opcode == b'\xa2':
-                logging.info('OPCODE: if_icmpge')
-                branch1 = parse_int(mm.read(1))
-                branch2 = parse_int(mm.read(1))
-                value2 = stack.pop()
-                value1 = stack.pop()
-                logging.debug(f'value1: {value1} value2: {value2}')
-                if value1 >= value2:
-                    offset = int.from_bytes((branch1 << 8 | branch2).to_bytes(2, byteorder='big'), signed=True, byteorder='big') - 3
-                    logging.debug(f'seek to {offset}')
-                    mm.seek(offset, 1)
-                else:
-                    # logging.debug(f'seek to {branch2}')
-                    # mm.read(branch2)
-                    pass
-            elif opcode == b'\xa7':
-                logging.info('OPCODE: goto')
-                branch1 = parse_int(mm.read(1))
-                branch2 = parse_int(mm.read(1))
-                offset = int.from_bytes((branch1 << 8 | branch2).to_bytes(2, byteorder='big'), signed=True, byteorder='big') - 3
-                logging.debug(f"goto offset {offset}")
-                mm.seek(offset, 1)
-            elif opcode == b'\xac':
-                logging.info('OPCODE: ireturn')
-                return stack.pop()
-            elif opcode == b'\xb2':
-                logging.info('OPCODE: getstatic')
-                pool_index = parse_int(mm.read(2))
-                symbol_name: CONSTANT_Fieldref = c.constant_pool[pool_index]
-                assert isinstance(symbol_name, CONSTANT_Fieldref)
-                cp_class_callee: CONSTANT_Class = c.constant_pool[symbol_name.class_index]
-                cp_class_callee_name: CONSTANT_Utf8 = c.constant_pool[cp_class_callee.name_index]
-                callee_class: str = cp_class_callee_name.info.decode()
-
-                cp_method_name_type: CONSTANT_NameAndType = c.constant_pool[symbol_name.name_and_type_index]
-                cp_method_name: CONSTANT_Utf8 = c.constant_pool[cp_method_name_type.name_index]
-                field: str = cp_method_name.info.decode()
-
-                cp_method_descriptor: CONSTANT_Utf8 = c.constant_pool[cp_method_name_type.descriptor_index]
-                method_return: str = cp_method_descriptor.info.decode()
-                logging.debug(f'callee info, {callee_class}, {field}, {method_return}')
-
-                # TODO
-                stack.append({
-                    '_class': callee_class,
-                    'field': field
-                })
-            elif opcode == b'\xb0':
-                logging.info('OPCODE: areturn')
-                return stack.pop()
-            elif opcode == b'\xb1':
-                logging.info('OPCODE: return')
-                return
-            elif opcode == b'\xb4':
-                logging.info('OPCODE: getfield')
-                indexbyte1 = parse_int(mm.read(1))
-                indexbyte2 = parse_int(mm.read(1))
-                cp_field_ref_index = _merge_unsigned_bytes(indexbyte1, indexbyte2)
-                cp_field_ref: CONSTANT_Fieldref = c.constant_pool[cp_field_ref_index]
-                cp_field_name: CONSTANT_NameAndType = c.constant_pool[cp_field_ref.name_and_type_index]
-                cp_field_name_str: str = c.constant_pool[cp_field_name.name_index].info.decode()
-                val = heap[stack.pop()]
-                stack.append(val[cp_field_name_str])
-
-            elif opcode == b'\xb5':
-                logging.info('OPCODE: putfield')
-                indexbyte1 = parse_int(mm.read(1))
-                indexbyte2 = parse_int(mm.read(1))
-                cp_field_ref_index = _merge_unsigned_bytes(indexbyte1, indexbyte2)
-                cp_field_ref: CONSTANT_Fieldref = c.constant_pool[cp_field_ref_index]
-                cp_field_name_type: CONSTANT_NameAndType = c.constant_pool[cp_field_ref.name_and_type_index]
-                cp_field_name_utf8: CONSTANT_Utf8 = c.constant_pool[cp_field_name_type.name_index]
-                cp_field_name: str = cp_field_name_utf8.info.decode()
-
-                value = stack.pop()
-                heap_id = stack.pop()
-                logging.debug(f'cp_field_name: {cp_field_name} heap_id:{heap_id} value:{value}')
-                heap[heap_id][cp_field_name] = value
-
-            elif opcode == b'\xb6':
-                logging.info('OPCODE: invokevirtual')
-                pool_index = parse_int(mm.read(2))
-                symbol_name_index: CONSTANT_Methodref = c.constant_pool[pool_index]
-
-                callee_class: CONSTANT_Class = c.constant_pool[symbol_name_index.class_index]
-                callee_class_name: str = c.constant_pool[callee_class.name_index].info.decode()
-
-                callee: CONSTANT_NameAndType = c.constant_pool[symbol_name_index.name_and_type_index]
-                callee_method: str = c.constant_pool[callee.name_index].info.decode()  # println
-                args_exp: str = c.constant_pool[callee.descriptor_index].info.decode()
-
-                logging.debug(f'args_exp: {args_exp}')
-                args = []
-                for _ in range(1):  # TODO
-                    args.append(stack.pop())
-                logging.debug(f'method: {callee_class_name} {callee_method} args: {args}')
-
-                if callee_class_name.startswith('java'):
-                    std_method[callee_class_name][callee_method](args[::-1])
-                else:
-                    callee_method_obj = find_method(cfs, callee_class_name, callee_method)
-                    callee_code = find_code(callee_method_obj, cfs, callee_class_name)
-                    ret = execute(callee_code, cfs, callee_class_name, args[::-1], heap)
-                    if ret:
-                        stack.append(ret)
-            elif opcode == b'\xb7':
-                logging.info('OPCODE: invokespecial')
-                indexbyte1 = parse_int(mm.read(1))
-                indexbyte2 = parse_int(mm.read(1))
-                cp_callee_index = _merge_unsigned_bytes(indexbyte1, indexbyte2)
-
-                cp_callee: CONSTANT_Methodref = c.constant_pool[cp_callee_index]
-                cp_callee_class: CONSTANT_Class = c.constant_pool[cp_callee.class_index]
-                cp_callee_class_utf8: CONSTANT_Utf8 = c.constant_pool[cp_callee_class.name_index]
-                callee_class: str = cp_callee_class_utf8.info.decode()
-
-                cp_callee_method: CONSTANT_NameAndType = c.constant_pool[cp_callee.name_and_type_index]
-                callee_method: str = c.constant_pool[cp_callee_method.name_index].info.decode()
-                logging.debug(f'invokespecial {callee_class}.{callee_method}')
-
-                # if callee_class == 'java/lang/Object' and callee_method == '<init>':
-                #     pass  # TODO
-                # else:
-                callee_method_obj = find_method(cfs, callee_class, callee_method)
-                assert callee_method_obj is not None, f"{callee_class}.{callee_method} not found"
-                callee_code = find_code(callee_method_obj, cfs, callee_class)
-
-                args = [None for _ in range(callee_code.max_locals)]
-                callee_descriptor_exp = cfs[callee_class].constant_pool[callee_method_obj.descriptor_index].info.decode()
-                n_args = parse_arg_num(callee_descriptor_exp)
-                logging.debug(f'calee_descriptor {callee_descriptor_exp}, {n_args}')
-                args[0] = stack.pop()  # object ref
-                for i in range(n_args):
-                    args[i + 1] = stack.pop()
-                execute(callee_code, cfs, callee_class, args[::-1], heap)
-                logging.debug(f'after invokespecial {stack}')
-
-            elif opcode == b'\xb8':
-                logging.info('OPCODE: invokestatic')
-                indexbyte1 = parse_int(mm.read(1))
-                indexbyte2 = parse_int(mm.read(1))
-                logging.debug(f'indexbyte1 {indexbyte1} indexbyte2 {indexbyte2}')
-                callee_cp_index = int.from_bytes((indexbyte1 << 8 | indexbyte2).to_bytes(2, byteorder='big'), signed=True, byteorder='big')
-                logging.debug(f'callee_cp_index {callee_cp_index}')
-                callee_class = c.constant_pool[c.constant_pool[c.constant_pool[callee_cp_index].class_index].name_index].info.decode()
-                callee_method = c.constant_pool[c.constant_pool[c.constant_pool[callee_cp_index].name_and_type_index].name_index].info.decode()
-                logging.debug(f'invokestatic {callee_class}.{callee_method}')
-
-                callee_method_obj = find_method(cfs, callee_class, callee_method)
-                assert callee_method_obj is not None, f"{callee_class}.{callee_method} not found"
-                callee_code = find_code(callee_method_obj, cfs, callee_class)
-
-                args = [None for _ in range(callee_code.max_locals)]
-                callee_descriptor_exp = cfs[callee_class].constant_pool[callee_method_obj.descriptor_index].info.decode()
-                n_args = 1 if '(I)' in callee_descriptor_exp else 2 if '(II)' in callee_descriptor_exp else 0
-                for i in range(n_args):
-                    args[i] = stack.pop()
-
-                stack.append(execute(callee_code, cfs, callee_class, args, {}))
-            elif opcode == b'\xba':
-                logging.info('OPCODE: invokedynamic')
-                indexbyte1 = parse_int(mm.read(1))
-                indexbyte2 = parse_int(mm.read(1))
-                mm.read(2)  # skip 0000 byte
-                cp_invoke_dynamic_index = _merge_unsigned_bytes(indexbyte1, indexbyte2)
-                cp_invoke_dynamic: CONSTANT_InvokeDynamic = c.constant_pool[cp_invoke_dynamic_index]
-                logging.debug(f'cp_invoke_dynamic: {cp_invoke_dynamic}')
-                bsm: BootstrapMethods = find_bootstrap_methods(cfs, _class)
-                logging.debug(f'bsm: {bsm}')
-
-            elif opcode == b'\xbb':
-                logging.info('OPCODE: new')
-                indexbyte1 = parse_int(mm.read(1))
-                indexbyte2 = parse_int(mm.read(1))
-                target_class_index = _merge_unsigned_bytes(indexbyte1, indexbyte2)
-                cp_class: CONSTANT_Class = c.constant_pool[target_class_index]
-                cp_class_utf8: CONSTANT_Utf8 = c.constant_pool[cp_class.name_index]
-                class_name: str = cp_class_utf8.info.decode()
-                logging.debug(f"new class #{target_class_index} {class_name}")
-
-                heap[len(heap)] = _new_instance(cfs, class_name)
-                heap_index = len(heap) - 1
-                stack.append(heap_index)
+def _f32(value: float) -> float:
+    '''round to java float (32bit ieee)'''
+    try:
+        return _FLOAT.unpack(_FLOAT.pack(value))[0]
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+DEFAULT_MAX_DEPTH = 10000
+_MISSING = object()
+
+
+class StackOverflowError(Exception):
+    pass
+
+
+class ExceptionInInitializerError(Exception):
+    pass
+
+
+class NoClassDefFoundError(Exception):
+    pass
+
+
+exceptions.errors[StackOverflowError] = 'java/lang/StackOverflowError'
+exceptions.errors[ExceptionInInitializerError] = 'java/lang/ExceptionInInitializerError'
+exceptions.errors[NoClassDefFoundError] = 'java/lang/NoClassDefFoundError'
+
+
+class Thread:
+    '''
+    a java thread: the call stack of frames and the heap objects are allocated from.
+    every method runs in one interpreter loop (see _run), invoke and return push and pop frames
+    instead of recursing in python, so the java call depth is limited only by max_depth.
+    hot methods are compiled after compile_threshold invocations or loop iterations (None: never),
+    except on a traced thread. compiled methods run on the python stack, compiled_depth counts them.
+    a thread of a scheduler runs in time slices (see _run_slice), it can only block (yieldable)
+    in its slice loop, not in a nested run. switch ends the slice after the current instruction.
+    stdout receives what the thread prints to System.out, None: the buffered System.out of natives.
+    '''
+    __slots__ = ('cfs', 'heap', 'frames', 'max_depth', 'tracer', 'compile_threshold', 'jit', 'compiled_depth',
+                 'scheduler', 'yieldable', 'switch', 'stdout', '__weakref__')
+
+    def __init__(self, cfs: Mapping[str, ClassFile], heap: Optional[Heap] = None,
+                 max_depth: int = DEFAULT_MAX_DEPTH, tracer: Optional[Tracer] = None,
+                 compile_threshold: Optional[int] = DEFAULT_COMPILE_THRESHOLD):
+        self.cfs = cfs
+        # a dict (the heap of older versions) gets a fresh Heap
+        self.heap = heap if isinstance(heap, Heap) else Heap()
+        self.heap.threads.add(self)  # its frames are gc roots
+        self.frames: List[Frame] = []
+        self.max_depth = max_depth
+        self.tracer = tracer
+        self.compile_threshold = compile_threshold
+        self.jit = compile_threshold is not None and tracer is None
+        self.compiled_depth = 0
+        self.scheduler: Any = None
+        self.yieldable = False
+        self.switch = False
+        self.stdout: Optional[TextIO] = None
+
+    def invoke(self, target: 'ResolvedMethod', args: List[Any]) -> Any:
+        '''
+        run target to completion on top of the current frames and return its result.
+        args are the java arguments, starting with the object ref for instance methods.
+        '''
+        c = target.c
+        if c is not None and c.initialized is not True:
+            initialize(self, c)
+        memo = target.code.memo
+        if memo is not None:
+            key = tuple(args)
+            value = memo.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            frame = Frame(self, target, target.local_variables(args), None)
+            frame.memo_key = key
+            return self.run(frame)
+        if self.jit:
+            code = target.code
+            compiled = code.compiled
+            if compiled is None:
+                code.invocations += 1
+                if code.invocations >= self.compile_threshold:
+                    compiled = compile_method(self.cfs, target)
+            if compiled and self.compiled_depth < MAX_COMPILED_DEPTH and len(self.frames) + self.compiled_depth < self.max_depth:
+                return compiled(self, *args)
+        frame = Frame(self, target, target.local_variables(args), None)
+        if target.synchronized:
+            frame.monitor = _method_monitor(target, args)
+            if not monitor.enter(self.heap.monitors, frame.monitor, self):
+                raise monitor.DeadlockError(f'{target.label}: monitor of {frame.monitor!r} is owned by another thread')
+        return self.run(frame)
+
+    def run(self, frame: 'Frame') -> Any:
+        if self.tracer is None:
+            return _run(self, frame)
+        return _run_traced(self, frame)
+
+
+class Frame:
+    '''
+    state of one method invocation.
+    pc is the index of the next instruction in the decoded instruction list.
+    caller is the frame a return value is pushed to, None for the first frame of Thread.invoke.
+    memo_key is set when the return value is to be stored in the method's memo cache.
+    monitor is the object a synchronized method holds the monitor of.
+    '''
+    __slots__ = ('thread', 'method', 'c', 'instructions', 'local_variables', 'stack', 'pc', 'caller', 'result', 'memo_key',
+                 'monitor')
+
+    def __init__(self, thread: Thread, method: 'ResolvedMethod', local_variables: List[Any], caller: Optional['Frame']):
+        self.thread = thread
+        self.method = method
+        self.c: ClassFile = method.c
+        self.instructions = method.instructions
+        self.local_variables = local_variables
+        self.stack: List[Any] = []
+        self.pc = 0
+        self.caller = caller
+        self.result: Any = None
+        self.memo_key: Optional[Tuple[Any, ...]] = None
+        self.monitor: Any = None
+
+
+# instruction handlers.
+# handler(frame, operand) is called with frame.pc already pointing to the next instruction.
+# it returns True when it pushed or popped a frame, so the loop switches to the top frame.
+
+
+def _nop(frame: Frame, operand: Any):
+    pass
+
+
+def _const(frame: Frame, value: Any):
+    frame.stack.append(value)
+
+
+def _constant_value(c: ClassFile, pool_index: int) -> Any:
+    '''the value of a String, Integer, Float, Long or Double constant'''
+    constant = c.constant_pool[pool_index]
+    if isinstance(constant, CONSTANT_String):
+        # strings are interned, so equal literals are the same reference
+        cp_str: CONSTANT_Utf8 = c.constant_pool[constant.string_index]
+        return natives.intern(cp_str.info.decode())
+    if isinstance(constant, CONSTANT_Integer):
+        return _i32(constant.value)
+    if isinstance(constant, (CONSTANT_Float, CONSTANT_Long, CONSTANT_Double)):
+        return constant.value
+    raise Exception(f'unexpected constant {constant}')
+
+
+def _ldc(frame: Frame, pool_index: int):
+    c = frame.c
+    value = c.resolved.get(pool_index, _MISSING)
+    if value is _MISSING:
+        value = c.resolved[pool_index] = _constant_value(c, pool_index)
+    frame.stack.append(value)
+
+
+def _load(frame: Frame, index: int):
+    frame.stack.append(frame.local_variables[index])
+
+
+def _store(frame: Frame, index: int):
+    frame.local_variables[index] = frame.stack.pop()
+
+
+def _pop(frame: Frame, operand: Any):
+    frame.stack.pop()
+
+
+def _dup(frame: Frame, operand: Any):
+    frame.stack.append(frame.stack[-1])
+
+
+def _dup_x1(frame: Frame, operand: Any):
+    stack = frame.stack
+    stack.insert(-2, stack[-1])
+
+
+def _dup2(frame: Frame, operand: Any):
+    stack = frame.stack
+    stack.extend(stack[-2:])
+
+
+def _pop2(frame: Frame, operand: Any):
+    del frame.stack[-2:]
+
+
+# a long or double is one operand stack entry, so pop2 and dup2 of one act like pop and dup.
+# the type on top of the stack is the type pushed by the instruction before (the jvm requires the
+# same types on every path), known from its opcode or else from the descriptor of its operand.
+_WIDE_RESULTS = frozenset([
+    0x09, 0x0a, 0x0e, 0x0f, 0x14,  # lconst_<l> dconst_<d> ldc2_w
+    0x16, 0x18, *range(0x1e, 0x22), *range(0x26, 0x2a), 0x2f, 0x31,  # lload dload <x>load_<n> laload daload
+    0x61, 0x63, 0x65, 0x67, 0x69, 0x6b, 0x6d, 0x6f, 0x71, 0x73, 0x75, 0x77,  # l/d add ... neg
+    0x79, 0x7b, 0x7d, 0x7f, 0x81, 0x83,  # lshl ... lxor
+    0x85, 0x87, 0x8a, 0x8c, 0x8d, 0x8f,  # i2l i2d l2d f2l f2d d2l
+])
+_TYPED_RESULTS = frozenset([0xb2, 0xb4, 0xb6, 0xb7, 0xb8, 0xb9, 0xba])  # get<x> invoke<x>
+
+
+def _wide_result(c: ClassFile, ins: Instruction) -> bool:
+    '''whether the field or method of ins (in _TYPED_RESULTS) is a long or double'''
+    cp = c.constant_pool
+    ref = cp[ins.operand[0] if isinstance(ins.operand, tuple) else ins.operand]
+    cp_name_type: CONSTANT_NameAndType = cp[ref.name_and_type_index]
+    descriptor = cp[cp_name_type.descriptor_index].info.decode()
+    return descriptor[descriptor.index(')') + 1 if ins.opcode >= 0xb6 else 0] in 'JD'
+
+
+def _typed_pop2(frame: Frame, ins: Instruction):
+    if _wide_result(frame.c, ins):
+        frame.stack.pop()
+    else:
+        del frame.stack[-2:]
+
+
+def _typed_dup2(frame: Frame, ins: Instruction):
+    stack = frame.stack
+    stack.extend(stack[-1:] if _wide_result(frame.c, ins) else stack[-2:])
+
+
+def _link_category2(decoded: List[Instruction], i: int) -> Tuple[Callable[[Frame, Any], Optional[bool]], Any]:
+    '''the handler of the pop2 or dup2 at i'''
+    pop = decoded[i].opcode == 0x58
+    previous = decoded[i - 1] if i > 0 else None
+    if previous is not None and previous.opcode in _WIDE_RESULTS:
+        return (_pop if pop else _dup), None
+    if previous is not None and previous.opcode in _TYPED_RESULTS:
+        return (_typed_pop2 if pop else _typed_dup2), previous
+    return (_pop2 if pop else _dup2), None
+
+
+def _swap(frame: Frame, operand: Any):
+    stack = frame.stack
+    stack[-1], stack[-2] = stack[-2], stack[-1]
+
+
+def _iadd(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = _i32(stack[-1] + value2)
+
+
+def _isub(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = _i32(stack[-1] - value2)
+
+
+def _imul(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = _i32(stack[-1] * value2)
+
+
+def _idiv(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    q = abs(value1) // abs(value2)  # java rounds toward zero
+    stack[-1] = _i32(-q if (value1 < 0) != (value2 < 0) else q)
+
+
+def _irem(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    r = abs(value1) % abs(value2)  # sign follows the dividend
+    stack[-1] = -r if value1 < 0 else r
+
+
+def _ineg(frame: Frame, operand: Any):
+    frame.stack[-1] = _i32(-frame.stack[-1])
+
+
+def _ishl(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = _i32(stack[-1] << (value2 & 0x1f))
+
+
+def _ishr(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = stack[-1] >> (value2 & 0x1f)
+
+
+def _iushr(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = _i32((stack[-1] & 0xFFFFFFFF) >> (value2 & 0x1f))
+
+
+def _iand(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = stack[-1] & value2
+
+
+def _ior(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = stack[-1] | value2
+
+
+def _ixor(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    stack[-1] = stack[-1] ^ value2
+
+
+def _i2b(frame: Frame, operand: Any):
+    frame.stack[-1] = ((frame.stack[-1] + 0x80) & 0xFF) - 0x80
+
+
+def _i2c(frame: Frame, operand: Any):
+    frame.stack[-1] &= 0xFFFF
+
+
+def _i2s(frame: Frame, operand: Any):
+    frame.stack[-1] = ((frame.stack[-1] + 0x8000) & 0xFFFF) - 0x8000
+
+
+def _long_div(value1: int, value2: int) -> int:
+    q = abs(value1) // abs(value2)  # java rounds toward zero
+    return _i64(-q if (value1 < 0) != (value2 < 0) else q)
+
+
+def _long_rem(value1: int, value2: int) -> int:
+    r = abs(value1) % abs(value2)  # sign follows the dividend
+    return -r if value1 < 0 else r
+
+
+def _double_div(value1: float, value2: float) -> float:
+    if value2 == 0:
+        if value1 != value1 or value1 == 0:
+            return math.nan
+        return math.copysign(math.inf, value1) * math.copysign(1.0, value2)
+    return value1 / value2
+
+
+def _double_rem(value1: float, value2: float) -> float:
+    if value2 == 0 or math.isinf(value1):
+        return math.nan
+    return math.fmod(value1, value2)  # sign follows the dividend
+
+
+def _compare(value1: float, value2: float, nan: int) -> int:
+    '''fcmp<op> and dcmp<op>, nan is the result if either value is NaN'''
+    return nan if value1 != value1 or value2 != value2 else (value1 > value2) - (value1 < value2)
+
+
+def _double_to_int(value: float) -> int:
+    '''java rounds toward zero and saturates, NaN is 0'''
+    if value != value:
+        return 0
+    if math.isinf(value):
+        return 0x7FFFFFFF if value > 0 else -0x80000000
+    return max(-0x80000000, min(0x7FFFFFFF, int(value)))
+
+
+def _double_to_long(value: float) -> int:
+    if value != value:
+        return 0
+    if math.isinf(value):
+        return 0x7FFFFFFFFFFFFFFF if value > 0 else -0x8000000000000000
+    return max(-0x8000000000000000, min(0x7FFFFFFFFFFFFFFF, int(value)))
+
+
+def _ladd(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _i64(value1 + value2)
+
+
+def _fadd(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _f32(value1 + value2)
+
+
+def _dadd(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = value1 + value2
+
+
+def _lsub(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _i64(value1 - value2)
+
+
+def _fsub(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _f32(value1 - value2)
+
+
+def _dsub(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = value1 - value2
+
+
+def _lmul(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _i64(value1 * value2)
+
+
+def _fmul(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _f32(value1 * value2)
+
+
+def _dmul(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = value1 * value2
+
+
+def _ldiv(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _long_div(value1, value2)
+
+
+def _fdiv(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _f32(_double_div(value1, value2))
+
+
+def _ddiv(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _double_div(value1, value2)
+
+
+def _lrem(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _long_rem(value1, value2)
+
+
+def _frem(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _f32(_double_rem(value1, value2))
+
+
+def _drem(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _double_rem(value1, value2)
+
+
+def _lshl(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _i64(value1 << (value2 & 0x3f))
+
+
+def _lshr(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = value1 >> (value2 & 0x3f)
+
+
+def _lushr(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _i64((value1 & 0xFFFFFFFFFFFFFFFF) >> (value2 & 0x3f))
+
+
+def _land(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = value1 & value2
+
+
+def _lor(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = value1 | value2
+
+
+def _lxor(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = value1 ^ value2
+
+
+def _lcmp(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = (value1 > value2) - (value1 < value2)
+
+
+def _fcmpl(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _compare(value1, value2, -1)
+
+
+def _fcmpg(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _compare(value1, value2, 1)
+
+
+def _dcmpl(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _compare(value1, value2, -1)
+
+
+def _dcmpg(frame: Frame, operand: Any):
+    stack = frame.stack
+    value2 = stack.pop()
+    value1 = stack[-1]
+    stack[-1] = _compare(value1, value2, 1)
+
+
+def _lneg(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _i64(-value)
+
+
+def _fneg(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = -value
+
+
+def _dneg(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = -value
+
+
+def _i2f(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _f32(float(value))
+
+
+def _i2d(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = float(value)
+
+
+def _l2i(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _i32(value)
+
+
+def _l2f(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _f32(float(value))
+
+
+def _l2d(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = float(value)
+
+
+def _f2i(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _double_to_int(value)
+
+
+def _f2l(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _double_to_long(value)
+
+
+def _d2i(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _double_to_int(value)
+
+
+def _d2l(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _double_to_long(value)
+
+
+def _d2f(frame: Frame, operand: Any):
+    value = frame.stack[-1]
+    frame.stack[-1] = _f32(value)
+
+
+def _iinc(frame: Frame, operand: Tuple[int, int]):
+    index, const = operand
+    local_variables = frame.local_variables
+    local_variables[index] = _i32(local_variables[index] + const)
+
+
+def _ifeq(frame: Frame, target: int):
+    if frame.stack.pop() == 0:
+        frame.pc = target
+
+
+def _ifne(frame: Frame, target: int):
+    if frame.stack.pop() != 0:
+        frame.pc = target
+
+
+def _iflt(frame: Frame, target: int):
+    if frame.stack.pop() < 0:
+        frame.pc = target
+
+
+def _ifge(frame: Frame, target: int):
+    if frame.stack.pop() >= 0:
+        frame.pc = target
+
+
+def _ifgt(frame: Frame, target: int):
+    if frame.stack.pop() > 0:
+        frame.pc = target
+
+
+def _ifle(frame: Frame, target: int):
+    if frame.stack.pop() <= 0:
+        frame.pc = target
+
+
+def _if_icmpeq(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() == value2:
+        frame.pc = target
+
+
+def _if_icmpne(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() != value2:
+        frame.pc = target
+
+
+def _if_icmplt(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() < value2:
+        frame.pc = target
+
+
+def _if_icmpge(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() >= value2:
+        frame.pc = target
+
+
+def _if_icmpgt(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() > value2:
+        frame.pc = target
+
+
+def _if_icmple(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() <= value2:
+        frame.pc = target
+
+
+def _if_acmpeq(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() is value2:
+        frame.pc = target
+
+
+def _if_acmpne(frame: Frame, target: int):
+    stack = frame.stack
+    value2 = stack.pop()
+    if stack.pop() is not value2:
+        frame.pc = target
+
+
+def _ifnull(frame: Frame, target: int):
+    if frame.stack.pop() is None:
+        frame.pc = target
+
+
+def _ifnonnull(frame: Frame, target: int):
+    if frame.stack.pop() is not None:
+        frame.pc = target
+
+
+def _goto(frame: Frame, target: int):
+    frame.pc = target
+
+
+def _tableswitch(frame: Frame, operand: Tuple[int, int, Tuple[int, ...]]):
+    default, low, targets = operand
+    i = frame.stack.pop() - low
+    frame.pc = targets[i] if 0 <= i < len(targets) else default
+
+
+def _lookupswitch(frame: Frame, operand: Tuple[int, Dict[int, int]]):
+    default, pairs = operand
+    frame.pc = pairs.get(frame.stack.pop(), default)
+
+
+def _xreturn(frame: Frame, operand: Any) -> bool:
+    value = frame.stack.pop()
+    frame.thread.frames.pop()
+    if frame.monitor is not None:
+        monitor.exit(frame.thread.heap.monitors, frame.monitor, frame.thread)
+    if frame.memo_key is not None:
+        frame.method.code.memo.put(frame.memo_key, value)
+    if frame.caller is None:
+        frame.result = value
+    else:
+        frame.caller.stack.append(value)
+    return True
+
+
+def _return(frame: Frame, operand: Any) -> bool:
+    frame.thread.frames.pop()
+    if frame.monitor is not None:
+        monitor.exit(frame.thread.heap.monitors, frame.monitor, frame.thread)
+    return True
+
+
+def link_statics(c: ClassFile) -> List[Any]:
+    '''
+    lay out the static fields of c once: c.statics holds their values at the slots of c.static_layout.
+    a constant (a field with a ConstantValue attribute) starts with its value, any other field with
+    the default value of its type.
+    '''
+    if c.statics is None:
+        fields = [f for f in c.fields if f.is_static]
+        layout = Layout(c.name, None, [(f.name, f.descriptor) for f in fields])
+        statics = list(layout.defaults)
+        for slot, f in enumerate(fields):
+            for a in f.attribute_info:
+                if c.constant_pool[a.attribute_name_index].info == b'ConstantValue':
+                    statics[slot] = _constant_value(c, int.from_bytes(a.info[:2], 'big'))
+        c.static_layout = layout
+        c.statics = statics
+    return c.statics
+
+
+def initialize(thread: Thread, c: ClassFile):
+    '''
+    initialize c on its first active use (new, getstatic, putstatic, invokestatic or Thread.invoke):
+    its superclass first, then its static initializer <clinit> runs to completion on thread.
+    a use by thread while it initializes c (from <clinit>) proceeds. when <clinit> throws, the error
+    is raised in an ExceptionInInitializerError (unless it is a java Error), and every later use of
+    c raises NoClassDefFoundError. the static fields become gc roots of the heap of thread.
+    '''
+    state = c.initialized
+    if state is True or state is thread:
+        return
+    if state is not None:
+        if isinstance(state, Thread):
+            raise Exception(f'{c.name} is being initialized by another thread')
+        raise NoClassDefFoundError(f'could not initialize class {c.name}')
+    thread.heap.roots.append(link_statics(c))
+    c.initialized = thread
+    cfs = thread.cfs
+    try:
+        # java/lang/Object has no static state, it is not loaded for it
+        if c.super_name is not None and c.super_name != 'java/lang/Object' and c.super_name in cfs:
+            initialize(thread, cfs[c.super_name])
+        if ('<clinit>', '()V') in c.method_index:
+            thread.invoke(resolve_method(cfs, c.name, '<clinit>', '()V', False), [])
+    except Exception as e:
+        c.initialized = e
+        class_name = exceptions.java_class(e)
+        if class_name is None or exceptions.is_subclass(layout_of(cfs, class_name), 'java/lang/Error'):
+            raise
+        raise ExceptionInInitializerError(f'{c.name}.<clinit>: {e}') from e
+    c.initialized = True
+
+
+def _static_owner(cfs: Mapping[str, ClassFile], class_name: str, name: str) -> Optional[ClassFile]:
+    '''the class declaring the static field name: class_name, one of its superinterfaces, or a superclass'''
+    while class_name is not None and class_name in cfs:
+        c = cfs[class_name]
+        for owner in (class_name, *_interfaces(cfs, c.interface_names, {})):
+            if owner in cfs:
+                link_statics(cfs[owner])
+                if name in cfs[owner].static_layout.slots:
+                    return cfs[owner]
+        class_name = c.super_name
+    return None
+
+
+class StaticField:
+    '''
+    the operand of a getstatic or putstatic instruction, one per instruction (see link_code).
+    values and index are the storage of the field and its slot: ClassFile.statics of the declaring
+    class, or the dict of natives.fields of a class implemented by the vm and the field name.
+    values is set once the class is initialized, the instruction then indexes it directly.
+    '''
+    __slots__ = ('pool_index', 'descriptor', 'values', 'index')
+
+    def __init__(self, pool_index: int):
+        self.pool_index = pool_index
+        self.descriptor: Optional[str] = None
+        self.values: Any = None
+        self.index: Any = None
+
+    def __getstate__(self):
+        return self.pool_index
+
+    def __setstate__(self, state: int):
+        self.__init__(state)
+
+    def __repr__(self):
+        return f'StaticField(#{self.pool_index}, {self.index!r})'
+
+
+def _link_static(frame: Frame, field: StaticField) -> Any:
+    '''resolve the field of a getstatic or putstatic, initialize its class and return its storage'''
+    cfs = frame.thread.cfs
+    class_name, name, field.descriptor = _member_ref(frame.c, field.pool_index)
+    c = _static_owner(cfs, class_name, name)
+    if c is None:
+        values = natives.fields.get(class_name)
+        if values is None or name not in values:
+            raise Exception(f'static field {class_name}.{name} not found')
+        field.index = name
+        field.values = values
+        return values
+    initialize(frame.thread, c)
+    field.index = c.static_layout.slots[name]
+    if c.initialized is True:
+        field.values = c.statics
+    return c.statics
+
+
+def _getstatic(frame: Frame, field: StaticField):
+    values = field.values
+    if values is None:
+        values = _link_static(frame, field)
+    frame.stack.append(values[field.index])
+
 
+def _putstatic(frame: Frame, field: StaticField):
+    values = field.values
+    if values is None:
+        values = _link_static(frame, field)
+    values[field.index] = frame.stack.pop()
+
+
+def _resolve_field(frame: Frame, pool_index: int) -> int:
+    '''slot index of an instance field, cached in ClassFile.resolved of the accessing class'''
+    c = frame.c
+    cp_field_ref: CONSTANT_Fieldref = c.constant_pool[pool_index]
+    cp_class: CONSTANT_Class = c.constant_pool[cp_field_ref.class_index]
+    class_name: str = c.constant_pool[cp_class.name_index].info.decode()
+    cp_field_name_type: CONSTANT_NameAndType = c.constant_pool[cp_field_ref.name_and_type_index]
+    field_name: str = c.constant_pool[cp_field_name_type.name_index].info.decode()
+
+    layout = layout_of(frame.thread.cfs, class_name)
+    if field_name not in layout.slots:
+        raise Exception(f'field {class_name}.{field_name} not found')
+    slot = c.resolved[pool_index] = layout.slots[field_name]
+    return slot
+
+
+def _null_check(value: Any, error: Exception, what: str) -> Exception:
+    '''the error of an instruction on value: NullPointerError if value is null, else error itself'''
+    if value is None:
+        return exceptions.NullPointerError(f'{what} of null')
+    return error
+
+
+def _getfield(frame: Frame, pool_index: int):
+    slot = frame.c.resolved.get(pool_index)
+    if slot is None:
+        slot = _resolve_field(frame, pool_index)
+    stack = frame.stack
+    try:
+        stack[-1] = stack[-1][slot]
+    except TypeError as e:
+        raise _null_check(stack[-1], e, 'getfield')
+
+
+def _putfield(frame: Frame, pool_index: int):
+    slot = frame.c.resolved.get(pool_index)
+    if slot is None:
+        slot = _resolve_field(frame, pool_index)
+    stack = frame.stack
+    value = stack.pop()
+    obj = stack.pop()
+    try:
+        obj[slot] = value
+    except TypeError as e:
+        raise _null_check(obj, e, 'putfield')
+
+
+# newarray operand -> descriptor of the array
+_NEWARRAY_TYPES = {4: '[Z', 5: '[C', 6: '[F', 7: '[D', 8: '[B', 9: '[S', 10: '[I', 11: '[J'}
+
+
+def _newarray(frame: Frame, atype: int):
+    stack = frame.stack
+    stack[-1] = frame.thread.heap.new_array(_NEWARRAY_TYPES[atype], stack[-1])
+
+
+def _array_descriptor(frame: Frame, pool_index: int) -> str:
+    '''the descriptor of an array of the class constant at pool_index'''
+    c = frame.c
+    # under -pool_index, new keeps the layout of the same class constant under pool_index
+    descriptor: Optional[str] = c.resolved.get(-pool_index)
+    if descriptor is None:
+        cp_class: CONSTANT_Class = c.constant_pool[pool_index]
+        class_name: str = c.constant_pool[cp_class.name_index].info.decode()
+        descriptor = c.resolved[-pool_index] = '[' + (class_name if class_name[0] == '[' else f'L{class_name};')
+    return descriptor
+
+
+def _anewarray(frame: Frame, pool_index: int):
+    stack = frame.stack
+    stack[-1] = frame.thread.heap.new_array(_array_descriptor(frame, pool_index), stack[-1])
+
+
+def _new_arrays(heap: Heap, descriptor: str, lengths: List[int]) -> Any:
+    array = heap.new_array(descriptor, lengths[0])
+    if len(lengths) > 1:
+        for i in range(lengths[0]):
+            array[i] = _new_arrays(heap, descriptor[1:], lengths[1:])
+    return array
+
+
+def _multianewarray(frame: Frame, operand: Tuple[int, int]):
+    pool_index, dimensions = operand
+    # the class constant is the array type itself, e.g. [[I
+    descriptor = _array_descriptor(frame, pool_index)[1:]
+    stack = frame.stack
+    lengths = stack[-dimensions:]
+    del stack[-dimensions:]
+    for length in lengths:
+        if length < 0:
+            raise NegativeArraySizeError(f'{descriptor}: {length}')
+    stack.append(_new_arrays(frame.thread.heap, descriptor, lengths))
+
+
+def _arraylength(frame: Frame, operand: Any):
+    stack = frame.stack
+    try:
+        stack[-1] = len(stack[-1])
+    except TypeError as e:
+        raise _null_check(stack[-1], e, 'arraylength')
+
+
+def _index_error(array: Any, index: int) -> Exception:
+    return natives.ArrayIndexOutOfBoundsError(f'index {index} out of bounds for length {len(array)}')
+
+
+def _xaload(frame: Frame, operand: Any):
+    stack = frame.stack
+    index = stack.pop()
+    array = stack[-1]
+    if array is None:
+        raise exceptions.NullPointerError('array access of null')
+    if not 0 <= index < len(array):
+        raise _index_error(array, index)
+    stack[-1] = array[index]
+
+
+def _xastore(frame: Frame, operand: Any):
+    stack = frame.stack
+    value = stack.pop()
+    index = stack.pop()
+    array = stack.pop()
+    if array is None:
+        raise exceptions.NullPointerError('array access of null')
+    if not 0 <= index < len(array):
+        raise _index_error(array, index)
+    array[index] = value
+
+
+def _bastore(frame: Frame, operand: Any):
+    stack = frame.stack
+    value = stack.pop()
+    index = stack.pop()
+    array = stack.pop()
+    if array is None:
+        raise exceptions.NullPointerError('array access of null')
+    if not 0 <= index < len(array):
+        raise _index_error(array, index)
+    # the array is a boolean[] or a byte[]
+    array[index] = value & 1 if array.typecode == 'B' else ((value + 0x80) & 0xFF) - 0x80
+
+
+def _castore(frame: Frame, operand: Any):
+    stack = frame.stack
+    value = stack.pop()
+    index = stack.pop()
+    array = stack.pop()
+    if array is None:
+        raise exceptions.NullPointerError('array access of null')
+    if not 0 <= index < len(array):
+        raise _index_error(array, index)
+    array[index] = value & 0xFFFF
+
+
+def _sastore(frame: Frame, operand: Any):
+    stack = frame.stack
+    value = stack.pop()
+    index = stack.pop()
+    array = stack.pop()
+    if array is None:
+        raise exceptions.NullPointerError('array access of null')
+    if not 0 <= index < len(array):
+        raise _index_error(array, index)
+    array[index] = ((value + 0x8000) & 0xFFFF) - 0x8000
+
+
+class ResolvedMethod:
+    '''
+    invoke target resolved from a Methodref constant.
+    cached in ClassFile.resolved of the calling class, keyed by the constant pool index.
+    '''
+    __slots__ = ('_class', 'name', 'descriptor', 'c', 'method', 'code', 'instructions', 'native', 'intrinsic',
+                 'arg_count', 'wide_args', 'padding', 'return_type', 'returns', 'synchronized')
+
+    def __init__(self, _class: str, name: str, descriptor: str, has_receiver: bool):
+        self._class = _class
+        self.name = name
+        self.descriptor = descriptor
+        self.c: Optional[ClassFile] = None
+        self.method: Optional[Method] = None
+        self.code: Optional[Code] = None
+        self.instructions: Optional[list] = None
+        self.native: Optional[Callable[..., Any]] = None
+        self.intrinsic: Optional[Callable[[Frame, List[Any]], Optional[bool]]] = None
+        params, self.return_type = parse_method_descriptor(descriptor)
+        self.arg_count = len(params)  # operand stack entries, without the object ref
+        # long and double take two local variable slots
+        wide_args = ((False,) if has_receiver else ()) + tuple(p in ('J', 'D') for p in params)
+        self.wide_args: Optional[Tuple[bool, ...]] = wide_args if any(wide_args) else None
+        self.padding = 0  # unused local variable slots after the arguments
+        self.returns = self.return_type != 'V'
+        self.synchronized = False
+
+    def local_variables(self, args: List[Any]) -> List[Any]:
+        if self.wide_args is None:
+            return args + [None] * self.padding if self.padding else args
+        local_variables = []
+        for arg, wide in zip(args, self.wide_args):
+            local_variables.append(arg)
+            if wide:
+                local_variables.append(None)
+        return local_variables + [None] * self.padding
+
+    @property
+    def label(self) -> str:
+        return f'{self._class}.{self.name}{self.descriptor}'
+
+    def __repr__(self):
+        return f'ResolvedMethod({self.label})'
+
+
+def resolve_method(cfs: Mapping[str, ClassFile], _class: str, name: str, descriptor: str, has_receiver: bool) -> ResolvedMethod:
+    target = ResolvedMethod(_class, name, descriptor, has_receiver)
+    intrinsic = intrinsics.get(_class, {}).get(name + descriptor)
+    native = natives.find_native(_class, name, descriptor)
+    if intrinsic is not None:
+        target.intrinsic = intrinsic
+    elif native is not None:
+        if native.static == has_receiver:
+            raise Exception(f'{native.label} is {"" if native.static else "not "}static')
+        target.native = native.fn
+    elif _class in cfs:
+        method = find_method(cfs, _class, name, descriptor)
+        assert method is not None, f"{_class}.{name}{descriptor} not found"
+        target.c = cfs[_class]
+        target.method = method
+        target.code = method.code
+        target.instructions = link_code(target.code)
+        target.synchronized = method.is_synchronized
+        n_slots = len(target.wide_args) + sum(target.wide_args) if target.wide_args else target.arg_count + (1 if has_receiver else 0)
+        target.padding = target.code.max_locals - n_slots
+    else:
+        raise Exception(f'{_class}.{name}{descriptor} not found')
+    return target
+
+
+def _resolve_method(frame: Frame, pool_index: int, has_receiver: bool) -> ResolvedMethod:
+    c = frame.c
+    cp_callee: CONSTANT_Methodref = c.constant_pool[pool_index]
+    cp_callee_class: CONSTANT_Class = c.constant_pool[cp_callee.class_index]
+    callee_class: str = c.constant_pool[cp_callee_class.name_index].info.decode()
+    cp_callee_method: CONSTANT_NameAndType = c.constant_pool[cp_callee.name_and_type_index]
+    callee_method: str = c.constant_pool[cp_callee_method.name_index].info.decode()
+    callee_descriptor: str = c.constant_pool[cp_callee_method.descriptor_index].info.decode()
+
+    target = resolve_method(frame.thread.cfs, callee_class, callee_method, callee_descriptor, has_receiver)
+    c.resolved[pool_index] = target
+    return target
+
+
+def _invoke(frame: Frame, target: ResolvedMethod, n_args: int) -> Optional[bool]:
+    stack = frame.stack
+    if n_args:
+        args = stack[-n_args:]
+        del stack[-n_args:]
+    else:
+        args = []
+    if target.native is not None:
+        ret = target.native(*args)
+        if target.returns:
+            stack.append(ret)
+        return None
+    if target.intrinsic is not None:
+        return target.intrinsic(frame, args)
+    thread = frame.thread
+    frames = thread.frames
+    if len(frames) + thread.compiled_depth >= thread.max_depth:
+        raise StackOverflowError(f'{target.label}: call depth exceeds {thread.max_depth}')
+    if target.synchronized:
+        return _invoke_synchronized(frame, target, args)
+    code = target.code
+    memo = code.memo
+    if memo is not None:
+        key = tuple(args)
+        value = memo.get(key, _MISSING)
+        if value is not _MISSING:
+            stack.append(value)
+            return None
+        callee = Frame(thread, target, target.local_variables(args), frame)
+        callee.memo_key = key
+        frames.append(callee)
+        return True
+    if thread.jit:
+        compiled = code.compiled
+        if compiled is None:
+            code.invocations += 1
+            if code.invocations >= thread.compile_threshold:
+                compiled = compile_method(thread.cfs, target)
+        if compiled and thread.compiled_depth < MAX_COMPILED_DEPTH:
+            ret = compiled(thread, *args)
+            if target.returns:
+                stack.append(ret)
+            return None
+    frames.append(Frame(thread, target, target.local_variables(args), frame))
+    return True
+
+
+def _method_monitor(target: ResolvedMethod, args: List[Any]) -> Any:
+    '''the receiver of a synchronized method, the class (by a key no java value equals) of a static one'''
+    return ('class', target.c.name) if target.method.is_static else args[0]
+
+
+def _invoke_synchronized(frame: Frame, target: ResolvedMethod, args: List[Any]) -> bool:
+    '''push the frame of a synchronized method, which runs once it holds the monitor'''
+    thread = frame.thread
+    obj = _method_monitor(target, args)
+    callee = Frame(thread, target, target.local_variables(args), frame)
+    thread.frames.append(callee)
+    if not monitor.enter(thread.heap.monitors, obj, thread):
+        monitor.block(thread.heap.monitors, obj, thread)
+    callee.monitor = obj
+    return True
+
+
+def _monitorenter(frame: Frame, operand: Any) -> Optional[bool]:
+    obj = frame.stack.pop()
+    if obj is None:
+        raise exceptions.NullPointerError('monitorenter of null')
+    thread = frame.thread
+    if monitor.enter(thread.heap.monitors, obj, thread):
+        return None
+    # runs again holding the monitor
+    monitor.block(thread.heap.monitors, obj, thread)
+    return True
+
+
+def _monitorexit(frame: Frame, operand: Any):
+    monitor.exit(frame.thread.heap.monitors, frame.stack.pop(), frame.thread)
+
+
+def _wait(frame: Frame, args: List[Any]) -> Optional[bool]:
+    thread = frame.thread
+    monitor.wait(thread.heap.monitors, args[0], thread, args[1] if len(args) > 1 else 0)
+    return True if thread.switch else None
+
+
+def _notify(frame: Frame, args: List[Any]):
+    monitor.notify(frame.thread.heap.monitors, args[0], frame.thread)
+
+
+def _notify_all(frame: Frame, args: List[Any]):
+    monitor.notify(frame.thread.heap.monitors, args[0], frame.thread, all=True)
+
+
+def string_of(thread: Thread, value: Any, descriptor: str = 'Ljava/lang/Object;') -> str:
+    '''String.valueOf of a java value of type descriptor, the toString() of an object is selected by its class and run on thread'''
+    if value.__class__ is not JavaObject:
+        return natives.to_string(value, descriptor)
+    target = find_virtual(thread.cfs, value, 'toString', '()Ljava/lang/String;')
+    s = target.native(value) if target.native is not None else thread.invoke(target, [value])
+    return 'null' if s is None else s
+
+
+def _write(frame: Frame, stream: Any, text: str) -> Optional[bool]:
+    '''print text to stream, System.out prints to the stdout of the thread if it has one'''
+    thread = frame.thread
+    if stream is natives.out and thread.stdout is not None:
+        if thread.scheduler is not None:
+            return thread.scheduler.write(thread, text)
+        thread.stdout.write(text)
+        return None
+    if not isinstance(stream, natives.PrintStream):
+        raise Exception(f'{stream!r} is not a PrintStream')
+    stream.write(text)
+    return None
+
+
+def _printer(descriptor: str, end: str) -> Callable[[Frame, List[Any]], Optional[bool]]:
+    '''PrintStream.print or println of a value of type descriptor'''
+    def _print(frame: Frame, args: List[Any]) -> Optional[bool]:
+        return _write(frame, args[0], (string_of(frame.thread, args[1], descriptor) if len(args) > 1 else '') + end)
+    return _print
+
+
+def _format(frame: Frame, fmt: str, args: List[Any]) -> str:
+    thread = frame.thread
+    return natives.java_format(fmt, args, lambda value: string_of(thread, value))
+
+
+def _printf(frame: Frame, args: List[Any]) -> Optional[bool]:
+    frame.stack.append(args[0])  # returns the stream
+    return _write(frame, args[0], _format(frame, args[1], args[2]))
+
+
+def _string_format(frame: Frame, args: List[Any]):
+    frame.stack.append(_format(frame, args[0], args[1]))
+
+
+def _value_of(frame: Frame, args: List[Any]):
+    frame.stack.append(string_of(frame.thread, args[0]))
+
+
+def _append(frame: Frame, args: List[Any]):
+    sb, value = args
+    frame.stack.append(sb.append(string_of(frame.thread, value)))
+
+
+_PRINTABLE = ('Z', 'C', 'I', 'J', 'F', 'D', 'Ljava/lang/String;', 'Ljava/lang/Object;')
+intrinsics['java/io/PrintStream'] = {
+    'println()V': _printer('', '\n'),
+    **{f'println({d})V': _printer(d, '\n') for d in _PRINTABLE},
+    **{f'print({d})V': _printer(d, '') for d in _PRINTABLE},
+    'printf(Ljava/lang/String;[Ljava/lang/Object;)Ljava/io/PrintStream;': _printf,
+    'format(Ljava/lang/String;[Ljava/lang/Object;)Ljava/io/PrintStream;': _printf,
+}
+intrinsics['java/lang/String'] = {
+    'valueOf(Ljava/lang/Object;)Ljava/lang/String;': _value_of,
+    'format(Ljava/lang/String;[Ljava/lang/Object;)Ljava/lang/String;': _string_format,
+}
+for _builder in ('java/lang/StringBuilder', 'java/lang/StringBuffer'):
+    intrinsics[_builder] = {f'append(Ljava/lang/Object;)L{_builder};': _append}
+intrinsics['java/lang/Object'] = {
+    'wait()V': _wait,
+    'wait(J)V': _wait,
+    'notify()V': _notify,
+    'notifyAll()V': _notify_all,
+}
+
+
+def resolve_static(frame: Frame, pool_index: int) -> ResolvedMethod:
+    '''an invokestatic target, its class initialized. cached in ClassFile.resolved once the class is initialized'''
+    c = frame.c
+    class_name, name, descriptor = _member_ref(c, pool_index)
+    target = resolve_method(frame.thread.cfs, class_name, name, descriptor, False)
+    if target.c is not None:
+        initialize(frame.thread, target.c)
+        if target.c.initialized is not True:
+            return target  # called by its <clinit>
+    c.resolved[pool_index] = target
+    return target
+
+
+def _invokestatic(frame: Frame, pool_index: int):
+    target = frame.c.resolved.get(pool_index) or resolve_static(frame, pool_index)
+    return _invoke(frame, target, target.arg_count)
+
+
+def _member_ref(c: ClassFile, pool_index: int) -> Tuple[str, str, str]:
+    '''class, name and descriptor of a Fieldref, Methodref or InterfaceMethodref constant'''
+    cp = c.constant_pool
+    ref = cp[pool_index]
+    cp_class: CONSTANT_Class = cp[ref.class_index]
+    cp_name_type: CONSTANT_NameAndType = cp[ref.name_and_type_index]
+    return cp[cp_class.name_index].info.decode(), cp[cp_name_type.name_index].info.decode(), cp[cp_name_type.descriptor_index].info.decode()
+
+
+class Lambda(Reference):
+    '''
+    an instance of a functional interface, made by a LambdaMetafactory call site.
+    calling its method name calls target with the captured values first.
+    '''
+    __slots__ = ('interface', 'name', 'target', 'captured')
+
+    def __init__(self, interface: str, name: str, target: ResolvedMethod, captured: Tuple[Any, ...]):
+        self.interface = interface
+        self.name = name
+        self.target = target
+        self.captured = captured
+
+    def references(self) -> Tuple[Any, ...]:
+        return self.captured
+
+    def __repr__(self):
+        return f'Lambda({self.interface}.{self.name} -> {self.target.label})'
+
+
+class VTable:
+    '''
+    the virtual methods of a class by slot index. a method overriding another takes its slot, so
+    a slot index resolved on a class selects the method (or its override) in every subclass.
+    itables map every interface of the class to the targets of the interface's slots.
+    an abstract method has a slot holding None.
+    '''
+    __slots__ = ('name', 'slots', 'methods', 'itables')
+
+    def __init__(self, name: str, super: Optional['VTable']):
+        self.name = name
+        self.slots: Dict[str, int] = dict(super.slots) if super else {}  # name + descriptor -> slot index
+        self.methods: List[Optional[ResolvedMethod]] = list(super.methods) if super else []
+        self.itables: Dict[str, List[Optional[ResolvedMethod]]] = {}
+
+    def define(self, signature: str, target: Optional[ResolvedMethod]):
+        slot = self.slots.get(signature)
+        if slot is None:
+            self.slots[signature] = len(self.methods)
+            self.methods.append(target)
+        else:
+            self.methods[slot] = target
+
+    def lookup(self, signature: str) -> Optional[ResolvedMethod]:
+        slot = self.slots.get(signature)
+        return None if slot is None else self.methods[slot]
+
+    def __repr__(self):
+        return f'VTable({self.name}, {list(self.slots)})'
+
+
+# vtables of the classes implemented by intrinsics and natives, e.g. java/lang/String
+_builtin_vtables: Dict[str, VTable] = {}
+
+
+def _builtin_vtable(class_name: str) -> VTable:
+    vtable = _builtin_vtables.get(class_name)
+    if vtable is None:
+        layout = BUILTIN_LAYOUTS.get(class_name)
+        if layout is not None and layout.super is not None:
+            # e.g. java/lang/RuntimeException inherits the natives of java/lang/Throwable
+            vtable = VTable(class_name, _builtin_vtable(layout.super.name))
+        else:
+            vtable = VTable(class_name, None if class_name == 'java/lang/Object' else _builtin_vtable('java/lang/Object'))
+        signatures = [*intrinsics.get(class_name, {}),
+                      *(sig for sig, n in natives.natives.get(class_name, {}).items() if not n.static)]
+        for signature in signatures:
+            if signature[0] != '<':
+                paren = signature.index('(')
+                # found in intrinsics or natives, so independent of any class path
+                vtable.define(signature, resolve_method({}, class_name, signature[:paren], signature[paren:], True))
+        _builtin_vtables[class_name] = vtable
+    return vtable
+
+
+def _interfaces(cfs: Mapping[str, ClassFile], names: List[str], found: Dict[str, None]) -> Dict[str, None]:
+    '''names and their superinterfaces, in order'''
+    for name in names:
+        if name not in found:
+            found[name] = None
+            if name in cfs:
+                _interfaces(cfs, cfs[name].interface_names, found)
+    return found
+
+
+def vtable_of(cfs: Mapping[str, ClassFile], class_name: str) -> VTable:
+    '''
+    the vtable of a class, built once per class on the first call dispatched on it.
+    a class not in cfs is implemented by intrinsics and natives (or unknown, with an empty vtable).
+    the slots of an interface are its methods (including those of its superinterfaces), a default
+    method fills its slot with a target.
+    '''
+    c = cfs[class_name] if class_name in cfs else None
+    if c is None:
+        return _builtin_vtable(class_name)
+    if c.vtable is not None:
+        return c.vtable
+    if c.is_interface:
+        vtable = VTable(class_name, None)
+        for interface in _interfaces(cfs, c.interface_names, {}):
+            inherited = vtable_of(cfs, interface)
+            for signature, slot in inherited.slots.items():
+                if vtable.lookup(signature) is None:
+                    vtable.define(signature, inherited.methods[slot])
+    else:
+        # java/lang/Object on the class path extends the builtin one
+        parent = vtable_of(cfs, c.super_name) if c.super_name is not None else _builtin_vtable('java/lang/Object')
+        vtable = VTable(class_name, parent)
+    for m in c.methods:
+        if not m.is_static and not m.is_private and m.name[0] != '<':
+            vtable.define(m.name + m.descriptor, None if m.is_abstract else resolve_method(cfs, class_name, m.name, m.descriptor, True))
+    if not c.is_interface:
+        interfaces = _interfaces(cfs, c.interface_names, dict.fromkeys(parent.itables))
+        for interface in interfaces:
+            # default methods the class does not implement
+            inherited = vtable_of(cfs, interface)
+            for signature, slot in inherited.slots.items():
+                if vtable.lookup(signature) is None and inherited.methods[slot] is not None:
+                    vtable.define(signature, inherited.methods[slot])
+        for interface in interfaces:
+            vtable.itables[interface] = [vtable.lookup(signature) for signature in vtable_of(cfs, interface).slots]
+    c.vtable = vtable
+    return vtable
+
+
+# classes of the values which are not JavaObjects
+_BUILTIN_CLASSES: Dict[type, str] = {
+    str: 'java/lang/String',
+    natives.StringBuilder: 'java/lang/StringBuilder',
+    natives.PrintStream: 'java/io/PrintStream',
+    PrimitiveArray: 'java/lang/Object',
+    ReferenceArray: 'java/lang/Object',
+    Lambda: 'java/lang/Object',
+}
+
+
+def _receiver_class(value: Any, default: str = 'java/lang/Object') -> str:
+    '''the class of a receiver, default for a builtin value of an unknown class'''
+    if value.__class__ is JavaObject:
+        return value.class_name
+    if value is None:
+        raise exceptions.NullPointerError('method call on null')
+    return _BUILTIN_CLASSES.get(value.__class__, default)
+
+
+def find_virtual(cfs: Mapping[str, ClassFile], receiver: Any, name: str, descriptor: str) -> ResolvedMethod:
+    '''the method name + descriptor selected by the class of receiver'''
+    vtable = vtable_of(cfs, _receiver_class(receiver))
+    target = vtable.lookup(name + descriptor)
+    if target is None:
+        raise Exception(f'{vtable.name}.{name}{descriptor} is abstract or not found')
+    return target
+
+
+class VirtualCall:
+    '''
+    an invokevirtual or invokeinterface target, resolved once per constant and cached in
+    ClassFile.resolved. the method is selected by slot in the vtable of the receiver's class,
+    or in its itable of interface.
+    '''
+    __slots__ = ('class_name', 'signature', 'arg_count', 'interface', 'slot', 'direct')
+
+    def __init__(self, class_name: str, name: str, descriptor: str, interface: bool, slot: Optional[int],
+                 direct: Optional[ResolvedMethod]):
+        self.class_name = class_name
+        self.signature = name + descriptor
+        self.arg_count = len(parse_method_descriptor(descriptor)[0])  # without the object ref
+        self.interface = class_name if interface else None
+        self.slot = slot  # None: looked up by signature, e.g. on an interface which is not loaded
+        self.direct = direct  # the target of a method which can not be overridden
+
+    def select(self, cfs: Mapping[str, ClassFile], receiver: Any) -> ResolvedMethod:
+        vtable = vtable_of(cfs, _receiver_class(receiver, self.class_name))
+        if self.direct is not None:
+            return self.direct
+        if self.slot is None:
+            target = vtable.lookup(self.signature)
+        elif self.interface is None:
+            target = vtable.methods[self.slot]
+        else:
+            itable = vtable.itables.get(self.interface)
+            target = itable[self.slot] if itable is not None else vtable.lookup(self.signature)
+        if target is None:
+            raise Exception(f'{vtable.name}.{self.signature} is abstract or not found')
+        return target
+
+    def __repr__(self):
+        return f'VirtualCall({self.class_name}.{self.signature}, slot={self.slot})'
+
+
+class InlineCache:
+    '''
+    the operand of an invokevirtual or invokeinterface instruction, so every call site has its own:
+    the class of the last receiver and its target. a call on a receiver of the same class as the
+    last one (a monomorphic site) does no lookup.
+    '''
+    __slots__ = ('pool_index', 'call', 'receiver_class', 'target', 'misses')
+
+    def __init__(self, pool_index: int):
+        self.pool_index = pool_index
+        self.call: Optional[VirtualCall] = None
+        self.receiver_class: Any = None  # Layout of a JavaObject or the python type of a builtin value
+        self.target: Optional[ResolvedMethod] = None
+        self.misses = 0
+
+    def dispatch(self, cfs: Mapping[str, ClassFile], receiver: Any) -> ResolvedMethod:
+        '''select the target for receiver and keep it'''
+        self.target = target = self.call.select(cfs, receiver)
+        self.receiver_class = receiver.layout if receiver.__class__ is JavaObject else receiver.__class__
+        self.misses += 1
+        return target
+
+    def __getstate__(self):
+        # the targets depend on other classes, they are selected again at run time
+        return self.pool_index
+
+    def __setstate__(self, state: int):
+        self.__init__(state)
+
+    def __repr__(self):
+        return f'InlineCache({self.call or self.pool_index}, misses={self.misses})'
+
+
+def _link_virtual(frame: Frame, cache: InlineCache, interface: bool) -> VirtualCall:
+    c = frame.c
+    call = c.resolved.get(cache.pool_index)
+    if call is None:
+        cfs = frame.thread.cfs
+        class_name, name, descriptor = _member_ref(c, cache.pool_index)
+        vtable = vtable_of(cfs, class_name)
+        slot = vtable.slots.get(name + descriptor)
+        direct = None
+        if slot is None and not interface:
+            # a private (or otherwise not overridable) method is not in the vtable
+            direct = resolve_method(cfs, class_name, name, descriptor, True)
+        elif slot is not None and not interface and class_name in cfs:
+            method = find_method(cfs, class_name, name, descriptor)
+            if cfs[class_name].is_final or method is not None and method.is_final:
+                direct = vtable.methods[slot]
+        call = c.resolved[cache.pool_index] = VirtualCall(class_name, name, descriptor, interface, slot, direct)
+    cache.call = call
+    return call
+
+
+def _invokevirtual(frame: Frame, cache: InlineCache):
+    call = cache.call or _link_virtual(frame, cache, False)
+    n = call.arg_count
+    receiver = frame.stack[-1 - n]
+    if (receiver.layout if receiver.__class__ is JavaObject else receiver.__class__) is cache.receiver_class:
+        return _invoke(frame, cache.target, n + 1)
+    return _invoke(frame, cache.dispatch(frame.thread.cfs, receiver), n + 1)
+
+
+def _resolve_special(frame: Frame, pool_index: int) -> ResolvedMethod:
+    '''a constructor, a private method or a method of a superclass (super.name())'''
+    c = frame.c
+    cfs = frame.thread.cfs
+    class_name, name, descriptor = _member_ref(c, pool_index)
+    target = None
+    if name != '<init>' and class_name in cfs and find_method(cfs, class_name, name, descriptor) is None:
+        target = vtable_of(cfs, class_name).lookup(name + descriptor)  # inherited
+    if target is None:
+        target = resolve_method(cfs, class_name, name, descriptor, True)
+    c.resolved[pool_index] = target
+    return target
+
+
+def _invokespecial(frame: Frame, pool_index: int):
+    target = frame.c.resolved.get(pool_index) or _resolve_special(frame, pool_index)
+    if frame.stack[-1 - target.arg_count] is None:
+        raise exceptions.NullPointerError(f'{target.label} of null')
+    return _invoke(frame, target, target.arg_count + 1)
+
+
+def _invokeinterface(frame: Frame, cache: InlineCache):
+    call = cache.call or _link_virtual(frame, cache, True)
+    n = call.arg_count
+    stack = frame.stack
+    receiver = stack[-1 - n]
+    receiver_class = receiver.layout if receiver.__class__ is JavaObject else receiver.__class__
+    if receiver_class is cache.receiver_class:
+        return _invoke(frame, cache.target, n + 1)
+    if receiver_class is Lambda:
+        if not call.signature.startswith(receiver.name + '('):
+            raise Exception(f'{receiver!r} does not implement {call.signature}')
+        # the captured values take the place of the receiver
+        stack[len(stack) - 1 - n:len(stack) - n] = receiver.captured
+        return _invoke(frame, receiver.target, len(receiver.captured) + n)
+    return _invoke(frame, cache.dispatch(frame.thread.cfs, receiver), n + 1)
+
+
+_CONCAT_FACTORY = 'java/lang/invoke/StringConcatFactory'
+_LAMBDA_FACTORY = 'java/lang/invoke/LambdaMetafactory'
+# reference kinds of CONSTANT_MethodHandle
+_REF_INVOKE_STATIC = 6
+_REF_NEW_INVOKE_SPECIAL = 8
+
+
+def _bootstrap_argument(c: ClassFile, pool_index: int) -> Any:
+    cp = c.constant_pool
+    constant = cp[pool_index]
+    if isinstance(constant, CONSTANT_String):
+        return natives.intern(cp[constant.string_index].info.decode())
+    if isinstance(constant, CONSTANT_Integer):
+        return _i32(constant.value)
+    if isinstance(constant, CONSTANT_MethodType):
+        return cp[constant.descriptor_index].info.decode()
+    if isinstance(constant, CONSTANT_MethodHandle):
+        return constant.reference_kind, _member_ref(c, constant.reference_index)
+    raise Exception(f'unsupported bootstrap argument {constant}')
+
+
+def _concat_site(formatter: Callable[..., str], n_args: int) -> Callable[[Frame], None]:
+    def site(frame: Frame):
+        stack = frame.stack
+        if n_args:
+            args = stack[-n_args:]
+            del stack[-n_args:]
+            stack.append(formatter(frame.thread, *args))
+        else:
+            stack.append(formatter(frame.thread))
+    return site
+
+
+def _lambda_site(cfs: Mapping[str, ClassFile], name: str, interface: str, sam_descriptor: str,
+                 handle: Tuple[int, Tuple[str, str, str]], n_captured: int) -> Callable[[Frame], None]:
+    kind, (impl_class, impl_name, impl_descriptor) = handle
+    if kind == _REF_NEW_INVOKE_SPECIAL:
+        raise Exception(f'constructor reference {impl_class}::new is not supported')
+    target = resolve_method(cfs, impl_class, impl_name, impl_descriptor, kind != _REF_INVOKE_STATIC)
+    if target.returns != (parse_method_descriptor(sam_descriptor)[1] != 'V'):
+        raise Exception(f'{target.label} does not return like {interface}.{name}{sam_descriptor}')
+    if n_captured == 0:
+        instance = Lambda(interface, name, target, ())  # a lambda capturing nothing is a constant
+
+        def site(frame: Frame):
+            frame.stack.append(instance)
+    else:
+        def site(frame: Frame):
+            stack = frame.stack
+            captured = tuple(stack[-n_captured:])
+            del stack[-n_captured:]
+            stack.append(Lambda(interface, name, target, captured))
+    return site
+
+
+def _link_call_site(frame: Frame, pool_index: int) -> Callable[[Frame], None]:
+    '''
+    run the bootstrap method of an invokedynamic call site, once per site. string concatenation
+    links to a formatter (see natives.concat_formatter), a lambda to a factory of Lambda objects.
+    '''
+    c = frame.c
+    cp = c.constant_pool
+    cp_indy: CONSTANT_InvokeDynamic = cp[pool_index]
+    cp_name_type: CONSTANT_NameAndType = cp[cp_indy.name_and_type_index]
+    name: str = cp[cp_name_type.name_index].info.decode()
+    descriptor: str = cp[cp_name_type.descriptor_index].info.decode()
+    bsm = find_bootstrap_methods(frame.thread.cfs, c.name).bootstrap_methods[cp_indy.bootstrap_method_att_inex]
+    handle: CONSTANT_MethodHandle = cp[bsm.bootstrap_method_ref]
+    factory, method, _ = _member_ref(c, handle.reference_index)
+    args = [_bootstrap_argument(c, i) for i in bsm.bootstrap_arguments]
+    params, return_type = parse_method_descriptor(descriptor)
+    if factory == _CONCAT_FACTORY and method == 'makeConcatWithConstants':
+        site = _concat_site(natives.concat_formatter(args[0], params, args[1:], string_of), len(params))
+    elif factory == _CONCAT_FACTORY and method == 'makeConcat':
+        site = _concat_site(natives.concat_formatter('\1' * len(params), params, (), string_of), len(params))
+    elif factory == _LAMBDA_FACTORY and method in ('metafactory', 'altMetafactory'):
+        site = _lambda_site(frame.thread.cfs, name, return_type[1:-1], args[0], args[1], len(params))
+    else:
+        raise Exception(f'unsupported bootstrap method {factory}.{method}')
+    c.resolved[pool_index] = site
+    return site
+
+
+def _invokedynamic(frame: Frame, pool_index: int):
+    site = frame.c.resolved.get(pool_index) or _link_call_site(frame, pool_index)
+    site(frame)
+
+
+def _backedge(frame: Frame, operand: Tuple[Callable[[Frame, Any], Optional[bool]], int]) -> Optional[bool]:
+    '''
+    a backward branch. counts loop iterations for the compiler, and once the method is compiled
+    continues it in the compiled code from the loop header (on stack replacement).
+    '''
+    handler, target = operand
+    handler(frame, target)
+    thread = frame.thread
+    if not thread.jit:
+        return None
+    code = frame.method.code
+    compiled = code.compiled
+    if compiled is None:
+        code.backedges += 1
+        if code.backedges < thread.compile_threshold:
+            return None
+        compiled = compile_method(thread.cfs, frame.method)
+    if (compiled and frame.pc in compiled.entries and not frame.stack
+            and thread.compiled_depth < MAX_COMPILED_DEPTH and len(frame.local_variables) == code.max_locals):
+        value = compiled(thread, *frame.local_variables, _pc=frame.pc)
+        # the frame returns as in _xreturn and _return
+        thread.frames.pop()
+        if frame.monitor is not None:
+            monitor.exit(thread.heap.monitors, frame.monitor, thread)
+        if frame.method.returns:
+            if frame.memo_key is not None:
+                code.memo.put(frame.memo_key, value)
+            if frame.caller is None:
+                frame.result = value
+            else:
+                frame.caller.stack.append(value)
+        return True
+    return None
+
+
+def _resolve_new(frame: Frame, pool_index: int) -> Union[Layout, Callable[[], Any]]:
+    '''the layout of a new instance, its class initialized. cached in ClassFile.resolved once the class is initialized'''
+    c = frame.c
+    cfs = frame.thread.cfs
+    cp_class: CONSTANT_Class = c.constant_pool[pool_index]
+    class_name: str = c.constant_pool[cp_class.name_index].info.decode()
+    # a class implemented by natives (e.g. StringBuilder) has a factory instead of a layout
+    layout = natives.classes.get(class_name) or layout_of(cfs, class_name)
+    if class_name in cfs:
+        initialize(frame.thread, cfs[class_name])
+        if cfs[class_name].initialized is not True:
+            return layout  # created by its <clinit>
+    c.resolved[pool_index] = layout
+    return layout
+
+
+def _new(frame: Frame, pool_index: int):
+    layout: Union[Layout, Callable[[], Any], None] = frame.c.resolved.get(pool_index) or _resolve_new(frame, pool_index)
+    if layout.__class__ is Layout:
+        frame.stack.append(frame.thread.heap.new(layout))
+    else:
+        frame.stack.append(layout())
+
+
+def _athrow(frame: Frame, operand: Any):
+    stack = frame.stack
+    throwable = stack[-1]
+    if throwable is None:
+        raise exceptions.NullPointerError('athrow of null')
+    code = frame.method.code
+    if code.exception_table:
+        handler = (code.handlers or exceptions.index_handlers(frame.c, code)).find(frame.pc - 1, throwable.layout)
+        if handler is not None:
+            # thrown and caught in this method, no python exception is raised
+            stack.clear()
+            stack.append(throwable)
+            frame.pc = handler
+            return None
+    raise exceptions.JavaThrowable(throwable)
+
+
+# the supertypes of values which are not JavaObjects. boxed values are python ints and floats,
+# so their exact box class is not known.
+_NUMBER_TYPES = frozenset(['java/lang/Number', 'java/lang/Comparable', 'java/io/Serializable'])
+_BUILTIN_TYPES: Dict[type, FrozenSet[str]] = {
+    str: frozenset(['java/lang/String', 'java/lang/CharSequence', 'java/lang/Comparable', 'java/io/Serializable']),
+    natives.StringBuilder: frozenset(['java/lang/StringBuilder', 'java/lang/CharSequence', 'java/lang/Appendable',
+                                      'java/io/Serializable']),
+    natives.PrintStream: frozenset(['java/io/PrintStream']),
+    int: _NUMBER_TYPES | {'java/lang/Integer', 'java/lang/Long', 'java/lang/Short', 'java/lang/Byte',
+                          'java/lang/Character', 'java/lang/Boolean'},
+    float: _NUMBER_TYPES | {'java/lang/Float', 'java/lang/Double'},
+}
+_ARRAY_TYPES = frozenset(['java/lang/Cloneable', 'java/io/Serializable'])
+
+
+def _element_class(descriptor: str) -> Optional[str]:
+    '''the class name of an array element descriptor, None for a primitive'''
+    if descriptor[0] == 'L':
+        return descriptor[1:-1]
+    return descriptor if descriptor[0] == '[' else None
+
+
+def is_assignable(cfs: Mapping[str, ClassFile], class_name: str, target: str) -> bool:
+    '''
+    whether an instance of class_name is an instance of target, a class, interface or array class
+    (e.g. [LShape;). the superclasses come from the layouts, the interfaces from the itables.
+    '''
+    if class_name == target or target == 'java/lang/Object':
+        return True
+    if class_name[0] == '[':
+        if target[0] != '[':
+            return target in _ARRAY_TYPES
+        element, target_element = _element_class(class_name[1:]), _element_class(target[1:])
+        return element is not None and target_element is not None and is_assignable(cfs, element, target_element)
+    c = cfs[class_name] if class_name in cfs else None
+    if c is not None and c.is_interface:
+        return target in _interfaces(cfs, c.interface_names, {})
+    if c is None and class_name not in BUILTIN_LAYOUTS:
+        return False
+    # itables hold every interface of the class and its superclasses
+    return exceptions.is_subclass(layout_of(cfs, class_name), target) or target in vtable_of(cfs, class_name).itables
+
+
+def instance_of(cfs: Mapping[str, ClassFile], value: Any, target: str) -> bool:
+    '''whether value (not null) is an instance of target'''
+    cls = value.__class__
+    if cls is JavaObject:
+        return is_assignable(cfs, value.layout.name, target)
+    if cls is ReferenceArray or cls is PrimitiveArray:
+        return is_assignable(cfs, value.descriptor, target)
+    if cls is Lambda:
+        return is_assignable(cfs, value.interface, target)
+    types = _BUILTIN_TYPES.get(cls)
+    return target == 'java/lang/Object' or types is not None and target in types
+
+
+class TypeCheck:
+    '''
+    the operand of a checkcast or instanceof instruction, one per instruction (see link_code):
+    the class checked against and the result for the layout of the last object checked.
+    '''
+    __slots__ = ('pool_index', 'class_name', 'layout', 'result')
+
+    def __init__(self, pool_index: int):
+        self.pool_index = pool_index
+        self.class_name: Optional[str] = None
+        self.layout: Optional[Layout] = None
+        self.result = False
+
+    def test(self, frame: Frame, value: Any) -> bool:
+        '''whether value (not null) is an instance of the class'''
+        if self.class_name is None:
+            c = frame.c
+            cp_class: CONSTANT_Class = c.constant_pool[self.pool_index]
+            self.class_name = c.constant_pool[cp_class.name_index].info.decode()
+        if value.__class__ is not JavaObject:
+            return instance_of(frame.thread.cfs, value, self.class_name)
+        if value.layout is not self.layout:
+            self.result = is_assignable(frame.thread.cfs, value.layout.name, self.class_name)
+            self.layout = value.layout
+        return self.result
+
+    def __getstate__(self):
+        return self.pool_index
+
+    def __setstate__(self, state: int):
+        self.__init__(state)
+
+    def __repr__(self):
+        return f'TypeCheck({self.class_name or self.pool_index})'
+
+
+def _value_class(value: Any) -> str:
+    if value.__class__ is JavaObject:
+        return value.layout.name
+    if value.__class__ is ReferenceArray or value.__class__ is PrimitiveArray:
+        return value.descriptor
+    return _receiver_class(value)
+
+
+def _checkcast(frame: Frame, check: TypeCheck):
+    value = frame.stack[-1]
+    if value is not None and not check.test(frame, value):
+        source, target = _value_class(value).replace('/', '.'), check.class_name.replace('/', '.')
+        raise natives.ClassCastError(f'class {source} cannot be cast to class {target}')
+
+
+def _instanceof(frame: Frame, check: TypeCheck):
+    stack = frame.stack
+    value = stack[-1]
+    stack[-1] = 0 if value is None else int(check.test(frame, value))
+
+
+def _unknown(frame: Frame, instruction: Instruction):
+    raise Exception(f'unknown opcode {mnemonic(instruction.opcode)} at {instruction.pc}')
+
+
+# opcode -> handler
+HANDLERS: Dict[int, Callable[[Frame, Any], Optional[bool]]] = {
+    0x00: _nop,
+    0x01: _const,  # aconst_null
+    **{op: _const for op in range(0x02, 0x09)},  # iconst_<i>
+    **{op: _const for op in range(0x09, 0x10)},  # lconst_<l> fconst_<f> dconst_<d>
+    0x10: _const,  # bipush
+    0x11: _const,  # sipush
+    0x12: _ldc,
+    0x13: _ldc,  # ldc_w
+    0x14: _ldc,  # ldc2_w
+    0x15: _load,  # iload
+    0x16: _load,  # lload
+    0x17: _load,  # fload
+    0x18: _load,  # dload
+    0x19: _load,  # aload
+    **{op: _load for op in range(0x1a, 0x1e)},  # iload_<n>
+    **{op: _load for op in range(0x1e, 0x2a)},  # lload_<n> fload_<n> dload_<n>
+    **{op: _load for op in range(0x2a, 0x2e)},  # aload_<n>
+    **{op: _xaload for op in range(0x2e, 0x36)},  # iaload ... saload
+    0x36: _store,  # istore
+    0x37: _store,  # lstore
+    0x38: _store,  # fstore
+    0x39: _store,  # dstore
+    0x3a: _store,  # astore
+    **{op: _store for op in range(0x3b, 0x3f)},  # istore_<n>
+    **{op: _store for op in range(0x3f, 0x4b)},  # lstore_<n> fstore_<n> dstore_<n>
+    **{op: _store for op in range(0x4b, 0x4f)},  # astore_<n>
+    **{op: _xastore for op in range(0x4f, 0x54)},  # iastore, lastore, fastore, dastore, aastore
+    0x54: _bastore,
+    0x55: _castore,
+    0x56: _sastore,
+    0x57: _pop,
+    0x58: _pop2,
+    0x59: _dup,
+    0x5a: _dup_x1,
+    0x5c: _dup2,
+    0x5f: _swap,
+    0x60: _iadd,
+    0x61: _ladd,
+    0x62: _fadd,
+    0x63: _dadd,
+    0x64: _isub,
+    0x65: _lsub,
+    0x66: _fsub,
+    0x67: _dsub,
+    0x68: _imul,
+    0x69: _lmul,
+    0x6a: _fmul,
+    0x6b: _dmul,
+    0x6c: _idiv,
+    0x6d: _ldiv,
+    0x6e: _fdiv,
+    0x6f: _ddiv,
+    0x70: _irem,
+    0x71: _lrem,
+    0x72: _frem,
+    0x73: _drem,
+    0x74: _ineg,
+    0x75: _lneg,
+    0x76: _fneg,
+    0x77: _dneg,
+    0x78: _ishl,
+    0x79: _lshl,
+    0x7a: _ishr,
+    0x7b: _lshr,
+    0x7c: _iushr,
+    0x7d: _lushr,
+    0x7e: _iand,
+    0x7f: _land,
+    0x80: _ior,
+    0x81: _lor,
+    0x82: _ixor,
+    0x83: _lxor,
+    0x84: _iinc,
+    0x85: _nop,  # i2l, an int is a long already
+    0x86: _i2f,
+    0x87: _i2d,
+    0x88: _l2i,
+    0x89: _l2f,
+    0x8a: _l2d,
+    0x8b: _f2i,
+    0x8c: _f2l,
+    0x8d: _nop,  # f2d, a float is a double already
+    0x8e: _d2i,
+    0x8f: _d2l,
+    0x90: _d2f,
+    0x91: _i2b,
+    0x92: _i2c,
+    0x93: _i2s,
+    0x94: _lcmp,
+    0x95: _fcmpl,
+    0x96: _fcmpg,
+    0x97: _dcmpl,
+    0x98: _dcmpg,
+    0x99: _ifeq,
+    0x9a: _ifne,
+    0x9b: _iflt,
+    0x9c: _ifge,
+    0x9d: _ifgt,
+    0x9e: _ifle,
+    0x9f: _if_icmpeq,
+    0xa0: _if_icmpne,
+    0xa1: _if_icmplt,
+    0xa2: _if_icmpge,
+    0xa3: _if_icmpgt,
+    0xa4: _if_icmple,
+    0xa5: _if_acmpeq,
+    0xa6: _if_acmpne,
+    0xa7: _goto,
+    0xaa: _tableswitch,
+    0xab: _lookupswitch,
+    0xac: _xreturn,  # ireturn
+    0xad: _xreturn,  # lreturn
+    0xae: _xreturn,  # freturn
+    0xaf: _xreturn,  # dreturn
+    0xb0: _xreturn,  # areturn
+    0xb1: _return,
+    0xb2: _getstatic,
+    0xb3: _putstatic,
+    0xb4: _getfield,
+    0xb5: _putfield,
+    0xb6: _invokevirtual,
+    0xb7: _invokespecial,
+    0xb8: _invokestatic,
+    0xb9: _invokeinterface,
+    0xba: _invokedynamic,
+    0xbb: _new,
+    0xbc: _newarray,
+    0xbd: _anewarray,
+    0xbe: _arraylength,
+    0xbf: _athrow,
+    0xc0: _checkcast,
+    0xc1: _instanceof,
+    0xc2: _monitorenter,
+    0xc3: _monitorexit,
+    0xc5: _multianewarray,
+    0xc6: _ifnull,
+    0xc7: _ifnonnull,
+    0xc8: _goto,  # goto_w
+}
+
+
+# superinstructions.
+# a fused handler runs a sequence of instructions and skips the rest of the sequence, which stays
+# in place: instruction indexes still match Code.decoded, and a branch into the sequence runs the
+# original instructions.
+
+
+def _iload_iload_iadd(frame: Frame, operand: Tuple[int, int]):
+    local_variables = frame.local_variables
+    frame.stack.append(_i32(local_variables[operand[0]] + local_variables[operand[1]]))
+    frame.pc += 2
+
+
+def _iload_iload_isub(frame: Frame, operand: Tuple[int, int]):
+    local_variables = frame.local_variables
+    frame.stack.append(_i32(local_variables[operand[0]] - local_variables[operand[1]]))
+    frame.pc += 2
+
+
+def _iload_iload_imul(frame: Frame, operand: Tuple[int, int]):
+    local_variables = frame.local_variables
+    frame.stack.append(_i32(local_variables[operand[0]] * local_variables[operand[1]]))
+    frame.pc += 2
+
+
+def _iload_const_iadd(frame: Frame, operand: Tuple[int, int]):
+    frame.stack.append(_i32(frame.local_variables[operand[0]] + operand[1]))
+    frame.pc += 2
+
+
+def _iload_const_isub(frame: Frame, operand: Tuple[int, int]):
+    frame.stack.append(_i32(frame.local_variables[operand[0]] - operand[1]))
+    frame.pc += 2
+
+
+def _iload_if(frame: Frame, operand: Tuple[int, int, Callable[[int, int], bool]]):
+    index, target, compare = operand
+    if compare(frame.local_variables[index], 0):
+        frame.pc = target
+    else:
+        frame.pc += 1
+
+
+def _iload_const_if_icmp(frame: Frame, operand: Tuple[int, int, int, Callable[[int, int], bool]]):
+    index, value, target, compare = operand
+    if compare(frame.local_variables[index], value):
+        frame.pc = target
+    else:
+        frame.pc += 2
+
+
+def _iload_iload_if_icmp(frame: Frame, operand: Tuple[int, int, int, Callable[[int, int], bool]]):
+    index1, index2, target, compare = operand
+    local_variables = frame.local_variables
+    if compare(local_variables[index1], local_variables[index2]):
+        frame.pc = target
+    else:
+        frame.pc += 2
+
+
+def _iinc_goto(frame: Frame, operand: Tuple[int, int, int]):
+    index, const, target = operand
+    local_variables = frame.local_variables
+    local_variables[index] = _i32(local_variables[index] + const)
+    frame.pc = target
+
+
+def _aload_getfield(frame: Frame, operand: Tuple[int, int]):
+    index, pool_index = operand
+    slot = frame.c.resolved.get(pool_index)
+    if slot is None:
+        slot = _resolve_field(frame, pool_index)
+    obj = frame.local_variables[index]
+    try:
+        frame.stack.append(obj[slot])
+    except TypeError as e:
+        raise _null_check(obj, e, 'getfield')
+    frame.pc += 1
+
+
+_ILOAD = frozenset([0x15, *range(0x1a, 0x1e)])
+_ICONST = frozenset([*range(0x02, 0x09), 0x10, 0x11])
+_ALOAD = frozenset([0x19, *range(0x2a, 0x2e)])
+_GOTO = frozenset([0xa7, 0xc8])
+_IF_ICMP = {
+    0x9f: operator.eq,
+    0xa0: operator.ne,
+    0xa1: operator.lt,
+    0xa2: operator.ge,
+    0xa3: operator.gt,
+    0xa4: operator.le,
+}
+_ILOAD_ILOAD = {0x60: _iload_iload_iadd, 0x64: _iload_iload_isub, 0x68: _iload_iload_imul}
+_ILOAD_CONST = {0x60: _iload_const_iadd, 0x64: _iload_const_isub}
+_IF = {
+    0x99: operator.eq,
+    0x9a: operator.ne,
+    0x9b: operator.lt,
+    0x9c: operator.ge,
+    0x9d: operator.gt,
+    0x9e: operator.le,
+}
+
+
+def _match_fusion(decoded: List[Instruction], i: int) -> Optional[Tuple[str, Callable[[Frame, Any], Optional[bool]], Any, int]]:
+    '''the superinstruction starting at i: (name, handler, operand, length)'''
+    ops = [ins.opcode for ins in decoded[i:i + 3]]
+    if len(ops) == 3:
+        a, b, c = decoded[i:i + 3]
+        if ops[0] in _ILOAD and ops[1] in _ILOAD and ops[2] in _ILOAD_ILOAD:
+            handler = _ILOAD_ILOAD[ops[2]]
+            return handler.__name__[1:], handler, (a.operand, b.operand), 3
+        if ops[0] in _ILOAD and ops[1] in _ICONST and ops[2] in _ILOAD_CONST:
+            handler = _ILOAD_CONST[ops[2]]
+            return handler.__name__[1:], handler, (a.operand, b.operand), 3
+        if ops[0] in _ILOAD and ops[1] in _ICONST and ops[2] in _IF_ICMP:
+            return f'iload_const_{mnemonic(ops[2])}', _iload_const_if_icmp, (a.operand, b.operand, c.operand, _IF_ICMP[ops[2]]), 3
+        if ops[0] in _ILOAD and ops[1] in _ILOAD and ops[2] in _IF_ICMP:
+            return f'iload_iload_{mnemonic(ops[2])}', _iload_iload_if_icmp, (a.operand, b.operand, c.operand, _IF_ICMP[ops[2]]), 3
+    if len(ops) >= 2:
+        a, b = decoded[i:i + 2]
+        if ops[0] in _ILOAD and ops[1] in _IF:
+            return f'iload_{mnemonic(ops[1])}', _iload_if, (a.operand, b.operand, _IF[ops[1]]), 2
+        if ops[0] == IINC and ops[1] in _GOTO:
+            return 'iinc_goto', _iinc_goto, (*a.operand, b.operand), 2
+        if ops[0] in _ALOAD and ops[1] == 0xb4:
+            return 'aload_getfield', _aload_getfield, (a.operand, b.operand), 2
+    return None
+
+
+def fuse(code: Code) -> Dict[str, int]:
+    '''
+    peephole pass over linked instructions, replacing common sequences with superinstructions.
+    returns (and stores in Code.fusions) how many times each superinstruction was used.
+    '''
+    decoded = code.decoded
+    instructions = list(code.instructions)
+    fusions: Dict[str, int] = {}
+    # a sequence is not fused across the bounds of a try block or into a handler,
+    # so an exception is raised at an instruction the exception table covers
+    bounds = {pc for e in code.exception_table for pc in (e.start_pc, e.end_pc, e.handler_pc)}
+    i = 0
+    while i < len(decoded):
+        match = _match_fusion(decoded, i)
+        if match is None or bounds and any(ins.pc in bounds for ins in decoded[i + 1:i + match[3]]):
+            i += 1
+            continue
+        name, handler, operand, length = match
+        last = i + length - 1
+        if instructions[last][0] is _backedge:
+            # keep counting the loop for the compiler
+            instructions[i] = (_backedge, (handler, operand))
+        else:
+            instructions[i] = (handler, operand)
+        fusions[name] = fusions.get(name, 0) + 1
+        i += length
+    code.unfused = code.instructions
+    code.instructions = instructions
+    code.fusions = fusions
+    return fusions
+
+
+def link_code(code: Code) -> List[Tuple[Callable[[Frame, Any], Optional[bool]], Any]]:
+    '''
+    decode the method body once and bind every instruction to its handler, then fuse common sequences.
+    the result is cached on the Code. backward branches are bound to _backedge, which counts them.
+    '''
+    if code.instructions is None:
+        code.decoded = decode(code.code)
+        instructions = []
+        for i, ins in enumerate(code.decoded):
+            if ins.opcode not in HANDLERS:
+                instructions.append((_unknown, ins))
+            elif ins.opcode in BRANCHES and ins.operand <= i:
+                instructions.append((_backedge, (HANDLERS[ins.opcode], ins.operand)))
+            elif ins.opcode == 0xb6:
+                instructions.append((_invokevirtual, InlineCache(ins.operand)))
+            elif ins.opcode == 0xb9:
+                instructions.append((_invokeinterface, InlineCache(ins.operand[0])))
+            elif ins.opcode == 0xb2 or ins.opcode == 0xb3:
+                instructions.append((HANDLERS[ins.opcode], StaticField(ins.operand)))
+            elif ins.opcode == 0xc0 or ins.opcode == 0xc1:
+                instructions.append((HANDLERS[ins.opcode], TypeCheck(ins.operand)))
+            elif ins.opcode == 0x58 or ins.opcode == 0x5c:
+                instructions.append(_link_category2(code.decoded, i))
             else:
-                raise Exception(f'unknown opcode {opcode}')
+                instructions.append((HANDLERS[ins.opcode], ins.operand))
+        code.instructions = instructions
+        fuse(code)
+    return code.instructions
+
+
+def link_classes(cfs: Mapping[str, ClassFile]) -> int:
+    '''
+    load every class of cfs, lay out its static fields and link all its methods ahead of time.
+    returns the number of methods linked. the classes are initialized on first use as usual.
+    '''
+    linked = 0
+    for name in list(cfs):
+        link_statics(cfs[name])
+        for m in cfs[name].methods:
+            code = find_code(m, cfs, name)
+            if code is not None:
+                link_code(code)
+                linked += 1
+    return linked
+
+
+def fusion_report(cfs: Mapping[str, ClassFile]) -> Dict[str, Dict[str, int]]:
+    '''superinstructions used per method, for the methods linked so far'''
+    report = {}
+    for name in cfs:
+        c = cfs[name]
+        for m in c.methods:
+            code = m.code
+            if code is not None and code.fusions:
+                report[f'{name}.{m.name}{m.descriptor}'] = code.fusions
+    return report
+
+
+def execute(code: Code, cfs: Mapping[str, ClassFile], _class: str, local_variables, heap: Optional[Heap] = None,
+            tracer: Optional[Tracer] = None, max_depth: int = DEFAULT_MAX_DEPTH,
+            compile_threshold: Optional[int] = DEFAULT_COMPILE_THRESHOLD):
+    '''
+    run a method body of _class until it returns.
+    with a tracer, every instruction executed (including callees) is recorded to it;
+    without one the untraced loop runs, which has no per-instruction overhead for tracing.
+    calls deeper than max_depth raise StackOverflowError.
+    methods run more than compile_threshold times are compiled, see compiler.
+    '''
+    method = next((m for m in cfs[_class].methods if m.code is code), None)
+    if method is None:
+        raise Exception(f'code is not a method of {_class}')
+    target = resolve_method(cfs, _class, method.name, method.descriptor, not method.is_static)
+    thread = Thread(cfs, heap, max_depth, tracer, compile_threshold)
+    initialize(thread, target.c)
+    return thread.run(Frame(thread, target, local_variables, None))
+
+
+def run_main(cfs: Mapping[str, ClassFile], _class: str, args: List[str], heap: Optional[Heap] = None):
+    '''run public static void main(String[] args) of _class'''
+    thread = Thread(cfs, heap)
+    argv = thread.heap.new_array('[Ljava/lang/String;', len(args))
+    argv[:] = args
+    thread.invoke(resolve_method(cfs, _class, 'main', '([Ljava/lang/String;)V', False), [argv])
+
+
+def _push(thread: Thread, frame: Frame):
+    if len(thread.frames) + thread.compiled_depth >= thread.max_depth:
+        raise StackOverflowError(f'{frame.method.label}: call depth exceeds {thread.max_depth}')
+    thread.frames.append(frame)
+
+
+def _unwind(thread: Thread, base: int):
+    '''drop the frames above base after an exception, releasing the monitors of synchronized methods'''
+    frames = thread.frames
+    for frame in reversed(frames[base:]):
+        if frame.monitor is not None:
+            monitor.exit(thread.heap.monitors, frame.monitor, thread)
+    del frames[base:]
+
+
+def _catch(thread: Thread, error: Exception, base: int) -> Optional[Frame]:
+    '''
+    the frame which handles error: the innermost frame above base with a handler covering its
+    current instruction, which continues at the handler with the exception on its stack.
+    the frames above it are dropped. None if no frame handles error.
+    '''
+    class_name = exceptions.java_class(error)
+    if class_name is None:
+        return None
+    layout = None
+    frames = thread.frames
+    for i in range(len(frames) - 1, base - 1, -1):
+        frame = frames[i]
+        code = frame.method.code
+        if code.exception_table:
+            if layout is None:
+                layout = layout_of(thread.cfs, class_name)
+            handler = (code.handlers or exceptions.index_handlers(frame.c, code)).find(frame.pc - 1, layout)
+            if handler is not None:
+                throwable = exceptions.throwable_of(thread.heap, thread.cfs, error, class_name)
+                _unwind(thread, i + 1)
+                frame.stack.clear()
+                frame.stack.append(throwable)
+                frame.pc = handler
+                return frame
+    return None
+
+
+def _run(thread: Thread, frame: Frame) -> Any:
+    frames = thread.frames
+    base = len(frames)
+    _push(thread, frame)
+    instructions = frame.instructions
+    yieldable = thread.yieldable
+    thread.yieldable = False  # a nested run can not be suspended
+    try:
+        while True:
+            try:
+                while True:
+                    handler, operand = instructions[frame.pc]
+                    frame.pc += 1
+                    if handler(frame, operand):
+                        if len(frames) == base:
+                            return frame.result
+                        frame = frames[-1]
+                        instructions = frame.instructions
+            except Exception as e:
+                frame = _catch(thread, e, base)
+                if frame is None:
+                    raise
+                instructions = frame.instructions
+    except BaseException:
+        _unwind(thread, base)
+        raise
+    finally:
+        thread.yieldable = yieldable
+
+
+def _run_slice(thread: Thread, budget: int) -> int:
+    '''
+    run a thread of a scheduler for at most budget instructions, until it finishes (no frames left)
+    or a handler sets thread.switch (it blocked or yielded). returns the instructions left of the budget.
+    '''
+    frames = thread.frames
+    frame = frames[-1]
+    instructions = frame.instructions
+    thread.yieldable = True
+    try:
+        while budget:
+            try:
+                while budget:
+                    budget -= 1
+                    handler, operand = instructions[frame.pc]
+                    frame.pc += 1
+                    if handler(frame, operand):
+                        if thread.switch:
+                            thread.switch = False
+                            return budget
+                        if not frames:
+                            return budget
+                        frame = frames[-1]
+                        instructions = frame.instructions
+            except Exception as e:
+                frame = _catch(thread, e, 0)
+                if frame is None:
+                    raise
+                instructions = frame.instructions
+    except BaseException:
+        _unwind(thread, 0)
+        raise
+    finally:
+        thread.yieldable = False
+    return budget
+
+
+def _run_traced(thread: Thread, frame: Frame) -> Any:
+    frames = thread.frames
+    base = len(frames)
+    _push(thread, frame)
+    tracer = thread.tracer
+    record = tracer.record
+    # every instruction is recorded, so superinstructions are not used
+    instructions = frame.method.code.unfused
+    decoded = frame.method.code.decoded
+    method_id = tracer.method_id(frame.method.label)
+    try:
+        while True:
+            try:
+                while True:
+                    ins = decoded[frame.pc]
+                    record(method_id, ins.pc, ins.opcode, len(frame.stack))
+                    handler, operand = instructions[frame.pc]
+                    frame.pc += 1
+                    if handler(frame, operand):
+                        if len(frames) == base:
+                            return frame.result
+                        frame = frames[-1]
+                        instructions = frame.method.code.unfused
+                        decoded = frame.method.code.decoded
+                        method_id = tracer.method_id(frame.method.label)
+            except Exception as e:
+                frame = _catch(thread, e, base)
+                if frame is None:
+                    raise
+                instructions = frame.method.code.unfused
+                decoded = frame.method.code.decoded
+                method_id = tracer.method_id(frame.method.label)
+    except BaseException:
+        _unwind(thread, base)
+        raise
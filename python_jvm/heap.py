@@ -0,0 +1,275 @@
+'''
+object allocation and garbage collection.
+
+the instance fields of a class (including the fields of its superclasses) get fixed slot
+indexes once per class, and an object is a list of its field values in that order.
+references on the operand stack and in fields are the objects themselves.
+an array of a primitive type keeps its elements in a typed compact buffer (array.array),
+an array of references is a list.
+
+the Heap keeps every object it allocated until a mark and sweep collection finds it unreachable
+from the roots (locals and operand stacks of the frames of its threads, and registered root containers).
+'''
+import logging
+import time
+from array import array
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+from python_jvm.class_parser import ClassFile
+
+# default value of a field by the first character of its descriptor
+_DEFAULTS = {'B': 0, 'C': 0, 'I': 0, 'J': 0, 'S': 0, 'Z': 0, 'F': 0.0, 'D': 0.0}
+# accounted size of an object in bytes, as on a 64bit JVM
+_OBJECT_HEADER = 16
+_FIELD_SIZE = 8
+# array.array typecodes of primitive arrays by the descriptor of their elements
+ARRAY_TYPECODES = {'Z': 'B', 'B': 'b', 'C': 'H', 'S': 'h', 'I': 'i', 'J': 'q', 'F': 'f', 'D': 'd'}
+_ELEMENT_DESCRIPTORS = {t: d for d, t in ARRAY_TYPECODES.items()}
+DEFAULT_MAX_BYTES = 64 << 20
+_INITIAL_THRESHOLD = 1 << 20
+
+
+class Layout:
+    '''
+    slot indexes of the instance fields of a class.
+    superclass fields come first, so a slot index is valid for every subclass.
+    '''
+    __slots__ = ('name', 'super', 'names', 'slots', 'defaults', 'size')
+
+    def __init__(self, name: str, super: Optional['Layout'], fields: List[Tuple[str, str]]):
+        self.name = name
+        self.super = super
+        self.names: Tuple[str, ...] = (super.names if super else ()) + tuple(n for n, _ in fields)
+        # a field hides a superclass field of the same name
+        self.slots: Dict[str, int] = dict(super.slots) if super else {}
+        base = len(super.names) if super else 0
+        for i, (n, _) in enumerate(fields):
+            self.slots[n] = base + i
+        self.defaults: Tuple[Any, ...] = (super.defaults if super else ()) + tuple(_DEFAULTS.get(d[0]) for _, d in fields)
+        self.size = _OBJECT_HEADER + _FIELD_SIZE * len(self.names)
+
+    def __repr__(self):
+        return f'Layout({self.name}, {self.names})'
+
+
+class JavaObject(list):
+    '''an instance, its field values indexed by Layout.slots'''
+    __slots__ = ('layout',)
+    # identity semantics like java references, not list equality
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+    def __init__(self, layout: Layout):
+        super().__init__(layout.defaults)
+        self.layout = layout
+
+    @property
+    def class_name(self) -> str:
+        return self.layout.name
+
+    @property
+    def size(self) -> int:
+        return self.layout.size
+
+    def get(self, name: str) -> Any:
+        return self[self.layout.slots[name]]
+
+    def __repr__(self):
+        fields = ', '.join(f'{n}={v!r}' if not isinstance(v, JavaObject) else f'{n}=<{v.class_name}>'
+                           for n, v in zip(self.layout.names, self))
+        return f'{self.layout.name}({fields})'
+
+
+class PrimitiveArray(array):
+    '''an array of a primitive type, e.g. [I is an array('i')'''
+    __slots__ = ()
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+    @property
+    def descriptor(self) -> str:
+        return '[' + _ELEMENT_DESCRIPTORS[self.typecode]
+
+    @property
+    def size(self) -> int:
+        return _OBJECT_HEADER + self.itemsize * len(self)
+
+    def __repr__(self):
+        return f'{self.descriptor}{self.tolist()}'
+
+
+class ReferenceArray(list):
+    '''an array of references (objects or arrays), descriptor is e.g. [Ljava/lang/String; or [[I'''
+    __slots__ = ('descriptor',)
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+    def __init__(self, descriptor: str, length: int):
+        super().__init__([None] * length)
+        self.descriptor = descriptor
+
+    @property
+    def size(self) -> int:
+        return _OBJECT_HEADER + _FIELD_SIZE * len(self)
+
+    def __repr__(self):
+        return f'{self.descriptor}{list.__repr__(self)}'
+
+
+JavaArray = Union[PrimitiveArray, ReferenceArray]
+
+
+class Reference:
+    '''
+    a value of the vm which is not allocated from a Heap but holds references to objects,
+    e.g. a lambda (see executer). a collection marks what references() yields.
+    '''
+    __slots__ = ()
+
+    def references(self) -> Iterable[Any]:
+        return ()
+
+
+# classes implemented by the vm, e.g. java/lang/Thread (see scheduler)
+BUILTIN_LAYOUTS: Dict[str, Layout] = {}
+# the implicit root of every class when java/lang/Object is not loaded
+_OBJECT = 'java/lang/Object'
+_OBJECT_LAYOUT = Layout(_OBJECT, None, [])
+
+
+def layout_of(cfs: Mapping[str, ClassFile], class_name: str) -> Layout:
+    '''the layout of class_name, built on first use and cached on the ClassFile'''
+    builtin = BUILTIN_LAYOUTS.get(class_name)
+    if builtin is not None:
+        return builtin
+    if class_name == _OBJECT and class_name not in cfs:
+        return _OBJECT_LAYOUT
+    c = cfs[class_name]
+    if c.layout is None:
+        super_layout = None
+        if c.super_name is not None:
+            if c.super_name in BUILTIN_LAYOUTS or c.super_name in cfs or c.super_name == _OBJECT:
+                super_layout = layout_of(cfs, c.super_name)
+            else:
+                logging.warning(f'superclass {c.super_name} of {class_name} is not loaded')
+        c.layout = Layout(class_name, super_layout, [(f.name, f.descriptor) for f in c.fields if not f.is_static])
+    return c.layout
+
+
+class OutOfMemoryError(Exception):
+    pass
+
+
+class NegativeArraySizeError(Exception):
+    pass
+
+
+# values a collection follows
+_MARKED = (JavaObject, PrimitiveArray, ReferenceArray, Reference)
+
+
+@dataclass
+class GCStats:
+    collections: int = 0
+    pause_total: float = 0.0  # seconds
+    pause_max: float = 0.0
+    last_pause: float = 0.0
+    objects_freed: int = 0  # over all collections
+    bytes_freed: int = 0
+    objects_live: int = 0  # after the last collection
+    bytes_live: int = 0
+
+
+class Heap:
+    '''
+    allocates objects for the Threads sharing it.
+    a collection runs when the live bytes would pass threshold, which then grows to twice
+    the bytes surviving (at most max_bytes). if an allocation still does not fit in max_bytes,
+    OutOfMemoryError is raised.
+    '''
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.threshold = min(max_bytes, _INITIAL_THRESHOLD)
+        self.objects: List[Union[JavaObject, JavaArray]] = []
+        self.bytes_live = 0  # including garbage not collected yet
+        self.allocated = 0  # objects allocated so far
+        self.threads: 'weakref.WeakSet[Any]' = weakref.WeakSet()  # executer.Thread, registered by the thread
+        self.roots: List[Iterable[Any]] = []  # other containers of references, e.g. static fields
+        self.monitors: Dict[Any, Any] = {}  # object -> monitor.Monitor, while it is in use
+        self.stats = GCStats()
+
+    def _reserve(self, size: int, name: str):
+        if self.bytes_live + size > self.threshold:
+            self.collect()
+            if self.bytes_live + size > self.max_bytes:
+                raise OutOfMemoryError(f'{name}: {self.bytes_live} bytes live, heap is {self.max_bytes} bytes')
+            self.threshold = min(self.max_bytes, max(self.threshold, 2 * self.bytes_live))
+        self.bytes_live += size
+        self.allocated += 1
+
+    def new(self, layout: Layout) -> JavaObject:
+        self._reserve(layout.size, layout.name)
+        obj = JavaObject(layout)
+        self.objects.append(obj)
+        return obj
+
+    def new_array(self, descriptor: str, length: int) -> JavaArray:
+        '''an array of length default values (0, 0.0 or null), descriptor is its type, e.g. [I'''
+        if length < 0:
+            raise NegativeArraySizeError(f'{descriptor}: {length}')
+        typecode = ARRAY_TYPECODES.get(descriptor[1])
+        if typecode is None:
+            self._reserve(_OBJECT_HEADER + _FIELD_SIZE * length, descriptor)
+            obj: JavaArray = ReferenceArray(descriptor, length)
+        else:
+            obj = PrimitiveArray(typecode)
+            data = length * obj.itemsize
+            self._reserve(_OBJECT_HEADER + data, descriptor)
+            obj.frombytes(bytes(data))
+        self.objects.append(obj)
+        return obj
+
+    def _root_values(self) -> Iterator[Any]:
+        for thread in self.threads:
+            for frame in thread.frames:
+                yield from frame.local_variables
+                yield from frame.stack
+        for root in self.roots:
+            yield from root
+
+    def collect(self) -> GCStats:
+        '''mark everything reachable from the roots, and drop the rest'''
+        start = time.perf_counter()
+        marked = set()
+        pending = [v for v in self._root_values() if isinstance(v, _MARKED)]
+        while pending:
+            obj = pending.pop()
+            if id(obj) in marked:
+                continue
+            marked.add(id(obj))
+            if obj.__class__ is PrimitiveArray:
+                continue
+            values = obj.references() if isinstance(obj, Reference) else obj
+            pending.extend(v for v in values if isinstance(v, _MARKED))
+
+        live = [obj for obj in self.objects if id(obj) in marked]
+        bytes_live = sum(obj.size for obj in live)
+        stats = self.stats
+        stats.objects_freed += len(self.objects) - len(live)
+        stats.bytes_freed += self.bytes_live - bytes_live
+        self.objects = live
+        self.bytes_live = stats.bytes_live = bytes_live
+        stats.objects_live = len(live)
+
+        pause = time.perf_counter() - start
+        stats.collections += 1
+        stats.last_pause = pause
+        stats.pause_total += pause
+        stats.pause_max = max(stats.pause_max, pause)
+        logging.debug(f'gc: {len(live)} objects, {bytes_live} bytes live, {pause * 1000:.3f}ms')
+        return stats
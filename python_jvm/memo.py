@@ -0,0 +1,180 @@
+'''
+memoization of pure static methods.
+
+a method is pure when it is static, takes and returns primitives, does not touch objects or
+static fields, and only calls pure static methods. memoize caches the results of such a method
+by its arguments; the interpreter then skips calls whose arguments are in the cache.
+
+    cache = memoize(cfs, 'HelloWorld', 'fibonacci', '(I)I')
+    ...
+    print(cache.hits, cache.misses)
+'''
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from python_jvm import natives
+from python_jvm.class_parser import CONSTANT_Class, CONSTANT_Methodref, CONSTANT_NameAndType, ClassFile, Code
+from python_jvm.decoder import mnemonic
+from python_jvm.executer import find_method, link_code
+from python_jvm.util import parse_method_descriptor
+
+_PRIMITIVES = frozenset('BCDFIJSZ')
+# instructions reading or writing objects, arrays or static fields, or calling non static methods
+_IMPURE = frozenset([
+    0x2e, 0x2f, 0x30, 0x31, 0x32, 0x33, 0x34, 0x35,  # <x>aload
+    0x4f, 0x50, 0x51, 0x52, 0x53, 0x54, 0x55, 0x56,  # <x>astore
+    0xb2, 0xb3, 0xb4, 0xb5,  # getstatic putstatic getfield putfield
+    0xb6, 0xb7, 0xb9, 0xba,  # invokevirtual invokespecial invokeinterface invokedynamic
+    0xbb, 0xbc, 0xbd, 0xbe, 0xbf, 0xc0, 0xc1, 0xc2, 0xc3, 0xc5,  # new ... multianewarray
+])
+_INVOKESTATIC = 0xb8
+
+
+class MethodCache:
+    '''bounded LRU cache of the results of one method, keyed by the argument tuple'''
+    __slots__ = ('label', 'maxsize', 'entries', 'hits', 'misses')
+
+    def __init__(self, label: str, maxsize: int = 1024):
+        self.label = label
+        self.maxsize = maxsize
+        self.entries: 'OrderedDict[Tuple[Any, ...], Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Any, ...], default: Any = None) -> Any:
+        entries = self.entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: Tuple[Any, ...], value: Any):
+        entries = self.entries
+        entries[key] = value
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __repr__(self):
+        return f'MethodCache({self.label}, {len(self.entries)}/{self.maxsize}, hits={self.hits}, misses={self.misses})'
+
+
+def _primitive_signature(descriptor: str) -> bool:
+    params, return_type = parse_method_descriptor(descriptor)
+    return all(p in _PRIMITIVES for p in params) and return_type in _PRIMITIVES
+
+
+def _callee(c: ClassFile, pool_index: int) -> Tuple[str, str, str]:
+    cp = c.constant_pool
+    ref: CONSTANT_Methodref = cp[pool_index]
+    cp_class: CONSTANT_Class = cp[ref.class_index]
+    cp_name_type: CONSTANT_NameAndType = cp[ref.name_and_type_index]
+    return (cp[cp_class.name_index].info.decode(), cp[cp_name_type.name_index].info.decode(),
+            cp[cp_name_type.descriptor_index].info.decode())
+
+
+def is_pure(cfs: Mapping[str, ClassFile], _class: str, name: str, descriptor: str,
+            _results: Optional[Dict[Tuple[str, str, str], bool]] = None) -> bool:
+    '''
+    static purity analysis of a method and the static methods it calls.
+    _results caches the results across calls, it only holds final results.
+    '''
+    results = _results if _results is not None else {}
+    return _is_pure(cfs, (_class, name, descriptor), results, {}, [])[0]
+
+
+_Key = Tuple[str, str, str]
+
+
+def _is_pure(cfs: Mapping[str, ClassFile], key: _Key, results: Dict[_Key, bool], active: Dict[_Key, int],
+             provisional: List[_Key]) -> Tuple[bool, int]:
+    '''
+    (purity of key, depth of the shallowest active method the result depends on).
+    a recursive call to a method still being analyzed (in active, by depth) is assumed pure. a
+    method found pure under such an assumption is provisional until the analysis of the method
+    assumed returns: its result is then final if that method is pure, and dropped otherwise.
+    impurity never depends on an assumption, it is final at once.
+    '''
+    if key in results:
+        return results[key], len(active)
+    if key in active:
+        return True, active[key]
+    depth = active[key] = len(active)
+    start = len(provisional)
+    pure, low = _analyze(cfs, key, results, active, provisional)
+    del active[key]
+    if not pure or low >= depth:
+        # final, and so are the methods provisional on it
+        for k in provisional[start:]:
+            if pure:
+                results[k] = True
+        del provisional[start:]
+        results[key] = pure
+        return pure, depth
+    provisional.append(key)
+    return True, low
+
+
+def _analyze(cfs: Mapping[str, ClassFile], key: _Key, results: Dict[_Key, bool], active: Dict[_Key, int],
+             provisional: List[_Key]) -> Tuple[bool, int]:
+    _class, name, descriptor = key
+    label = f'{_class}.{name}{descriptor}'
+    low = len(active)
+    if _class not in cfs:
+        return natives.is_pure(_class, name, descriptor), low
+    method = find_method(cfs, _class, name, descriptor)
+    if method is None or method.code is None or not method.is_static or not _primitive_signature(descriptor):
+        logging.debug(f'{label} is not pure: signature')
+        return False, low
+    c = cfs[_class]
+    link_code(method.code)
+    for ins in method.code.decoded:
+        if ins.opcode in _IMPURE:
+            logging.debug(f'{label} is not pure: {mnemonic(ins.opcode)} at {ins.pc}')
+            return False, low
+        if ins.opcode == _INVOKESTATIC:
+            pure, callee_low = _is_pure(cfs, _callee(c, ins.operand), results, active, provisional)
+            if not pure:
+                logging.debug(f'{label} is not pure: calls {_callee(c, ins.operand)}')
+                return False, low
+            low = min(low, callee_low)
+    return True, low
+
+
+def _install(code: Code, label: str, maxsize: int) -> MethodCache:
+    if code.memo is None:
+        code.memo = MethodCache(label, maxsize)
+        code.compiled = False
+    return code.memo
+
+
+def memoize(cfs: Mapping[str, ClassFile], _class: str, name: str, descriptor: str, maxsize: int = 1024) -> MethodCache:
+    '''
+    cache the results of a pure method, raises an Exception if it is not pure.
+    a memoized method is interpreted, it is not compiled (see compiler).
+    '''
+    if not is_pure(cfs, _class, name, descriptor):
+        raise Exception(f'{_class}.{name}{descriptor} is not pure')
+    return _install(find_method(cfs, _class, name, descriptor).code, f'{_class}.{name}{descriptor}', maxsize)
+
+
+def memoize_pure_methods(cfs: Mapping[str, ClassFile], maxsize: int = 1024) -> Dict[str, MethodCache]:
+    '''memoize every pure method of the classes in cfs (all of them are loaded), the others are skipped'''
+    caches = {}
+    results: Dict[_Key, bool] = {}
+    for class_name in list(cfs):
+        for m in cfs[class_name].methods:
+            if is_pure(cfs, class_name, m.name, m.descriptor, results):
+                label = f'{class_name}.{m.name}{m.descriptor}'
+                caches[label] = _install(m.code, label, maxsize)
+    return caches
+
+
+def unmemoize(cfs: Mapping[str, ClassFile], _class: str, name: str, descriptor: str):
+    code = find_method(cfs, _class, name, descriptor).code
+    code.memo = None
+    code.compiled = None
@@ -0,0 +1,141 @@
+'''
+object monitors: synchronized, monitorenter/monitorexit, wait and notify.
+
+a monitor is created in Heap.monitors on the first monitorenter of an object and removed again
+when no thread owns it or waits for it. it has an owner thread and a recursion count.
+a released monitor is handed over to the first thread waiting to enter it, so threads enter
+in arrival order. only threads run by a scheduler (see scheduler) can block; a thread that
+would block outside of a scheduler raises DeadlockError instead.
+'''
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+
+class IllegalMonitorStateError(Exception):
+    pass
+
+
+class DeadlockError(Exception):
+    pass
+
+
+class Monitor:
+    __slots__ = ('owner', 'count', 'entrants', 'waiters')
+
+    def __init__(self):
+        self.owner: Any = None  # executer.Thread
+        self.count = 0
+        # (thread, count to restore) waiting to enter, and waiting to be notified
+        self.entrants: Deque[Tuple[Any, int]] = deque()
+        self.waiters: Deque[Tuple[Any, int]] = deque()
+
+    def __repr__(self):
+        return f'Monitor(owner={self.owner}, count={self.count}, entrants={len(self.entrants)}, waiters={len(self.waiters)})'
+
+
+def enter(monitors: Dict[Any, Monitor], obj: Any, thread: Any) -> bool:
+    '''acquire the monitor of obj for thread, False if another thread owns it'''
+    if obj is None:
+        raise Exception('monitorenter on null')
+    m = monitors.get(obj)
+    if m is None:
+        m = monitors[obj] = Monitor()
+    if m.owner is None:
+        m.owner = thread
+        m.count = 1
+        return True
+    if m.owner is thread:
+        m.count += 1
+        return True
+    return False
+
+
+def block(monitors: Dict[Any, Monitor], obj: Any, thread: Any, count: int = 1):
+    '''
+    queue thread to enter the monitor of obj (after enter returned False) and park it.
+    the thread owns the monitor with count when it runs again.
+    '''
+    if not thread.yieldable:
+        raise DeadlockError(f'monitor of {obj!r} is owned by another thread')
+    m = monitors[obj]
+    m.entrants.append((thread, count))
+    thread.scheduler.park(thread, m)
+
+
+def _release(monitors: Dict[Any, Monitor], obj: Any, m: Monitor):
+    if m.entrants:
+        thread, count = m.entrants.popleft()
+        m.owner = thread
+        m.count = count
+        thread.scheduler.wake(thread)
+    else:
+        m.owner = None
+        m.count = 0
+        if not m.waiters:
+            del monitors[obj]
+
+
+def exit(monitors: Dict[Any, Monitor], obj: Any, thread: Any):
+    m = monitors.get(obj)
+    if m is None or m.owner is not thread:
+        raise IllegalMonitorStateError(f'monitor of {obj!r} is not owned by the current thread')
+    m.count -= 1
+    if m.count == 0:
+        _release(monitors, obj, m)
+
+
+def _owned(monitors: Dict[Any, Monitor], obj: Any, thread: Any) -> Monitor:
+    m = monitors.get(obj)
+    if m is None or m.owner is not thread:
+        raise IllegalMonitorStateError(f'monitor of {obj!r} is not owned by the current thread')
+    return m
+
+
+def wait(monitors: Dict[Any, Monitor], obj: Any, thread: Any, timeout: int = 0):
+    '''release the monitor of obj entirely and park thread until it is notified (or timeout ms passed)'''
+    m = _owned(monitors, obj, thread)
+    if not thread.yieldable:
+        if timeout > 0:
+            return  # nobody else can notify, the wait times out
+        raise DeadlockError(f'wait on {obj!r} would never be notified')
+    m.waiters.append((thread, m.count))
+    _release(monitors, obj, m)
+    thread.scheduler.park(thread, m, timeout, obj)
+
+
+def notify(monitors: Dict[Any, Monitor], obj: Any, thread: Any, all: bool = False):
+    '''move one (or all) waiting threads to enter the monitor when it is released'''
+    m = _owned(monitors, obj, thread)
+    while m.waiters:
+        m.entrants.append(m.waiters.popleft())
+        if not all:
+            break
+
+
+def timeout(monitors: Dict[Any, Monitor], obj: Any, thread: Any):
+    '''the timed wait of thread on obj expired: it enters the monitor again unless it was notified'''
+    m = monitors.get(obj)
+    if m is None:
+        return
+    for i, (waiter, count) in enumerate(m.waiters):
+        if waiter is thread:
+            del m.waiters[i]
+            if m.owner is None:
+                m.owner = thread
+                m.count = count
+                thread.scheduler.wake(thread)
+            else:
+                m.entrants.append((thread, count))
+            return
+
+
+def abandon(monitors: Dict[Any, Monitor], thread: Any):
+    '''release every monitor thread owns or waits for, when it is stopped (see aio)'''
+    for obj, m in list(monitors.items()):
+        m.entrants = deque(e for e in m.entrants if e[0] is not thread)
+        m.waiters = deque(w for w in m.waiters if w[0] is not thread)
+        if m.owner is thread:
+            m.count = 1
+            exit(monitors, obj, thread)
+        elif m.owner is None and not m.entrants and not m.waiters:
+            del monitors[obj]
@@ -0,0 +1,694 @@
+'''
+native implementations of jdk methods.
+
+a native is declared with the full descriptor of the method it implements, and is called with
+the java arguments (starting with the object ref for instance methods) as positional arguments:
+
+    @native('java/lang/Math', 'max(II)I', pure=True)
+    def _max(a, b):
+        return max(a, b)
+
+pure natives have no side effects, memo may cache methods calling them.
+natives which need the calling thread (e.g. PrintStream.println) are intrinsics, see executer.
+
+System.out and System.err gather what is printed in a buffer, which is written out when it holds
+BUFFER_SIZE characters, on flush() and at exit.
+
+a String is a python str. string literals (ldc) are interned, a StringBuilder gathers the
+appended pieces and joins them once. concat_formatter builds the function behind a string
+concatenation call site (invokedynamic makeConcatWithConstants, see executer).
+'''
+import atexit
+import decimal
+import math
+import re
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO
+from python_jvm.heap import ARRAY_TYPECODES, JavaObject, PrimitiveArray, ReferenceArray
+from python_jvm.util import parse_method_descriptor
+
+BUFFER_SIZE = 1 << 16
+
+
+class NumberFormatError(Exception):
+    pass
+
+
+class IndexOutOfBoundsError(Exception):
+    pass
+
+
+class ArrayIndexOutOfBoundsError(IndexOutOfBoundsError):
+    pass
+
+
+class ArrayStoreError(Exception):
+    pass
+
+
+class ClassCastError(Exception):
+    pass
+
+
+class NullPointerError(Exception):
+    pass
+
+
+class IllegalArgumentError(Exception):
+    pass
+
+
+class IntegerOverflowError(Exception):
+    pass
+
+
+class Native:
+    __slots__ = ('label', 'fn', 'arg_count', 'static', 'pure')
+
+    def __init__(self, label: str, fn: Callable[..., Any], arg_count: int, static: bool, pure: bool):
+        self.label = label
+        self.fn = fn
+        self.arg_count = arg_count  # including the object ref
+        self.static = static
+        self.pure = pure
+
+    def __repr__(self):
+        return f'Native({self.label})'
+
+
+# class -> name + descriptor -> native
+natives: Dict[str, Dict[str, Native]] = {}
+
+
+def register(_class: str, signature: str, fn: Callable[..., Any], static: bool = True, pure: bool = False) -> Native:
+    '''declare fn as the implementation of _class.signature, e.g. ('java/lang/Math', 'abs(I)I')'''
+    params, _ = parse_method_descriptor(signature[signature.index('('):])
+    n = natives.setdefault(_class, {})[signature] = Native(f'{_class}.{signature}', fn, len(params) + (0 if static else 1), static, pure)
+    return n
+
+
+def native(_class: str, signature: str, static: bool = True, pure: bool = False) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    '''decorator form of register'''
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        register(_class, signature, fn, static, pure)
+        return fn
+    return decorator
+
+
+def find_native(_class: str, name: str, descriptor: str) -> Optional[Native]:
+    return natives.get(_class, {}).get(name + descriptor)
+
+
+def is_pure(_class: str, name: str, descriptor: str) -> bool:
+    n = find_native(_class, name, descriptor)
+    return n is not None and n.pure
+
+
+def _i32(value: int) -> int:
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def _i64(value: int) -> int:
+    return ((value + 0x8000000000000000) & 0xFFFFFFFFFFFFFFFF) - 0x8000000000000000
+
+
+# print streams
+
+class PrintStream:
+    '''a buffered java.io.PrintStream over the python text stream returned by target'''
+    __slots__ = ('name', 'target', 'pending', 'size')
+
+    def __init__(self, name: str, target: Callable[[], TextIO]):
+        self.name = name
+        self.target = target  # looked up on every flush, so a redirected sys.stdout is followed
+        self.pending: List[str] = []
+        self.size = 0
+
+    def write(self, text: str):
+        self.pending.append(text)
+        self.size += len(text)
+        if self.size >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            text = ''.join(self.pending)
+            self.pending.clear()
+            self.size = 0
+            out = self.target()
+            out.write(text)
+            out.flush()
+
+    def __repr__(self):
+        return f'PrintStream({self.name})'
+
+
+out = PrintStream('System.out', lambda: sys.stdout)
+err = PrintStream('System.err', lambda: sys.stderr)
+# static fields implemented by the vm, class -> name -> value
+fields: Dict[str, Dict[str, Any]] = {'java/lang/System': {'out': out, 'err': err}}
+
+
+def flush():
+    '''write out what System.out and System.err buffered'''
+    out.flush()
+    err.flush()
+
+
+atexit.register(flush)
+register('java/io/PrintStream', 'flush()V', PrintStream.flush, static=False)
+
+
+# string conversion
+
+def _double_to_string(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    if value == 0 or 1e-3 <= abs(value) < 1e7:
+        return repr(float(value))
+    sign, digits, exponent = decimal.Decimal(repr(float(value))).as_tuple()
+    ds = ''.join(map(str, digits)).rstrip('0') or '0'
+    return f"{'-' if sign else ''}{ds[0]}.{ds[1:] or '0'}E{len(digits) + exponent - 1}"
+
+
+def _float_to_string(value: float) -> str:
+    '''the shortest decimal which reads back to the same float (32bit)'''
+    if value != value or math.isinf(value) or value == 0:
+        return _double_to_string(value)
+    single = struct.pack('>f', value)
+    for precision in range(1, 10):
+        candidate = float(f'{value:.{precision}g}')
+        if struct.pack('>f', candidate) == single:
+            return _double_to_string(candidate)
+    return _double_to_string(value)
+
+
+def to_string(value: Any, descriptor: str = 'Ljava/lang/Object;') -> str:
+    '''String.valueOf of a java value of type descriptor, an object as by Object.toString (see executer.string_of)'''
+    if value is None:
+        return 'null'
+    t = descriptor[0]
+    if t == 'Z' or isinstance(value, bool):
+        return 'true' if value else 'false'
+    if t == 'C':
+        return chr(value)
+    if t == 'F':
+        return _float_to_string(value)
+    if isinstance(value, float):
+        return _double_to_string(value)
+    if isinstance(value, JavaObject):
+        return f"{value.class_name.replace('/', '.')}@{id(value) & 0xFFFFFFFF:x}"
+    if isinstance(value, StringBuilder):
+        return value.toString()
+    if isinstance(value, (PrimitiveArray, ReferenceArray)):
+        return f'{value.descriptor}@{id(value) & 0xFFFFFFFF:x}'
+    return str(value)
+
+
+_SPECIFIER = re.compile(r'%(\d+\$)?([-#+ 0,(]*)(\d+)?(\.\d+)?([a-zA-Z%])')
+
+
+def java_format(fmt: str, args: Sequence[Any], to_str: Callable[[Any], str] = to_string) -> str:
+    '''String.format with the common conversions: s d x o c b f e g n %. %s converts by to_str'''
+    position = iter(range(len(args)))
+
+    def convert(m: 're.Match[str]') -> str:
+        index, flags, width, precision, conversion = m.groups()
+        if conversion == 'n':
+            return '\n'
+        if conversion == '%':
+            return '%'
+        i = int(index[:-1]) - 1 if index else next(position)
+        value = args[i]
+        lower = conversion.lower()
+        align = '<' if '-' in flags else '>'
+        width = width or ''
+        if lower in 'sbc':
+            if lower == 's':
+                text = to_str(value)
+            elif lower == 'b':
+                text = 'false' if value is None or value is False or value == 0 else 'true'  # a boolean is an int
+            else:
+                text = chr(value)
+            text = format(text, f'{align}{width}{precision or ""}')
+        else:
+            sign = '+' if '+' in flags else ' ' if ' ' in flags else ''
+            alt = '#' if '#' in flags else ''
+            zero = '0' if '0' in flags and '-' not in flags else ''
+            group = ',' if ',' in flags else ''
+            if lower in 'xo' and value < 0:
+                value &= 0xFFFFFFFF if -0x80000000 <= value else 0xFFFFFFFFFFFFFFFF
+            spec = f'{"<" if align == "<" else ""}{sign}{alt}{zero}{width}{group}{precision or ""}'
+            text = format(value, spec + ('d' if lower == 'd' else conversion))
+        return text.upper() if conversion.isupper() and lower in 'sbc' else text
+
+    return _SPECIFIER.sub(convert, fmt)
+
+
+# java.lang.System
+
+@native('java/lang/System', 'currentTimeMillis()J')
+def _current_time_millis() -> int:
+    return time.time_ns() // 1000000
+
+
+@native('java/lang/System', 'nanoTime()J')
+def _nano_time() -> int:
+    return time.perf_counter_ns()
+
+
+@native('java/lang/System', 'arraycopy(Ljava/lang/Object;ILjava/lang/Object;II)V')
+def _arraycopy(src: Any, src_pos: int, dest: Any, dest_pos: int, length: int):
+    if src is None or dest is None:
+        raise NullPointerError('arraycopy of null')
+    primitive = src.__class__ is PrimitiveArray
+    if primitive != (dest.__class__ is PrimitiveArray) or primitive and src.typecode != dest.typecode:
+        raise ArrayStoreError(f'arraycopy from {src.descriptor} to {dest.descriptor}')
+    if length < 0 or src_pos < 0 or dest_pos < 0 or src_pos + length > len(src) or dest_pos + length > len(dest):
+        raise ArrayIndexOutOfBoundsError(f'arraycopy: last source index {src_pos + length} out of bounds for length {len(src)}')
+    if primitive:
+        # a copy between the buffers, which moves overlapping ranges as in java
+        memoryview(dest)[dest_pos:dest_pos + length] = memoryview(src)[src_pos:src_pos + length]
+    else:
+        # the source slice is copied first, so overlapping ranges work as in java
+        dest[dest_pos:dest_pos + length] = src[src_pos:src_pos + length]
+
+
+@native('java/lang/System', 'identityHashCode(Ljava/lang/Object;)I')
+def _identity_hash_code(obj: Any) -> int:
+    return 0 if obj is None else _i32(id(obj))
+
+
+@native('java/lang/System', 'lineSeparator()Ljava/lang/String;', pure=True)
+def _line_separator() -> str:
+    return '\n'
+
+
+# java.lang.Object
+
+register('java/lang/Object', '<init>()V', lambda obj: None, static=False, pure=True)
+register('java/lang/Object', 'hashCode()I', lambda obj: _i32(id(obj)), static=False)
+register('java/lang/Object', 'equals(Ljava/lang/Object;)Z', lambda obj, other: int(obj is other), static=False, pure=True)
+register('java/lang/Object', 'toString()Ljava/lang/String;', lambda obj: to_string(obj), static=False)
+
+
+# java.lang.Math
+
+def _floor_div(a: int, b: int) -> int:
+    if b == 0:
+        raise ZeroDivisionError('/ by zero')
+    return _i32(a // b)
+
+
+def _floor_mod(a: int, b: int) -> int:
+    if b == 0:
+        raise ZeroDivisionError('/ by zero')
+    return a % b
+
+
+def _max_float(a: float, b: float) -> float:
+    # NaN if either is NaN, and 0.0 is greater than -0.0
+    if a != a or b != b:
+        return math.nan
+    if a == b:
+        return b if math.copysign(1.0, a) < 0 else a
+    return a if a > b else b
+
+
+def _min_float(a: float, b: float) -> float:
+    if a != a or b != b:
+        return math.nan
+    if a == b:
+        return a if math.copysign(1.0, a) < 0 else b
+    return a if a < b else b
+
+
+def _pow(a: float, b: float) -> float:
+    # java gives infinities and NaN where math.pow raises
+    try:
+        return math.pow(a, b)
+    except OverflowError:
+        pass
+    except ValueError:
+        if a != 0:
+            return math.nan  # a negative base and a fractional exponent
+    odd = b == math.floor(b) and math.fmod(b, 2) != 0
+    return -math.inf if odd and math.copysign(1.0, a) < 0 else math.inf
+
+
+def _exp(a: float) -> float:
+    try:
+        return math.exp(a)
+    except OverflowError:
+        return math.inf
+
+
+for _signature, _fn in {
+    'abs(I)I': lambda a: _i32(abs(a)),
+    'abs(J)J': lambda a: _i64(abs(a)),
+    'abs(F)F': abs,
+    'abs(D)D': abs,
+    'max(II)I': max,
+    'max(JJ)J': max,
+    'max(FF)F': _max_float,
+    'max(DD)D': _max_float,
+    'min(II)I': min,
+    'min(JJ)J': min,
+    'min(FF)F': _min_float,
+    'min(DD)D': _min_float,
+    'floorDiv(II)I': _floor_div,
+    'floorMod(II)I': _floor_mod,
+    'addExact(II)I': lambda a, b: a + b if -0x80000000 <= a + b <= 0x7FFFFFFF else _overflow(),
+    'multiplyExact(II)I': lambda a, b: a * b if -0x80000000 <= a * b <= 0x7FFFFFFF else _overflow(),
+    'sqrt(D)D': lambda a: math.sqrt(a) if a >= 0 else math.nan,
+    'cbrt(D)D': lambda a: math.copysign(abs(a) ** (1 / 3), a),
+    'pow(DD)D': _pow,
+    'exp(D)D': _exp,
+    'log(D)D': lambda a: math.log(a) if a > 0 else -math.inf if a == 0 else math.nan,
+    'log10(D)D': lambda a: math.log10(a) if a > 0 else -math.inf if a == 0 else math.nan,
+    'sin(D)D': lambda a: math.sin(a) if math.isfinite(a) else math.nan,
+    'cos(D)D': lambda a: math.cos(a) if math.isfinite(a) else math.nan,
+    'tan(D)D': lambda a: math.tan(a) if math.isfinite(a) else math.nan,
+    'atan2(DD)D': math.atan2,
+    'floor(D)D': lambda a: float(math.floor(a)) if math.isfinite(a) else a,
+    'ceil(D)D': lambda a: float(math.ceil(a)) if math.isfinite(a) else a,
+    'hypot(DD)D': math.hypot,
+}.items():
+    register('java/lang/Math', _signature, _fn, pure=True)
+
+
+def _overflow():
+    raise IntegerOverflowError('integer overflow')
+
+
+# java.lang.Integer
+
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _parse_int(s: Optional[str], radix: int = 10) -> int:
+    if s is None:
+        raise NumberFormatError('Cannot parse null string: null')
+    digits = s[1:] if s[:1] in ('-', '+') else s
+    if not digits or any(_DIGITS.find(c.lower()) not in range(radix) for c in digits):
+        raise NumberFormatError(f'For input string: "{s}"' + (f' under radix {radix}' if radix != 10 else ''))
+    value = int(s, radix)
+    if not -0x80000000 <= value <= 0x7FFFFFFF:
+        raise NumberFormatError(f'For input string: "{s}"' + (f' under radix {radix}' if radix != 10 else ''))
+    return value
+
+
+def _int_to_string(value: int, radix: int = 10) -> str:
+    if not 2 <= radix <= 36:
+        radix = 10
+    if value == 0:
+        return '0'
+    digits = []
+    n = abs(value)
+    while n:
+        n, d = divmod(n, radix)
+        digits.append(_DIGITS[d])
+    return ('-' if value < 0 else '') + ''.join(reversed(digits))
+
+
+for _signature, _fn in {
+    'parseInt(Ljava/lang/String;)I': _parse_int,
+    'parseInt(Ljava/lang/String;I)I': _parse_int,
+    'valueOf(Ljava/lang/String;)Ljava/lang/Integer;': _parse_int,
+    'toString(I)Ljava/lang/String;': _int_to_string,
+    'toString(II)Ljava/lang/String;': _int_to_string,
+    'toHexString(I)Ljava/lang/String;': lambda a: f'{a & 0xFFFFFFFF:x}',
+    'toBinaryString(I)Ljava/lang/String;': lambda a: f'{a & 0xFFFFFFFF:b}',
+    'bitCount(I)I': lambda a: bin(a & 0xFFFFFFFF).count('1'),
+    'compare(II)I': lambda a, b: (a > b) - (a < b),
+    'signum(I)I': lambda a: (a > 0) - (a < 0),
+    # an Integer is the python int itself
+    'valueOf(I)Ljava/lang/Integer;': lambda a: a,
+}.items():
+    register('java/lang/Integer', _signature, _fn, pure=True)
+register('java/lang/Integer', 'intValue()I', lambda a: a, static=False, pure=True)
+
+
+# java.lang.String, a python str
+
+def _char_at(s: str, index: int) -> int:
+    if not 0 <= index < len(s):
+        raise IndexOutOfBoundsError(f'index {index}, length {len(s)}')
+    return ord(s[index])
+
+
+def _substring(s: str, begin: int, end: Optional[int] = None) -> str:
+    end = len(s) if end is None else end
+    if not 0 <= begin <= end <= len(s):
+        raise IndexOutOfBoundsError(f'begin {begin}, end {end}, length {len(s)}')
+    return s[begin:end]
+
+
+def _string_hash_code(s: str) -> int:
+    h = 0
+    for c in s:
+        h = (31 * h + ord(c)) & 0xFFFFFFFF
+    return _i32(h)
+
+
+for _signature, _fn in {
+    'length()I': len,
+    'isEmpty()Z': lambda s: int(not s),
+    'charAt(I)C': _char_at,
+    'equals(Ljava/lang/Object;)Z': lambda s, o: int(isinstance(o, str) and s == o),
+    'equalsIgnoreCase(Ljava/lang/String;)Z': lambda s, o: int(o is not None and s.lower() == o.lower()),
+    'hashCode()I': _string_hash_code,
+    'compareTo(Ljava/lang/String;)I': lambda s, o: next((ord(a) - ord(b) for a, b in zip(s, o) if a != b), len(s) - len(o)),
+    'substring(I)Ljava/lang/String;': _substring,
+    'substring(II)Ljava/lang/String;': _substring,
+    'indexOf(I)I': lambda s, c: s.find(chr(c)),
+    'indexOf(Ljava/lang/String;)I': lambda s, o: s.find(o),
+    'indexOf(Ljava/lang/String;I)I': lambda s, o, start: s.find(o, max(start, 0)),
+    'lastIndexOf(I)I': lambda s, c: s.rfind(chr(c)),
+    'lastIndexOf(Ljava/lang/String;)I': lambda s, o: s.rfind(o),
+    'contains(Ljava/lang/CharSequence;)Z': lambda s, o: int(to_string(o) in s),
+    'startsWith(Ljava/lang/String;)Z': lambda s, o: int(s.startswith(o)),
+    'endsWith(Ljava/lang/String;)Z': lambda s, o: int(s.endswith(o)),
+    'concat(Ljava/lang/String;)Ljava/lang/String;': lambda s, o: s + o,
+    'replace(CC)Ljava/lang/String;': lambda s, a, b: s.replace(chr(a), chr(b)),
+    'toUpperCase()Ljava/lang/String;': str.upper,
+    'toLowerCase()Ljava/lang/String;': str.lower,
+    'trim()Ljava/lang/String;': lambda s: s.strip(''.join(map(chr, range(0x21)))),
+    'toString()Ljava/lang/String;': lambda s: s,
+}.items():
+    register('java/lang/String', _signature, _fn, static=False, pure=True)
+
+# valueOf(Object) and format call toString() of objects, they are intrinsics (see executer)
+for _descriptor in ('Z', 'C', 'I', 'J', 'F', 'D'):
+    register('java/lang/String', f'valueOf({_descriptor})Ljava/lang/String;',
+             lambda value, _descriptor=_descriptor: to_string(value, _descriptor), pure=True)
+
+
+# interned strings
+
+_strings: Dict[str, str] = {}
+
+
+def intern(s: str) -> str:
+    '''the one instance of the string s, so equal literals are the same reference'''
+    return _strings.setdefault(s, s)
+
+
+register('java/lang/String', 'intern()Ljava/lang/String;', intern, static=False)
+
+
+# java.lang.StringBuilder and StringBuffer
+
+class StringBuilder:
+    '''the pieces appended so far, joined when the string is needed'''
+    __slots__ = ('pieces', 'length')
+
+    def __init__(self):
+        self.pieces: List[str] = []
+        self.length = 0
+
+    def append(self, text: str) -> 'StringBuilder':
+        self.pieces.append(text)
+        self.length += len(text)
+        return self
+
+    def toString(self) -> str:
+        pieces = self.pieces
+        if len(pieces) == 1:
+            return pieces[0]
+        s = ''.join(pieces)
+        self.pieces = [s] if s else []
+        return s
+
+    def set(self, s: str):
+        self.pieces = [s] if s else []
+        self.length = len(s)
+
+    def __repr__(self):
+        return f'StringBuilder({self.toString()!r})'
+
+
+def _set_length(sb: StringBuilder, length: int):
+    s = sb.toString()
+    if length < 0:
+        raise IndexOutOfBoundsError(f'length {length}')
+    sb.set(s[:length] + '\0' * (length - len(s)))
+
+
+def _insert(sb: StringBuilder, offset: int, value: Any, descriptor: str) -> StringBuilder:
+    s = sb.toString()
+    if not 0 <= offset <= len(s):
+        raise IndexOutOfBoundsError(f'offset {offset}, length {len(s)}')
+    sb.set(s[:offset] + to_string(value, descriptor) + s[offset:])
+    return sb
+
+
+# classes allocated by new without a layout: class -> factory
+classes: Dict[str, Callable[[], Any]] = {}
+
+for _builder in ('java/lang/StringBuilder', 'java/lang/StringBuffer'):
+    classes[_builder] = StringBuilder
+    _self = f'L{_builder};'
+    for _signature, _fn in {
+        '<init>()V': lambda sb: None,
+        '<init>(I)V': lambda sb, capacity: None,
+        '<init>(Ljava/lang/String;)V': lambda sb, s: sb.append(to_string(s)) and None,
+        '<init>(Ljava/lang/CharSequence;)V': lambda sb, s: sb.append(to_string(s)) and None,
+        f'append(Ljava/lang/String;){_self}': lambda sb, s: sb.append('null' if s is None else s),
+        f'append(Ljava/lang/CharSequence;){_self}': lambda sb, s: sb.append(to_string(s)),
+        f'append(I){_self}': lambda sb, i: sb.append(str(i)),
+        f'append(J){_self}': lambda sb, i: sb.append(str(i)),
+        f'append(C){_self}': lambda sb, c: sb.append(chr(c)),
+        f'append(Z){_self}': lambda sb, z: sb.append('true' if z else 'false'),
+        f'append(F){_self}': lambda sb, f: sb.append(_float_to_string(f)),
+        f'append(D){_self}': lambda sb, d: sb.append(_double_to_string(d)),
+        f'insert(ILjava/lang/String;){_self}': lambda sb, i, s: _insert(sb, i, s, 'Ljava/lang/String;'),
+        f'insert(IC){_self}': lambda sb, i, c: _insert(sb, i, c, 'C'),
+        f'insert(II){_self}': lambda sb, i, v: _insert(sb, i, v, 'I'),
+        f'reverse(){_self}': lambda sb: sb.set(sb.toString()[::-1]) or sb,
+        'toString()Ljava/lang/String;': StringBuilder.toString,
+        'length()I': lambda sb: sb.length,
+        'isEmpty()Z': lambda sb: int(sb.length == 0),
+        'charAt(I)C': lambda sb, i: _char_at(sb.toString(), i),
+        'setLength(I)V': _set_length,
+        'indexOf(Ljava/lang/String;)I': lambda sb, s: sb.toString().find(s),
+    }.items():
+        register(_builder, _signature, _fn, static=False)
+
+
+# java.util.Arrays
+
+def _length(a: Any) -> int:
+    if a is None:
+        raise NullPointerError('array is null')
+    return len(a)
+
+
+def _check_range(a: Any, start: int, end: int):
+    _length(a)
+    if start > end:
+        raise IllegalArgumentError(f'fromIndex({start}) > toIndex({end})')
+    if start < 0 or end > len(a):
+        raise ArrayIndexOutOfBoundsError(f'range [{start}, {end}) out of bounds for length {len(a)}')
+
+
+def _fill(a: Any, start: int, end: int, value: Any):
+    _check_range(a, start, end)
+    if a.__class__ is PrimitiveArray:
+        a[start:end] = array(a.typecode, (value,)) * (end - start)
+    else:
+        a[start:end] = [value] * (end - start)
+
+
+def _float_order(value: float) -> Any:
+    # java sorts -0.0 before 0.0 and NaN last
+    return value != value, value, math.copysign(1.0, value)
+
+
+def _sort(a: PrimitiveArray, start: int, end: int):
+    _check_range(a, start, end)
+    key = _float_order if a.typecode in 'fd' else None
+    a[start:end] = array(a.typecode, sorted(a[start:end], key=key))
+
+
+def _array_to_string(a: Any, element: str) -> str:
+    if a is None:
+        return 'null'
+    return '[' + ', '.join(to_string(v, element) for v in a) + ']'
+
+
+def _array_equals(a: Any, b: Any) -> int:
+    if a is None or b is None:
+        return int(a is b)
+    return int(len(a) == len(b) and all(x is y or x == y for x, y in zip(a, b)))
+
+
+for _element in [*ARRAY_TYPECODES, 'Ljava/lang/Object;']:
+    _a = f'[{_element}'
+    for _signature, _fn in {
+        f'fill({_a}{_element})V': lambda a, value: _fill(a, 0, _length(a), value),
+        f'fill({_a}II{_element})V': _fill,
+        f'toString({_a})Ljava/lang/String;': lambda a, _e=_element: _array_to_string(a, _e),
+        f'equals({_a}{_a})Z': _array_equals,
+    }.items():
+        register('java/util/Arrays', _signature, _fn)
+    if _element not in ('Z', 'Ljava/lang/Object;'):
+        register('java/util/Arrays', f'sort({_a})V', lambda a: _sort(a, 0, _length(a)))
+        register('java/util/Arrays', f'sort({_a}II)V', _sort)
+
+
+# string concatenation
+
+# python expression converting an argument by the first character of its descriptor
+_CONVERSIONS = {
+    'I': 'str({})',
+    'S': 'str({})',
+    'B': 'str({})',
+    'J': 'str({})',
+    'Z': "('true' if {} else 'false')",
+    'C': 'chr({})',
+    'F': "_to_string({}, 'F')",
+    'D': "_to_string({}, 'D')",
+}
+
+
+def _object_string(thread: Any, value: Any, descriptor: str) -> str:
+    return to_string(value, descriptor)
+
+
+def concat_formatter(recipe: str, params: Sequence[str], constants: Sequence[Any] = (),
+                     to_str: Callable[[Any, Any, str], str] = _object_string) -> Callable[..., str]:
+    '''
+    the function concatenating the arguments (of types params) of a makeConcatWithConstants call site.
+    in recipe \\1 stands for the next argument and \\2 for the next constant. the function takes the
+    calling thread first, objects and arrays are converted by to_str(thread, value, descriptor).
+    '''
+    terms: List[str] = []
+    literal: List[str] = []
+    args = iter(enumerate(params))
+    consts = iter(constants)
+    for ch in recipe:
+        if ch == '\1':
+            if literal:
+                terms.append(repr(''.join(literal)))
+                literal.clear()
+            i, t = next(args)
+            if t == 'Ljava/lang/String;':
+                terms.append(f"('null' if a{i} is None else a{i})")
+            else:
+                terms.append(_CONVERSIONS.get(t[0], f'_str(thread, {{}}, {t!r})').format(f'a{i}'))
+        elif ch == '\2':
+            literal.append(to_string(next(consts)))
+        else:
+            literal.append(ch)
+    if literal or not terms:
+        terms.append(repr(''.join(literal)))
+    source = f"def concat({', '.join(['thread', *(f'a{i}' for i in range(len(params)))])}):\n    return {' + '.join(terms)}\n"
+    namespace: Dict[str, Any] = {'_str': to_str, '_to_string': to_string}
+    exec(source, namespace)
+    return namespace['concat']
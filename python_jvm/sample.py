@@ -1,5 +1,6 @@
-from python_jvm.executer import find_code, load_classes, find_method, execute
+from python_jvm.executer import load_classes, run_main
 import logging
+import sys
 logging.basicConfig(
     # encoding='utf-8',
     level=logging.WARN)
@@ -7,7 +8,4 @@ logging.basicConfig(
 
 cfs = load_classes('./tests/java/*.class')
 print(cfs.keys())
-main_method = find_method(cfs, 'HelloWorld', 'main')
-assert main_method is not None
-main_method_code = find_code(main_method, cfs, 'HelloWorld')
-execute(main_method_code, cfs, 'HelloWorld', [None for _ in range(main_method_code.max_locals)], {})
+run_main(cfs, 'HelloWorld', sys.argv[1:])
@@ -0,0 +1,383 @@
+'''
+java threads as green threads, all run by one python thread.
+
+    scheduler = Scheduler(cfs, quantum=1000)
+    main = scheduler.spawn(resolve_method(cfs, 'Workers', 'pipeline', '(I)I', False), [100])
+    scheduler.run()
+    print(main.result)
+
+every java thread is an executer.Thread with its own frames, sharing the heap and the monitors
+of its objects (see monitor). the scheduler runs the ready threads in turn, each for quantum
+instructions (a call into compiled code counts as one) or until it blocks on a monitor, waits,
+sleeps, joins another thread or yields. a java/lang/Thread object runs its run() method, or the
+run() method of the Runnable it was created with, on a new thread once it is started.
+
+deterministic runs do not compile methods and measure time in instructions executed, so the
+threads interleave the same way on every run. with a seed the next thread and the length of each
+time slice are chosen at random (reproducibly for the same seed) to try other interleavings.
+
+a thread throwing an exception no frame catches stops alone: its monitors are released, its
+joiners woken up and the exception is logged and kept in GreenThread.error.
+'''
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Mapping, Optional, TextIO, Tuple
+from python_jvm import monitor
+from python_jvm.class_parser import ClassFile
+from python_jvm.compiler import DEFAULT_COMPILE_THRESHOLD
+from python_jvm.executer import (DEFAULT_MAX_DEPTH, Frame, Lambda, ResolvedMethod, Thread, _invoke, _run_slice, _unwind,
+                                 find_virtual, intrinsics)
+from python_jvm.heap import BUILTIN_LAYOUTS, Heap, JavaObject, Layout
+
+DEFAULT_QUANTUM = 1000
+# virtual time of deterministic runs
+INSTRUCTIONS_PER_MS = 1000
+
+READY = 'ready'
+RUNNING = 'running'
+BLOCKED = 'blocked'  # entering a monitor, waiting or joining
+SLEEPING = 'sleeping'
+TERMINATED = 'terminated'
+
+THREAD_LAYOUT = BUILTIN_LAYOUTS['java/lang/Thread'] = Layout('java/lang/Thread', None, [
+    ('target', 'Ljava/lang/Runnable;'),
+    ('name', 'Ljava/lang/String;'),
+    ('green', 'Ljava/lang/Object;'),  # the GreenThread once started
+])
+_TARGET = THREAD_LAYOUT.slots['target']
+_NAME = THREAD_LAYOUT.slots['name']
+_GREEN = THREAD_LAYOUT.slots['green']
+_thread_numbers = itertools.count()
+
+
+@dataclass
+class SchedulerStats:
+    threads: int = 0
+    switches: int = 0  # time slices run
+    instructions: int = 0
+    blocks: int = 0  # threads parked on a monitor, wait, join or sleep
+
+
+class GreenThread:
+    __slots__ = ('name', 'thread', 'java_thread', 'root', 'state', 'joiners', 'timer', 'result', 'error')
+
+    def __init__(self, name: str, thread: Thread, java_thread: Optional[JavaObject]):
+        self.name = name
+        self.thread = thread
+        self.java_thread = java_thread
+        self.root: Optional[Frame] = None
+        self.state = READY
+        self.joiners: List['GreenThread'] = []
+        self.timer = 0  # sequence number of its pending timer, 0: none
+        self.result: Any = None
+        self.error: Optional[BaseException] = None  # the exception which stopped it
+
+    def __repr__(self):
+        return f'GreenThread({self.name}, {self.state})'
+
+
+class Scheduler:
+    def __init__(self, cfs: Mapping[str, ClassFile], heap: Optional[Heap] = None, quantum: int = DEFAULT_QUANTUM,
+                 deterministic: bool = False, seed: Optional[int] = None, max_depth: int = DEFAULT_MAX_DEPTH,
+                 compile_threshold: Optional[int] = DEFAULT_COMPILE_THRESHOLD):
+        self.cfs = cfs
+        self.heap = heap if isinstance(heap, Heap) else Heap()
+        self.quantum = quantum
+        self.deterministic = deterministic or seed is not None
+        self.random = random.Random(seed) if seed is not None else None
+        self.max_depth = max_depth
+        self.compile_threshold = None if self.deterministic else compile_threshold
+        self.threads: List[GreenThread] = []
+        self.ready: Deque[GreenThread] = deque()
+        # (wake up time, sequence number, thread, object of a timed wait)
+        self.timers: List[Tuple[float, int, GreenThread, Any]] = []
+        self.current: Optional[GreenThread] = None
+        self.stats = SchedulerStats()
+        self._green: Dict[Thread, GreenThread] = {}
+        self._sequence = itertools.count(1)
+        self._idle = 0.0  # ms the virtual clock skipped while every thread slept
+        self._numbers = itertools.count()
+
+    def now(self) -> float:
+        '''ms, virtual in deterministic runs'''
+        if self.deterministic:
+            return self.stats.instructions / INSTRUCTIONS_PER_MS + self._idle
+        return time.monotonic() * 1000
+
+    def _new_thread(self, name: str, java_thread: Optional[JavaObject], heap: Optional[Heap] = None) -> GreenThread:
+        thread = Thread(self.cfs, heap or self.heap, self.max_depth, compile_threshold=self.compile_threshold)
+        thread.scheduler = self
+        g = GreenThread(name, thread, java_thread)
+        self._green[thread] = g
+        self.threads.append(g)
+        self.stats.threads += 1
+        return g
+
+    def spawn(self, target: ResolvedMethod, args: List[Any], name: Optional[str] = None,
+              stdout: Optional[TextIO] = None, heap: Optional[Heap] = None) -> GreenThread:
+        '''
+        a thread running target with the java arguments args, its return value becomes result.
+        stdout receives what it prints (None: System.out, see natives). it allocates from heap
+        (default: the heap of the scheduler), threads it starts inherit both.
+        '''
+        g = self._new_thread(name or f'main-{next(self._numbers)}', None, heap)
+        g.thread.stdout = stdout
+        g.root = Frame(g.thread, target, target.local_variables(args), None)
+        g.thread.frames.append(g.root)
+        self._make_ready(g)
+        return g
+
+    def start(self, java_thread: JavaObject, parent: Optional[Thread] = None) -> GreenThread:
+        '''Thread.start(): run the run() method of java_thread on a new thread'''
+        if java_thread[_GREEN] is not None:
+            raise Exception(f'{java_thread[_NAME]} is already started')
+        g = self._new_thread(java_thread[_NAME], java_thread, parent.heap if parent is not None else None)
+        java_thread[_GREEN] = g
+        if parent is not None:
+            g.thread.stdout = parent.stdout
+        run: Optional[ResolvedMethod] = find_virtual(self.cfs, java_thread, 'run', '()V')
+        args: List[Any] = [java_thread]
+        if run.intrinsic is _run:
+            run, args = _runnable(self.cfs, java_thread[_TARGET])
+        if run is not None:
+            g.root = Frame(g.thread, run, run.local_variables(args), None)
+            g.thread.frames.append(g.root)
+        self._make_ready(g)
+        return g
+
+    def current_thread(self, thread: Thread) -> JavaObject:
+        g = self._green[thread]
+        if g.java_thread is None:
+            g.java_thread = self.heap.new(THREAD_LAYOUT)
+            g.java_thread[_NAME] = g.name
+            g.java_thread[_GREEN] = g
+        return g.java_thread
+
+    def park(self, thread: Thread, reason: Any, timeout: int = 0, obj: Any = None):
+        '''stop thread after the current instruction until it is woken up (or the timeout in ms passed)'''
+        g = self._green[thread]
+        g.state = BLOCKED
+        thread.switch = True
+        self.stats.blocks += 1
+        logging.debug(f'{g.name} blocks on {reason}')
+        if timeout > 0:
+            self._timer(g, timeout, obj)
+
+    def wake(self, thread: Thread):
+        g = self._green[thread]
+        g.state = READY
+        g.timer = 0
+        self._make_ready(g)
+
+    def _make_ready(self, g: GreenThread):
+        self.ready.append(g)
+
+    def write(self, thread: Thread, text: str) -> Optional[bool]:
+        '''PrintStream output of thread, True if it parked the thread (see aio)'''
+        thread.stdout.write(text)
+        return None
+
+    def sleep(self, thread: Thread, ms: int):
+        g = self._green[thread]
+        g.state = SLEEPING
+        thread.switch = True
+        self.stats.blocks += 1
+        self._timer(g, ms, None)
+
+    def join(self, thread: Thread, java_thread: JavaObject) -> bool:
+        '''Thread.join(): park thread until java_thread terminated, False if it is not alive'''
+        target: Optional[GreenThread] = java_thread[_GREEN]
+        if target is None or target.state == TERMINATED:
+            return False
+        target.joiners.append(self._green[thread])
+        self.park(thread, target)
+        return True
+
+    def _timer(self, g: GreenThread, ms: int, obj: Any):
+        g.timer = next(self._sequence)
+        heapq.heappush(self.timers, (self.now() + ms, g.timer, g, obj))
+
+    def _expire_timers(self):
+        now = self.now()
+        while self.timers and self.timers[0][0] <= now:
+            _, sequence, g, obj = heapq.heappop(self.timers)
+            self._expire(g, sequence, obj)
+
+    def _expire(self, g: GreenThread, sequence: int, obj: Any):
+        if g.timer != sequence:
+            return  # woken up before
+        g.timer = 0
+        if g.state == SLEEPING:
+            g.state = READY
+            self._make_ready(g)
+        elif obj is not None:
+            monitor.timeout(g.thread.heap.monitors, obj, g.thread)
+
+    def _next(self) -> GreenThread:
+        if self.random is not None:
+            i = self.random.randrange(len(self.ready))
+            self.ready.rotate(-i)
+        return self.ready.popleft()
+
+    def _terminate(self, g: GreenThread):
+        g.state = TERMINATED
+        if g.root is not None:
+            g.result = g.root.result
+        for joiner in g.joiners:
+            self.wake(joiner.thread)
+        g.joiners.clear()
+        logging.debug(f'{g.name} terminated')
+
+    def _stop(self, g: GreenThread):
+        '''release what a thread holds when it failed or was cancelled'''
+        thread = g.thread
+        g.timer = 0
+        _unwind(thread, 0)
+        monitor.abandon(thread.heap.monitors, thread)
+        if g.state != TERMINATED:
+            self._terminate(g)
+
+    def run(self):
+        '''run the threads until all of them terminated, raises DeadlockError if the rest are blocked'''
+        while True:
+            if self.timers:
+                self._expire_timers()
+            if not self.ready:
+                if self.timers:
+                    wait = self.timers[0][0] - self.now()
+                    if self.deterministic:
+                        self._idle += wait
+                    elif wait > 0:
+                        time.sleep(wait / 1000)
+                    continue
+                blocked = [g for g in self.threads if g.state != TERMINATED]
+                if blocked:
+                    raise monitor.DeadlockError(f'every thread is blocked: {blocked}')
+                return
+            g = self._next()
+            if not g.thread.frames:
+                self._terminate(g)
+                continue
+            quantum = self.random.randint(1, self.quantum) if self.random is not None else self.quantum
+            g.state = RUNNING
+            self.current = g
+            try:
+                left = _run_slice(g.thread, quantum)
+            except Exception as e:
+                # the other threads go on
+                g.error = e
+                self._stop(g)
+                logging.error(f'{g.name} stopped: {e!r}')
+                continue
+            except BaseException:
+                g.state = TERMINATED
+                raise
+            finally:
+                self.current = None
+            self.stats.instructions += quantum - left
+            self.stats.switches += 1
+            if not g.thread.frames:
+                self._terminate(g)
+            elif g.state == RUNNING:
+                g.state = READY
+                self.ready.append(g)
+
+
+def _runnable(cfs: Mapping[str, ClassFile], target: Any) -> Tuple[Optional[ResolvedMethod], List[Any]]:
+    '''the run() method of a Runnable (None for null) and its arguments'''
+    if target is None:
+        return None, []
+    if isinstance(target, Lambda):
+        return target.target, list(target.captured)
+    return find_virtual(cfs, target, 'run', '()V'), [target]
+
+
+def _scheduler(frame: Frame) -> Scheduler:
+    scheduler = frame.thread.scheduler
+    if scheduler is None:
+        raise Exception('java threads run on a Scheduler')
+    return scheduler
+
+
+def _init(frame: Frame, args: List[Any]):
+    java_thread = args[0]
+    for arg in args[1:]:
+        java_thread[_NAME if isinstance(arg, str) else _TARGET] = arg
+    if java_thread[_NAME] is None:
+        scheduler = frame.thread.scheduler
+        n = next(scheduler._numbers if scheduler is not None else _thread_numbers)
+        java_thread[_NAME] = f'Thread-{n}'
+
+
+def _start(frame: Frame, args: List[Any]):
+    _scheduler(frame).start(args[0], frame.thread)
+
+
+def _run(frame: Frame, args: List[Any]) -> Optional[bool]:
+    '''Thread.run() of a thread created with a Runnable'''
+    run, run_args = _runnable(frame.thread.cfs, args[0][_TARGET])
+    if run is None:
+        return None
+    frame.stack.extend(run_args)
+    return _invoke(frame, run, len(run_args))
+
+
+def _join(frame: Frame, args: List[Any]) -> Optional[bool]:
+    thread = frame.thread
+    green: Optional[GreenThread] = args[0][_GREEN]
+    if green is None or green.state == TERMINATED:
+        return None
+    if not thread.yieldable:
+        raise monitor.DeadlockError(f'join of {args[0][_NAME]} would never return')
+    return True if thread.scheduler.join(thread, args[0]) else None
+
+
+def _is_alive(frame: Frame, args: List[Any]):
+    green: Optional[GreenThread] = args[0][_GREEN]
+    frame.stack.append(int(green is not None and green.state != TERMINATED))
+
+
+def _get_name(frame: Frame, args: List[Any]):
+    frame.stack.append(args[0][_NAME])
+
+
+def _yield(frame: Frame, args: List[Any]) -> Optional[bool]:
+    thread = frame.thread
+    if not thread.yieldable:
+        return None
+    thread.switch = True
+    return True
+
+
+def _sleep(frame: Frame, args: List[Any]) -> Optional[bool]:
+    thread = frame.thread
+    if not thread.yieldable:
+        time.sleep(args[0] / 1000)
+        return None
+    thread.scheduler.sleep(thread, args[0])
+    return True
+
+
+def _current_thread(frame: Frame, args: List[Any]):
+    frame.stack.append(_scheduler(frame).current_thread(frame.thread))
+
+
+intrinsics['java/lang/Thread'] = {
+    '<init>()V': _init,
+    '<init>(Ljava/lang/Runnable;)V': _init,
+    '<init>(Ljava/lang/String;)V': _init,
+    '<init>(Ljava/lang/Runnable;Ljava/lang/String;)V': _init,
+    'start()V': _start,
+    'run()V': _run,
+    'join()V': _join,
+    'isAlive()Z': _is_alive,
+    'getName()Ljava/lang/String;': _get_name,
+    'yield()V': _yield,
+    'sleep(J)V': _sleep,
+    'currentThread()Ljava/lang/Thread;': _current_thread,
+}
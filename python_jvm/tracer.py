@@ -0,0 +1,142 @@
+'''
+instruction tracing for the traced interpreter loop.
+
+    tracer = RingBufferTracer(10000)
+    execute(code, cfs, 'HelloWorld', local_variables, {}, tracer=tracer)
+    tracer.dump(sys.stderr)
+
+FileTracer writes the same events to a binary file, read it back with read_trace or
+    python -m python_jvm.tracer trace.bin
+'''
+import collections
+import struct
+import sys
+from typing import BinaryIO, Deque, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+from python_jvm.decoder import mnemonic
+
+
+class TraceEvent(NamedTuple):
+    method: str  # class.name(descriptor)
+    pc: int  # byte offset in the method's code
+    opcode: int
+    stack_depth: int  # operand stack depth before the instruction
+
+    def __str__(self):
+        return f'{self.method} {self.pc:5d} {mnemonic(self.opcode):<16} stack={self.stack_depth}'
+
+
+class Tracer:
+    '''
+    receives one record per executed instruction.
+    methods are interned to integer ids so records stay small.
+    '''
+
+    def __init__(self):
+        self.methods: List[str] = []
+        self._method_ids: Dict[str, int] = {}
+
+    def method_id(self, method: str) -> int:
+        i = self._method_ids.get(method)
+        if i is None:
+            i = self._method_ids[method] = len(self.methods)
+            self.methods.append(method)
+            self._define_method(i, method)
+        return i
+
+    def _define_method(self, method_id: int, method: str):
+        pass
+
+    def record(self, method_id: int, pc: int, opcode: int, stack_depth: int):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RingBufferTracer(Tracer):
+    '''keeps the last capacity events in memory'''
+
+    def __init__(self, capacity: int = 100000):
+        super().__init__()
+        self.buffer: Deque[Tuple[int, int, int, int]] = collections.deque(maxlen=capacity)
+
+    def record(self, method_id: int, pc: int, opcode: int, stack_depth: int):
+        self.buffer.append((method_id, pc, opcode, stack_depth))
+
+    def events(self) -> List[TraceEvent]:
+        return [TraceEvent(self.methods[m], pc, opcode, depth) for m, pc, opcode, depth in self.buffer]
+
+    def dump(self, out: TextIO = sys.stderr):
+        for e in self.events():
+            out.write(f'{e}\n')
+
+
+# record type, then the body
+# b'M' method_id:u32 length:u16 name:utf8
+# b'I' method_id:u32 pc:u32 opcode:u8 stack_depth:u16
+_METHOD = struct.Struct('>cIH')
+_EVENT = struct.Struct('>cIIBH')
+
+
+class FileTracer(Tracer):
+    '''appends binary records to a file, buffered'''
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        super().__init__()
+        self.path = path
+        self._f: BinaryIO = open(path, 'wb')
+        self._buf = bytearray()
+        self._buffer_size = buffer_size
+
+    def _define_method(self, method_id: int, method: str):
+        name = method.encode()
+        self._buf += _METHOD.pack(b'M', method_id, len(name))
+        self._buf += name
+
+    def record(self, method_id: int, pc: int, opcode: int, stack_depth: int):
+        self._buf += _EVENT.pack(b'I', method_id, pc, opcode, min(stack_depth, 0xFFFF))
+        if len(self._buf) >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        self._f.write(self._buf)
+        self._buf.clear()
+        self._f.flush()
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+
+def read_trace(path: str) -> Iterator[TraceEvent]:
+    methods: Dict[int, str] = {}
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        kind = data[pos:pos + 1]
+        if kind == b'M':
+            _, method_id, length = _METHOD.unpack_from(data, pos)
+            pos += _METHOD.size
+            methods[method_id] = data[pos:pos + length].decode()
+            pos += length
+        elif kind == b'I':
+            _, method_id, pc, opcode, depth = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            yield TraceEvent(methods[method_id], pc, opcode, depth)
+        else:
+            raise Exception(f'broken trace file {path} at {pos}')
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print('usage: python -m python_jvm.tracer <trace file>', file=sys.stderr)
+        sys.exit(2)
+    for e in read_trace(argv[0]):
+        print(e)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 import re
-from typing import List
+from typing import List, Optional, Tuple
 
 
 def hexdump(b: bytes):
@@ -29,3 +29,33 @@ def parse_arg_num(descriptor: str) -> int:
     arg_exp_array_replaced: str = re.sub(r'\[.', '&', ''.join(arg_exp_class_replaced))
     # print('array', arg_exp_array_replaced)
     return len(arg_exp_array_replaced)
+
+
+def parse_method_descriptor(descriptor: str) -> Tuple[List[str], str]:
+    '''
+    split a method descriptor into parameter types and return type.
+    e.g. (I[JLjava/lang/String;)V -> ['I', '[J', 'Ljava/lang/String;'], 'V'
+    see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-4.html#jvms-4.3.3
+    '''
+    end_index: int = descriptor.rindex(')')
+    params: List[str] = []
+    i = descriptor.index('(') + 1
+    while i < end_index:
+        start = i
+        while descriptor[i] == '[':
+            i += 1
+        if descriptor[i] == 'L':
+            i = descriptor.index(';', i)
+        i += 1
+        params.append(descriptor[start:i])
+    return params, descriptor[end_index + 1:]
+
+
+def parse_method(spec: str) -> Tuple[str, str, Optional[str]]:
+    '''"pkg/Class.name(II)I" -> ("pkg/Class", "name", "(II)I"), the descriptor is optional'''
+    paren = spec.find('(')
+    head, descriptor = (spec, None) if paren < 0 else (spec[:paren], spec[paren:])
+    _class, dot, name = head.rpartition('.')
+    if not dot or not _class or not name:
+        raise ValueError(f'expected <class>.<method>[<descriptor>], got {spec!r}')
+    return _class, name, descriptor
@@ -0,0 +1,341 @@
+'''
+batched execution of a static int method over numpy arrays of arguments.
+
+all lanes (one lane per argument tuple) run the bytecode in lockstep, every int instruction is
+one array operation over the lanes of a group. a conditional branch splits a group into the lanes
+that take it and the lanes that do not, groups waiting at the same instruction are merged again,
+and the group at the lowest instruction runs first so lanes leaving a loop wait for the others.
+
+    sums = execute_batch(cfs, 'Kernels', 'sumTo', '(I)I', np.arange(1000))
+
+a group with fewer than min_lanes lanes, and lanes at an instruction that is not vectorized
+(objects, a division by zero, ...), continue one by one in the interpreter from where they are.
+recursive calls are made per lane by the interpreter (or compiled code), other static int
+methods are called as a nested batch. numpy is an optional dependency of this module only.
+'''
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Set
+from python_jvm.class_parser import CONSTANT_Integer, ClassFile, Code
+from python_jvm.compiler import CompileError, check_int_descriptor
+from python_jvm.decoder import BRANCHES, LOOKUPSWITCH, TABLESWITCH, mnemonic
+from python_jvm.executer import Frame, ResolvedMethod, Thread, initialize, resolve_method, resolve_static
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+DEFAULT_MIN_LANES = 8
+
+_BINARY = {
+    'iadd': lambda a, b: a + b,
+    'isub': lambda a, b: a - b,
+    'imul': lambda a, b: a * b,
+    'ishl': lambda a, b: (a.view(np.uint32) << (b & 31).astype(np.uint32)).view(np.int32),
+    'ishr': lambda a, b: a >> (b & 31),
+    'iushr': lambda a, b: (a.view(np.uint32) >> (b & 31).astype(np.uint32)).view(np.int32),
+    'iand': lambda a, b: a & b,
+    'ior': lambda a, b: a | b,
+    'ixor': lambda a, b: a ^ b,
+}
+
+_CONDITIONS = {
+    'ifeq': (1, 'equal'), 'ifne': (1, 'not_equal'), 'iflt': (1, 'less'),
+    'ifge': (1, 'greater_equal'), 'ifgt': (1, 'greater'), 'ifle': (1, 'less_equal'),
+    'if_icmpeq': (2, 'equal'), 'if_icmpne': (2, 'not_equal'), 'if_icmplt': (2, 'less'),
+    'if_icmpge': (2, 'greater_equal'), 'if_icmpgt': (2, 'greater'), 'if_icmple': (2, 'less_equal'),
+}
+
+
+@dataclass
+class BatchStats:
+    lanes: int = 0
+    instructions: int = 0  # vectorized instructions, each over all lanes of a group
+    splits: int = 0  # branches the lanes of a group did not agree on
+    merges: int = 0
+    scalar_lanes: int = 0  # lanes finished by the interpreter
+    scalar_calls: int = 0  # recursive calls made per lane
+
+
+class _Group:
+    '''lanes at the same instruction, locals and stack entries hold one value per lane'''
+    __slots__ = ('pc', 'lanes', 'local_variables', 'stack')
+
+    def __init__(self, pc: int, lanes: Any, local_variables: List[Any], stack: List[Any]):
+        self.pc = pc
+        self.lanes = lanes  # indexes into the result array
+        self.local_variables = local_variables
+        self.stack = stack
+
+    def select(self, mask: Any, pc: int) -> '_Group':
+        return _Group(pc, self.lanes[mask], [None if v is None else v[mask] for v in self.local_variables],
+                      [v[mask] for v in self.stack])
+
+
+def _merge(groups: List[_Group]) -> _Group:
+    first = groups[0]
+    if any(len(g.stack) != len(first.stack) for g in groups):
+        raise Exception(f'stack depth differs at {first.pc}')
+    local_variables = []
+    for values in zip(*(g.local_variables for g in groups)):
+        # a local that is not set on every path is not read after the merge
+        local_variables.append(None if any(v is None for v in values) else np.concatenate(values))
+    stack = [np.concatenate(values) for values in zip(*(g.stack for g in groups))]
+    return _Group(first.pc, np.concatenate([g.lanes for g in groups]), local_variables, stack)
+
+
+def _i32(values: Any) -> Any:
+    '''int64 intermediates wrapped to java int'''
+    return values.astype(np.int32)
+
+
+class BatchExecutor:
+    '''
+    runs static int methods over batches of arguments.
+    the thread runs the lanes and calls that fall back to the interpreter.
+    '''
+
+    def __init__(self, cfs: Mapping[str, ClassFile], thread: Optional[Thread] = None, min_lanes: int = DEFAULT_MIN_LANES):
+        if np is None:
+            raise Exception('batched execution requires numpy')
+        self.cfs = cfs
+        self.thread = thread if thread is not None else Thread(cfs)
+        self.min_lanes = min_lanes
+        self.stats = BatchStats()
+        self._active: Set[str] = set()  # labels of the methods on the batch call stack
+        self._block_starts: Dict[int, FrozenSet[int]] = {}
+
+    def run(self, _class: str, name: str, descriptor: str, *args: Any) -> Any:
+        '''
+        the results of _class.name for every lane. args are arrays of equal length (one per
+        parameter) or scalars, values are wrapped to java int like a cast.
+        '''
+        target = resolve_method(self.cfs, _class, name, descriptor, False)
+        if target.method is None or not target.method.is_static:
+            raise Exception(f'{target.label} is not a static method')
+        try:
+            check_int_descriptor(descriptor)
+        except CompileError as e:
+            raise Exception(str(e))
+        if len(args) != target.arg_count:
+            raise Exception(f'{target.label} takes {target.arg_count} arguments')
+        initialize(self.thread, target.c)
+        arrays = [np.asarray(a) for a in args]
+        n = max((a.shape[0] for a in arrays if a.ndim), default=1)
+        arrays = [np.broadcast_to(a, (n,)).astype(np.int32) for a in arrays]
+        self.stats.lanes += n
+        return self._run(target, arrays, n)
+
+    def _run(self, target: ResolvedMethod, args: List[Any], n: int) -> Any:
+        results = np.zeros(n, dtype=np.int32)
+        if n == 0:
+            return results
+        label = target.label
+        self._active.add(label)
+        try:
+            local_variables = list(args) + [None] * target.padding
+            pending: Dict[int, List[_Group]] = {0: [_Group(0, np.arange(n), local_variables, [])]}
+            while pending:
+                pc = min(pending)
+                groups = pending.pop(pc)
+                if len(groups) > 1:
+                    self.stats.merges += len(groups) - 1
+                group = groups[0] if len(groups) == 1 else _merge(groups)
+                if len(group.lanes) < self.min_lanes:
+                    self._scalar(target, group, results)
+                    continue
+                for g in self._step(target, group, results):
+                    pending.setdefault(g.pc, []).append(g)
+        finally:
+            self._active.discard(label)
+        return results if target.returns else None
+
+    def _scalar(self, target: ResolvedMethod, group: _Group, results: Any):
+        '''finish the lanes of group one by one in the interpreter'''
+        self.stats.scalar_lanes += len(group.lanes)
+        thread = self.thread
+        for k, lane in enumerate(group.lanes.tolist()):
+            frame = Frame(thread, target, [None if v is None else int(v[k]) for v in group.local_variables], None)
+            frame.stack = [int(v[k]) for v in group.stack]
+            frame.pc = group.pc
+            value = thread.run(frame)
+            if target.returns:
+                results[lane] = value
+
+    def _step(self, target: ResolvedMethod, group: _Group, results: Any) -> List[_Group]:
+        '''run group up to the end of its basic block, returns the groups to continue'''
+        decoded = target.code.decoded
+        c = target.c
+        local_variables = group.local_variables
+        stack = group.stack
+        lanes = group.lanes
+        n = len(lanes)
+        stats = self.stats
+        leaders = self._leaders(target.code)
+        i = group.pc
+        while True:
+            ins = decoded[i]
+            name = mnemonic(ins.opcode)
+            stats.instructions += 1
+            if name == 'nop':
+                pass
+            elif name.startswith('iconst_') or name in ('bipush', 'sipush'):
+                stack.append(np.full(n, ins.operand, dtype=np.int32))
+            elif name in ('ldc', 'ldc_w') and isinstance(c.constant_pool[ins.operand], CONSTANT_Integer):
+                value = c.constant_pool[ins.operand].value
+                stack.append(np.full(n, ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000, dtype=np.int32))
+            elif name.startswith('iload'):
+                stack.append(local_variables[ins.operand])
+            elif name.startswith('istore'):
+                local_variables[ins.operand] = stack.pop()
+            elif name == 'iinc':
+                index, const = ins.operand
+                local_variables[index] = _i32(local_variables[index].astype(np.int64) + const)
+            elif name == 'pop':
+                stack.pop()
+            elif name == 'dup':
+                stack.append(stack[-1])
+            elif name == 'dup_x1':
+                value1 = stack.pop()
+                value2 = stack.pop()
+                stack += [value1, value2, value1]
+            elif name == 'swap':
+                stack[-1], stack[-2] = stack[-2], stack[-1]
+            elif name in _BINARY:
+                # numpy int32 arithmetic wraps like java
+                value2 = stack.pop()
+                value1 = stack.pop()
+                stack.append(_BINARY[name](value1, value2))
+            elif name == 'ineg':
+                stack.append(-stack.pop())
+            elif name in ('idiv', 'irem'):
+                zero = stack[-1] == 0
+                if zero.any():
+                    # the interpreter raises the exception of these lanes
+                    return self._split(target, group, results, i, ~zero, None)
+                value2 = stack.pop().astype(np.int64)
+                value1 = stack.pop().astype(np.int64)
+                if name == 'idiv':
+                    q = np.abs(value1) // np.abs(value2)  # java rounds toward zero
+                    stack.append(_i32(np.where((value1 < 0) != (value2 < 0), -q, q)))
+                else:
+                    r = np.abs(value1) % np.abs(value2)  # sign follows the dividend
+                    stack.append(_i32(np.where(value1 < 0, -r, r)))
+            elif name in _CONDITIONS:
+                operands, compare = _CONDITIONS[name]
+                value2 = stack.pop() if operands == 2 else 0
+                value1 = stack.pop()
+                taken = getattr(np, compare)(value1, value2)
+                return self._split(target, group, results, ins.operand, taken, i + 1)
+            elif name in ('goto', 'goto_w'):
+                group.pc = ins.operand
+                return [group]
+            elif ins.opcode in (TABLESWITCH, LOOKUPSWITCH):
+                if ins.opcode == TABLESWITCH:
+                    default, low, table = ins.operand
+                    keys = stack.pop().astype(np.int64) - low
+                    inside = (keys >= 0) & (keys < len(table))
+                    pcs = np.where(inside, np.asarray(table, dtype=np.int64)[np.where(inside, keys, 0)], default)
+                else:
+                    default, pairs = ins.operand
+                    keys = stack.pop()
+                    pcs = np.full(n, default, dtype=np.int64)
+                    for key, pc in pairs.items():
+                        pcs[keys == key] = pc
+                targets = np.unique(pcs)
+                if len(targets) == 1:
+                    group.pc = int(targets[0])
+                    return [group]
+                stats.splits += 1
+                return [group.select(pcs == pc, int(pc)) for pc in targets]
+            elif name == 'ireturn':
+                results[lanes] = stack.pop()
+                return []
+            elif name == 'return':
+                return []
+            elif name == 'invokestatic' and self._invoke(target, group, ins.operand):
+                pass
+            else:
+                logging.debug(f'{target.label}: {name} at {ins.pc} is not vectorized')
+                group.pc = i
+                self._scalar(target, group, results)
+                return []
+            i += 1
+            if i in leaders:
+                # other groups may join here
+                group.pc = i
+                return [group]
+
+    def _leaders(self, code: Code) -> FrozenSet[int]:
+        '''instructions a branch jumps to'''
+        leaders = self._block_starts.get(id(code))
+        if leaders is None:
+            targets = set()
+            for ins in code.decoded:
+                if ins.opcode in BRANCHES:
+                    targets.add(ins.operand)
+                elif ins.opcode == TABLESWITCH:
+                    targets.update((ins.operand[0], *ins.operand[2]))
+                elif ins.opcode == LOOKUPSWITCH:
+                    targets.update((ins.operand[0], *ins.operand[1].values()))
+            leaders = self._block_starts[id(code)] = frozenset(targets)
+        return leaders
+
+    def _split(self, target: ResolvedMethod, group: _Group, results: Any, pc: int, mask: Any,
+               other_pc: Optional[int]) -> List[_Group]:
+        '''lanes in mask continue at pc, the others at other_pc (None: in the interpreter from pc)'''
+        other_mask = ~mask
+        if not other_mask.any():
+            group.pc = pc
+            return [group]
+        if other_pc is None:
+            # the stack still holds the operands of the instruction at pc
+            self._scalar(target, group.select(other_mask, pc), results)
+            if not mask.any():
+                return []
+            return [group.select(mask, pc)]
+        if not mask.any():
+            group.pc = other_pc
+            return [group]
+        self.stats.splits += 1
+        return [group.select(mask, pc), group.select(other_mask, other_pc)]
+
+    def _invoke(self, target: ResolvedMethod, group: _Group, pool_index: int) -> bool:
+        '''call a static int method for every lane of group, False if it is not an int method'''
+        c = target.c
+        callee = c.resolved.get(pool_index)
+        if callee is None:
+            try:
+                callee = resolve_static(Frame(self.thread, target, [], None), pool_index)
+            except Exception:
+                return False
+        if callee.native is not None or callee.method is None or not callee.method.is_static:
+            return False
+        try:
+            check_int_descriptor(callee.descriptor)
+        except CompileError:
+            return False
+        stack = group.stack
+        n_args = callee.arg_count
+        args = stack[len(stack) - n_args:]
+        del stack[len(stack) - n_args:]
+        if callee.label in self._active:
+            # recursion: a batch per level would run every lane down every path
+            self.stats.scalar_calls += len(group.lanes)
+            invoke = self.thread.invoke
+            columns = [a.tolist() for a in args]
+            values = [invoke(callee, list(row)) for row in zip(*columns)] if columns else \
+                [invoke(callee, []) for _ in range(len(group.lanes))]
+            value = np.array(values, dtype=np.int32) if callee.returns else None
+        else:
+            value = self._run(callee, args, len(group.lanes))
+        if callee.returns:
+            stack.append(value)
+        return True
+
+
+def execute_batch(cfs: Mapping[str, ClassFile], _class: str, name: str, descriptor: str, *args: Any,
+                  min_lanes: int = DEFAULT_MIN_LANES) -> Any:
+    '''run _class.name over argument arrays, see BatchExecutor.run'''
+    return BatchExecutor(cfs, min_lanes=min_lanes).run(_class, name, descriptor, *args)
@@ -0,0 +1,140 @@
+import java.util.Arrays;
+
+public class ArrayKernels {
+  public static void main(String[] args){
+    System.out.println(args.length);
+    for(int i = 0; i < args.length; i++){
+      System.out.println(args[i]);
+    }
+  }
+
+  public static int sumSquares(int n){
+    int[] a = new int[n];
+    for(int i = 0; i < n; i++){
+      a[i] = i * i;
+    }
+    int s = 0;
+    for(int i = 0; i < a.length; i++){
+      s += a[i];
+    }
+    return s;
+  }
+
+  static int[] random(int n, int seed){
+    int[] a = new int[n];
+    for(int i = 0; i < n; i++){
+      seed = seed * 1103515245 + 12345;
+      a[i] = (seed >>> 16) & 0x7fff;
+    }
+    return a;
+  }
+
+  static int checksum(int[] a){
+    int h = 0;
+    for(int i = 0; i < a.length; i++){
+      h = 31 * h + a[i];
+    }
+    return h;
+  }
+
+  public static int insertionSort(int n, int seed){
+    int[] a = random(n, seed);
+    for(int i = 1; i < n; i++){
+      int v = a[i];
+      int j = i - 1;
+      while(j >= 0 && a[j] > v){
+        a[j + 1] = a[j];
+        j--;
+      }
+      a[j + 1] = v;
+    }
+    return checksum(a);
+  }
+
+  public static int nativeSort(int n, int seed){
+    int[] a = random(n, seed);
+    Arrays.sort(a);
+    return checksum(a);
+  }
+
+  public static int histogram(String s){
+    int[] counts = new int[26];
+    for(int i = 0; i < s.length(); i++){
+      counts[s.charAt(i) - 'a']++;
+    }
+    int best = 0;
+    for(int i = 1; i < 26; i++){
+      if(counts[i] > counts[best]){
+        best = i;
+      }
+    }
+    return best * 1000 + counts[best];
+  }
+
+  public static int bytes(int n){
+    byte[] b = new byte[n];
+    for(int i = 0; i < n; i++){
+      b[i] = (byte) (i * 7);
+    }
+    char[] c = new char[1];
+    c[0] = (char) -1;
+    int s = c[0];
+    for(int i = 0; i < b.length; i++){
+      s += b[i];
+    }
+    return s;
+  }
+
+  public static int trace(int n){
+    int[][] m = new int[n][n];
+    for(int i = 0; i < n; i++){
+      for(int j = 0; j < n; j++){
+        m[i][j] = i * n + j;
+      }
+    }
+    int t = 0;
+    for(int i = 0; i < n; i++){
+      t += m[i][i];
+    }
+    return t;
+  }
+
+  public static String copy(int n){
+    int[] a = new int[n];
+    Arrays.fill(a, 1, n, 5);
+    a[n - 1] = 9;
+    System.arraycopy(a, 0, a, 1, n - 1);
+    return Arrays.toString(a);
+  }
+
+  public static int badArguments(int n){
+    int[] a = new int[n];
+    int caught = 0;
+    try {
+      System.arraycopy(null, 0, a, 0, 1);
+    } catch(NullPointerException e){
+      caught += 1;
+    }
+    try {
+      Arrays.fill(a, 3, 1, 0);
+    } catch(IllegalArgumentException e){
+      caught += 10;
+    }
+    try {
+      Arrays.fill((int[]) null, 0);
+    } catch(NullPointerException e){
+      caught += 100;
+    }
+    try {
+      Arrays.sort(a, 0, n + 1);
+    } catch(ArrayIndexOutOfBoundsException e){
+      caught += 1000;
+    }
+    return caught;
+  }
+
+  public static int outOfBounds(int i){
+    int[] a = new int[4];
+    return a[i];
+  }
+}
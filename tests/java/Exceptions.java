@@ -0,0 +1,190 @@
+public class Exceptions {
+    int count;
+
+    static int divide(int a, int b) {
+        try {
+            return a / b;
+        } catch (ArithmeticException e) {
+            return -1;
+        }
+    }
+
+    // thrown and caught in the same method
+    static int countInvalid(int n) {
+        int invalid = 0;
+        for (int i = 0; i < n; i++) {
+            try {
+                if (i % 3 == 0) {
+                    throw new IllegalArgumentException("invalid");
+                }
+            } catch (IllegalArgumentException e) {
+                invalid++;
+            }
+        }
+        return invalid;
+    }
+
+    static int digit(String s, int i) throws ParseError {
+        char c = s.charAt(i);
+        if (c < '0' || c > '9') {
+            throw new ParseError("not a digit", i);
+        }
+        return c - '0';
+    }
+
+    static int parseDigits(String s) throws ParseError {
+        int value = 0;
+        for (int i = 0; i < s.length(); i++) {
+            value = value * 10 + digit(s, i);
+        }
+        return value;
+    }
+
+    static int parseOr(String s) {
+        try {
+            return parseDigits(s);
+        } catch (ParseError e) {
+            return -e.position;
+        }
+    }
+
+    static String message(String s) {
+        try {
+            parseDigits(s);
+            return "ok";
+        } catch (Exception e) {
+            return e.getMessage();
+        }
+    }
+
+    static int finallyCount(int n) {
+        int count = 0;
+        for (int i = 0; i < n; i++) {
+            try {
+                try {
+                    if (i % 2 == 0) {
+                        throw new RuntimeException();
+                    }
+                } finally {
+                    count++;
+                }
+            } catch (RuntimeException e) {
+                count += 10;
+            }
+        }
+        return count;
+    }
+
+    static int nested(int x) {
+        try {
+            try {
+                int[] a = new int[2];
+                return a[x];
+            } catch (ArithmeticException e) {
+                return -1;
+            }
+        } catch (IndexOutOfBoundsException e) {
+            return -2;
+        }
+    }
+
+    static int nameLength(Person p) {
+        try {
+            return p.getName().length();
+        } catch (NullPointerException e) {
+            return -1;
+        }
+    }
+
+    private int self() {
+        return count;
+    }
+
+    // one NullPointerException for each instruction on null
+    static int nulls(Exceptions e, int[] a, String[] b) {
+        int caught = 0;
+        try { caught += e.count; } catch (NullPointerException x) { caught++; }
+        try { e.count = 1; } catch (NullPointerException x) { caught++; }
+        try { caught += e.self(); } catch (NullPointerException x) { caught++; }
+        try { caught += a.length; } catch (NullPointerException x) { caught++; }
+        try { caught += a[0]; } catch (NullPointerException x) { caught++; }
+        try { a[0] = 1; } catch (NullPointerException x) { caught++; }
+        try { b[0] = "x"; } catch (NullPointerException x) { caught++; }
+        try { synchronized (e) { caught += 100; } } catch (NullPointerException x) { caught++; }
+        return caught;
+    }
+
+    static String cast(int i) {
+        try {
+            return "" + Shapes.side(i);
+        } catch (ClassCastException e) {
+            return e.getMessage();
+        }
+    }
+
+    static int kind(int i) {
+        Exception e = i == 0 ? new IllegalArgumentException() : i == 1 ? new ParseError("p", 1) : new NumberFormatException();
+        return (e instanceof RuntimeException ? 1 : 0) + (e instanceof IllegalArgumentException ? 10 : 0)
+            + (e instanceof ParseError ? 100 : 0);
+    }
+
+    static int parseInt(String s) {
+        try {
+            return Integer.parseInt(s);
+        } catch (NumberFormatException e) {
+            return 0;
+        }
+    }
+
+    static int wrap(int x) {
+        try {
+            return 100 / x;
+        } catch (ArithmeticException e) {
+            throw new IllegalStateException("wrapped", e);
+        }
+    }
+
+    static String cause(int x) {
+        try {
+            return "" + wrap(x);
+        } catch (IllegalStateException e) {
+            return e.getMessage() + ": " + e.getCause().getMessage();
+        }
+    }
+
+    static int thrower(int depth) throws ParseError {
+        if (depth == 0) {
+            throw new ParseError("deep", 7);
+        }
+        return thrower(depth - 1) + 1;
+    }
+
+    static int deep(int depth) {
+        try {
+            return thrower(depth);
+        } catch (ParseError e) {
+            return e.position;
+        }
+    }
+
+    static int recurse(int n) {
+        return recurse(n + 1) + 1;
+    }
+
+    static int overflow() {
+        try {
+            return recurse(0);
+        } catch (StackOverflowError e) {
+            return -1;
+        }
+    }
+}
+
+class ParseError extends Exception {
+    final int position;
+
+    ParseError(String message, int position) {
+        super(message);
+        this.position = position;
+    }
+}
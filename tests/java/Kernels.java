@@ -0,0 +1,63 @@
+public class Kernels {
+  public static int sumTo(int n){
+    int s = 0;
+    for(int i = 0; i < n; i++){
+      s += i * i;
+    }
+    return s;
+  }
+
+  public static int collatz(int n){
+    int steps = 0;
+    while(n != 1){
+      if(n % 2 == 0){
+        n = n / 2;
+      }else{
+        n = 3 * n + 1;
+      }
+      steps++;
+    }
+    return steps;
+  }
+
+  public static int gcd(int a, int b){
+    return b == 0 ? a : gcd(b, a % b);
+  }
+
+  public static int hash(int n){
+    int h = 17;
+    for(int i = 0; i < n; i++){
+      h = h * 31 + (i ^ (h >>> 7)) - (h << 3);
+    }
+    return h;
+  }
+
+  public static int season(int month){
+    switch(month){
+      case 12: case 1: case 2: return 0;
+      case 3: case 4: case 5: return 1;
+      case 6: case 7: case 8: return 2;
+      default: return 3;
+    }
+  }
+
+  public static int seasons(int n){
+    int s = 0;
+    for(int i = 0; i < n; i++){
+      s += season(i % 13) + (i > 5 ? 1 : -1);
+    }
+    return s;
+  }
+
+  static int ticks;
+
+  static int tick(){
+    ticks++;
+    return ticks;
+  }
+
+  // the division throws before tick() runs
+  public static int divideFirst(int a, int b){
+    return a / b + tick();
+  }
+}
@@ -0,0 +1,46 @@
+public class Labels {
+  String name;
+
+  Labels(String name){
+    this.name = name;
+  }
+
+  public String toString(){
+    return "label ".concat(name);
+  }
+
+  public static String concat(){
+    return "x=" + new Labels("a");
+  }
+
+  public static String valueOf(){
+    return String.valueOf(new Labels("b"));
+  }
+
+  public static String format(){
+    return String.format("%s|%s", new Labels[]{new Labels("c"), null});
+  }
+
+  public static String append(){
+    StringBuilder sb = new StringBuilder();
+    sb.append(new Labels("d")).append(' ').append(new Plain());
+    return sb.toString();
+  }
+
+  public static void print(){
+    System.out.println(new Labels("e"));
+    System.out.printf("%s%n", new Labels[]{new Labels("f")});
+    System.out.println(new IllegalStateException("boom"));
+  }
+
+  public static String caught(){
+    try {
+      throw new IllegalStateException("boom");
+    } catch (IllegalStateException e) {
+      return "" + e;
+    }
+  }
+}
+
+class Plain {
+}
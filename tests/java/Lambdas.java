@@ -0,0 +1,25 @@
+import java.util.function.IntUnaryOperator;
+
+public class Lambdas {
+  public static String greet(String name, int n){
+    return "Hello " + name + ", you are " + n + "!";
+  }
+
+  public static String describe(char c, boolean b, Object o){
+    return c + "/" + b + "/" + o;
+  }
+
+  public static int twice(int n){
+    IntUnaryOperator f = x -> x * 2;
+    return f.applyAsInt(n);
+  }
+
+  public static int scale(int k, int n){
+    IntUnaryOperator f = x -> x * k;
+    return f.applyAsInt(n);
+  }
+
+  public static IntUnaryOperator twiceOp(){
+    return x -> x * 2;
+  }
+}
@@ -0,0 +1,117 @@
+public class Numbers {
+  long total;
+
+  public static long elapsed(){
+    long start = System.nanoTime();
+    long end = System.nanoTime();
+    return end - start;
+  }
+
+  public static long millis(){
+    return System.currentTimeMillis();
+  }
+
+  public static int discard(int n){
+    System.nanoTime();
+    return n;
+  }
+
+  public static long factorial(int n){
+    long r = 1L;
+    for(int i = 2; i <= n; i++){
+      r *= i;
+    }
+    return r;
+  }
+
+  public static int compare(long a, long b){
+    return a < b ? -1 : a == b ? 0 : 1;
+  }
+
+  public static long bits(long x){
+    return ((x << 40) >>> 3) ^ (x >> 2) ^ (x & 0xFFL) | -x;
+  }
+
+  public static long divide(long a, long b){
+    try {
+      return a / b % 1000000007L;
+    } catch(ArithmeticException e){
+      return -1L;
+    }
+  }
+
+  public static long chain(long a){
+    long b;
+    long c = b = a + 1L;
+    return b + c;
+  }
+
+  public long add(long v){
+    total += v;
+    return total;
+  }
+
+  public static double mean(double[] xs){
+    double sum = 0.0;
+    for(int i = 0; i < xs.length; i++){
+      sum += xs[i];
+    }
+    return sum / xs.length;
+  }
+
+  public static double divide(double a, double b){
+    return a / b;
+  }
+
+  public static double remainder(double a, double b){
+    return a % b;
+  }
+
+  public static int truncate(double d){
+    return (int) d;
+  }
+
+  public static long round(double d){
+    return (long) (d + 0.5);
+  }
+
+  public static boolean less(double a, double b){
+    return a < b;
+  }
+
+  public static float average(float a, float b){
+    return (a + b) / 2.0f;
+  }
+
+  public static double hypot(double a, double b){
+    return Math.sqrt(Math.pow(a, 2.0) + Math.pow(b, 2.0));
+  }
+
+  public static String describe(long v, double d, float f){
+    return "" + v + " " + d + " " + f;
+  }
+
+  public static double power(double a, double b){
+    return Math.pow(a, b);
+  }
+
+  public static double exp(double d){
+    return Math.exp(d);
+  }
+
+  public static int addExact(int a, int b){
+    try {
+      return Math.addExact(a, b);
+    } catch (ArithmeticException e) {
+      return -1;
+    }
+  }
+
+  public static double larger(double a, double b){
+    return Math.max(a, b);
+  }
+
+  public static float smaller(float a, float b){
+    return Math.min(a, b);
+  }
+}
@@ -0,0 +1,49 @@
+public class Point {
+  int x;
+  int y;
+  Point next;
+
+  public Point(int x, int y){
+    this.x = x;
+    this.y = y;
+  }
+
+  public static int chain(int n){
+    Point head = null;
+    for(int i = 0; i < n; i++){
+      Point p = new Point(i, 2 * i);
+      p.next = head;
+      head = p;
+    }
+    int s = 0;
+    while(head != null){
+      s += head.x + head.y;
+      head = head.next;
+    }
+    return s;
+  }
+
+  public static int churn(int n){
+    int s = 0;
+    for(int i = 0; i < n; i++){
+      Point p = new Point(i, i);
+      s += p.x;
+    }
+    return s;
+  }
+
+  public static int sum3(int x, int y, int z){
+    Point3 p = new Point3(x, y, z);
+    Point q = p;
+    return q.x + q.y + p.z;
+  }
+}
+
+class Point3 extends Point {
+  int z;
+
+  Point3(int x, int y, int z){
+    super(x, y);
+    this.z = z;
+  }
+}
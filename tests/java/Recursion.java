@@ -0,0 +1,39 @@
+public class Recursion {
+  static int calls;
+
+  public static int sum(int n){
+    if(n == 0){
+      return 0;
+    }
+    return n + sum(n - 1);
+  }
+
+  public static int forever(int n){
+    return forever(n + 1);
+  }
+
+  // a and b are mutually recursive, a is impure through c
+  public static int a(int n){
+    if(n <= 0){
+      return 0;
+    }
+    return b(n - 1) + c(n);
+  }
+
+  public static int b(int n){
+    return a(n);
+  }
+
+  public static int c(int n){
+    calls++;
+    return n;
+  }
+
+  public static int even(int n){
+    return n == 0 ? 1 : odd(n - 1);
+  }
+
+  public static int odd(int n){
+    return n == 0 ? 0 : even(n - 1);
+  }
+}
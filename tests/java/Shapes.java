@@ -0,0 +1,176 @@
+interface Named {
+  String name();
+
+  default String label(){
+    return "<".concat(name()).concat(">");
+  }
+}
+
+interface Sized extends Named {
+  int area();
+}
+
+abstract class Shape implements Sized {
+  public String name(){
+    return "shape";
+  }
+
+  public abstract int area();
+
+  public int doubled(){
+    return 2 * area();
+  }
+
+  public final int sides(){
+    return corners();
+  }
+
+  int corners(){
+    return 0;
+  }
+}
+
+class Square extends Shape {
+  int side;
+
+  Square(int side){
+    this.side = side;
+  }
+
+  public String name(){
+    return "square";
+  }
+
+  public int area(){
+    return side * side;
+  }
+
+  int corners(){
+    return 4;
+  }
+}
+
+class Rect extends Square {
+  int height;
+
+  Rect(int width, int height){
+    super(width);
+    this.height = height;
+  }
+
+  public int area(){
+    return side * height;
+  }
+
+  public String name(){
+    return "rect of ".concat(super.name());
+  }
+}
+
+class Circle extends Shape {
+  int r;
+
+  Circle(int r){
+    this.r = r;
+  }
+
+  public int area(){
+    return 3 * r * r;
+  }
+
+  private int secret(){
+    return r;
+  }
+
+  public int reveal(){
+    return secret();
+  }
+}
+
+public class Shapes {
+  static Shape make(int i){
+    switch(i % 3){
+      case 0: return new Square(i);
+      case 1: return new Rect(i, 2);
+      default: return new Circle(i);
+    }
+  }
+
+  public static int total(int n){
+    int t = 0;
+    for(int i = 0; i < n; i++){
+      t += make(i).area();
+    }
+    return t;
+  }
+
+  public static int totalSized(int n){
+    int t = 0;
+    for(int i = 0; i < n; i++){
+      Sized s = make(i);
+      t += s.area();
+    }
+    return t;
+  }
+
+  public static int squares(int n){
+    int t = 0;
+    for(int i = 0; i < n; i++){
+      Shape s = new Square(i);
+      t += s.area();
+    }
+    return t;
+  }
+
+  public static String labels(){
+    Named a = new Square(1);
+    Named b = new Circle(1);
+    Named c = new Rect(1, 1);
+    return a.label().concat(b.label()).concat(c.label());
+  }
+
+  public static int doubled(int i){
+    return make(i).doubled();
+  }
+
+  public static int sides(){
+    return new Square(1).sides() + 10 * new Circle(1).sides();
+  }
+
+  public static int reveal(int r){
+    return new Circle(r).reveal();
+  }
+
+  public static int kinds(int n){
+    int t = 0;
+    for(int i = 0; i < n; i++){
+      Named s = make(i);
+      if(s instanceof Square) t += 1;
+      if(s instanceof Rect) t += 10;
+      if(s instanceof Sized) t += 100;
+      if(s instanceof Circle) t += 1000;
+    }
+    return t;
+  }
+
+  public static int side(int i){
+    Named s = make(i);
+    return ((Square) s).side;
+  }
+
+  public static int nulls(){
+    Named s = null;
+    Square q = (Square) s;
+    return (s instanceof Shape ? 1 : 0) + (q == null ? 10 : 0);
+  }
+
+  public static int arrays(){
+    Named[] named = new Square[2];
+    int t = 0;
+    if(named instanceof Square[]) t += 1;
+    if(named instanceof Rect[]) t += 10;
+    if(named instanceof Sized[]) t += 100;
+    Shape[] shapes = (Shape[]) named;
+    return t + 1000 * shapes.length;
+  }
+}
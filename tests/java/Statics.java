@@ -0,0 +1,108 @@
+public class Statics implements Limits {
+    static final int LIMIT = 100;
+    static final String NAME = "statics";
+    static int zero;
+    static int counter;
+    static int total;
+    static int[] squares;
+
+    static {
+        squares = new int[16];
+        for (int i = 0; i < squares.length; i++) {
+            squares[i] = i * i;
+        }
+        counter = 5;
+    }
+
+    static int next() {
+        counter++;
+        return counter;
+    }
+
+    static int square(int i) {
+        return squares[i];
+    }
+
+    static int accumulate(int n) {
+        for (int i = 0; i < n; i++) {
+            total += i;
+        }
+        return total;
+    }
+
+    static String order() {
+        return Derived.get() + " " + Derived.value + " " + Trace.log;
+    }
+
+    static int table(int i) {
+        return TABLE[i];
+    }
+
+    static int count(int n) {
+        for (int i = 0; i < n; i++) {
+            new Counted();
+        }
+        return Counted.instances;
+    }
+
+    static int lazy(boolean use) {
+        if (use) {
+            return Broken.value;
+        }
+        return 0;
+    }
+
+    static int broken() {
+        try {
+            return Broken.value;
+        } catch (ExceptionInInitializerError e) {
+            return -1;
+        } catch (NoClassDefFoundError e) {
+            return -2;
+        }
+    }
+}
+
+interface Limits {
+    int[] TABLE = {3, 1, 4, 1, 5};
+}
+
+class Trace {
+    static String log = "";
+
+    static void add(String s) {
+        log = log + s + ";";
+    }
+}
+
+class Base {
+    static int value = 1;
+
+    static {
+        Trace.add("Base");
+    }
+}
+
+class Derived extends Base {
+    static int value2 = 2;
+
+    static {
+        Trace.add("Derived");
+    }
+
+    static int get() {
+        return value2;
+    }
+}
+
+class Counted {
+    static int instances = 10;
+
+    Counted() {
+        instances++;
+    }
+}
+
+class Broken {
+    static int value = 10 / Statics.zero;
+}
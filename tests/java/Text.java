@@ -0,0 +1,34 @@
+public class Text {
+  public static int parse(String s){
+    return Integer.parseInt(s) + Integer.parseInt("ff", 16);
+  }
+
+  public static int checksum(String s){
+    int h = 0;
+    for(int i = 0; i < s.length(); i++){
+      h = 31 * h + s.charAt(i);
+    }
+    return h == s.hashCode() ? Math.abs(h) : -1;
+  }
+
+  public static String shout(String s){
+    return s.trim().toUpperCase().substring(1);
+  }
+
+  public static void report(int n, boolean ok, char c){
+    System.out.print("n=");
+    System.out.println(n);
+    System.out.println(ok);
+    System.out.println(c);
+    System.err.println("done");
+  }
+
+  public static String join(int n){
+    StringBuilder sb = new StringBuilder();
+    for(int i = 0; i < n; i++){
+      sb.append(i).append(',');
+    }
+    sb.setLength(sb.length() - 1);
+    return sb.insert(0, '[').append("]").toString();
+  }
+}
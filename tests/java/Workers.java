@@ -0,0 +1,189 @@
+class Buffer {
+  int value;
+  boolean full;
+
+  synchronized void put(int v) throws InterruptedException {
+    while(full){
+      wait();
+    }
+    value = v;
+    full = true;
+    notifyAll();
+  }
+
+  synchronized int take() throws InterruptedException {
+    while(!full){
+      wait();
+    }
+    full = false;
+    notifyAll();
+    return value;
+  }
+}
+
+class Producer implements Runnable {
+  Buffer buffer;
+  int n;
+
+  Producer(Buffer buffer, int n){
+    this.buffer = buffer;
+    this.n = n;
+  }
+
+  public void run(){
+    try {
+      for(int i = 1; i <= n; i++){
+        buffer.put(i);
+      }
+    } catch(InterruptedException e){
+    }
+  }
+}
+
+class Consumer implements Runnable {
+  Buffer buffer;
+  int n;
+  int sum;
+
+  Consumer(Buffer buffer, int n){
+    this.buffer = buffer;
+    this.n = n;
+  }
+
+  public void run(){
+    try {
+      for(int i = 0; i < n; i++){
+        sum += buffer.take();
+      }
+    } catch(InterruptedException e){
+    }
+  }
+}
+
+class Adder extends Thread {
+  Workers counter;
+  int n;
+  boolean locking;
+
+  Adder(Workers counter, int n, boolean locking){
+    this.counter = counter;
+    this.n = n;
+    this.locking = locking;
+  }
+
+  public void run(){
+    for(int i = 0; i < n; i++){
+      if(locking){
+        synchronized(counter){
+          int c = counter.count;
+          Thread.yield();
+          counter.count = c + 1;
+        }
+      }else{
+        int c = counter.count;
+        Thread.yield();
+        counter.count = c + 1;
+      }
+    }
+  }
+}
+
+class Locker extends Thread {
+  Workers first;
+  Workers second;
+
+  Locker(Workers first, Workers second){
+    this.first = first;
+    this.second = second;
+  }
+
+  public void run(){
+    synchronized(first){
+      Thread.yield();
+      synchronized(second){
+        second.count++;
+      }
+    }
+  }
+}
+
+class Failer extends Thread {
+  Workers counter;
+  int divisor;
+
+  Failer(Workers counter, int divisor){
+    this.counter = counter;
+    this.divisor = divisor;
+  }
+
+  public void run(){
+    synchronized(counter){
+      counter.count = 10 / divisor;
+    }
+  }
+}
+
+public class Workers {
+  int count;
+
+  public static int pipeline(int n) throws InterruptedException {
+    Buffer buffer = new Buffer();
+    Consumer c1 = new Consumer(buffer, n / 2);
+    Consumer c2 = new Consumer(buffer, n - n / 2);
+    Thread t1 = new Thread(c1);
+    Thread t2 = new Thread(c2);
+    Thread producer = new Thread(new Producer(buffer, n));
+    t1.start();
+    t2.start();
+    producer.start();
+    t1.join();
+    t2.join();
+    producer.join();
+    return c1.sum + c2.sum;
+  }
+
+  public static int count(int n, boolean locking) throws InterruptedException {
+    Workers counter = new Workers();
+    Adder a = new Adder(counter, n, locking);
+    Adder b = new Adder(counter, n, locking);
+    a.start();
+    b.start();
+    a.join();
+    b.join();
+    return counter.count;
+  }
+
+  public static int failing(int n) throws InterruptedException {
+    Workers counter = new Workers();
+    Failer failer = new Failer(counter, 0);
+    Adder adder = new Adder(counter, n, true);
+    failer.start();
+    adder.start();
+    failer.join();
+    adder.join();
+    return counter.count;
+  }
+
+  public static int sleeper(int ms) throws InterruptedException {
+    Thread.sleep(ms);
+    Thread.sleep(4L);
+    long one = 1L;
+    Thread.sleep(one);
+    Workers w = new Workers();
+    synchronized(w){
+      w.wait(10);
+    }
+    return ms;
+  }
+
+  public static synchronized int twice(int n){
+    return 2 * n;
+  }
+
+  public static void deadlock(){
+    Workers a = new Workers();
+    Workers b = new Workers();
+    new Locker(a, b).start();
+    new Locker(b, a).start();
+  }
+}
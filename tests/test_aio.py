@@ -0,0 +1,66 @@
+import asyncio
+import io
+import pytest
+from python_jvm.aio import AsyncVM
+from python_jvm.executer import load_classes
+
+
+def test_concurrent_invocations():
+    cfs = load_classes('./tests/java/*.class')
+    vm = AsyncVM(cfs, budget=100)
+
+    async def main():
+        return await asyncio.gather(*[vm.invoke_static('Kernels', 'sumTo', [n]) for n in range(0, 1000, 50)])
+
+    assert asyncio.run(main()) == [sum(i * i for i in range(n)) for n in range(0, 1000, 50)]
+    # every invocation gave the loop back many times
+    assert vm.stats.switches > 100
+    assert vm.threads == []
+
+
+def test_timeout_and_cancel():
+    cfs = load_classes('./tests/java/*.class')
+    vm = AsyncVM(cfs, budget=100)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await vm.invoke_static('Kernels', 'collatz', [0], timeout=0.05)  # never returns
+        # the threads started by the invocation are stopped too, and their monitors released
+        task = asyncio.ensure_future(vm.invoke_static('Workers', 'pipeline', [1 << 20]))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        return await vm.invoke_static('Workers', 'pipeline', [100])
+
+    assert asyncio.run(main()) == 5050
+    assert vm.threads == [] and vm.heap.monitors == {}
+
+
+class Writer:
+    def __init__(self):
+        self.data = b''
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+        await asyncio.sleep(0)
+
+
+def test_output():
+    cfs = load_classes('./tests/java/*.class')
+    vm = AsyncVM(cfs)
+    out = io.StringIO()
+    writer = Writer()
+
+    async def main():
+        await asyncio.gather(vm.invoke_static('Print', 'print', [1], stdout=out),
+                             vm.invoke_static('Print', 'print', [2], stdout=writer))
+
+    asyncio.run(main())
+    assert out.getvalue() == '1\n'
+    assert writer.data == b'2\n' and writer.drains == 1
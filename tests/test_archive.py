@@ -0,0 +1,30 @@
+import glob
+import os
+import shutil
+from python_jvm.archive import ClassArchive, create_archive
+from python_jvm.executer import execute, find_method
+
+
+def test_archive(tmp_path):
+    for f in glob.glob('./tests/java/*.class'):
+        shutil.copy(f, tmp_path)
+    path = str(tmp_path / 'test.jsa')
+    index = create_archive(path, files=sorted(glob.glob(str(tmp_path / '*.class'))))
+    assert len(index) == len(glob.glob(str(tmp_path / '*.class')))
+    assert {"HelloWorld", "Kernels", "java/lang/Object", "Person", "Point", "Point3"} <= index.keys()
+
+    archive = ClassArchive(path)
+    assert archive.loaded == {}
+    method = find_method(archive, 'HelloWorld', 'fibonacci', '(I)I')
+    assert method.code.instructions is not None  # decoded at archive creation
+    assert execute(method.code, archive, 'HelloWorld', [10], {}) == 89
+    assert archive.loaded.keys() == {'HelloWorld'}
+    archive.close()
+
+    # a modified source invalidates its entry
+    st = os.stat(tmp_path / 'Person.class')
+    os.utime(tmp_path / 'Person.class', ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    archive = ClassArchive(path)
+    assert 'Person' not in archive
+    assert 'HelloWorld' in archive
+    archive.close()
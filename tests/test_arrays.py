@@ -0,0 +1,104 @@
+import pytest
+from python_jvm import natives
+from python_jvm.executer import Thread, load_classes, resolve_method, run_main
+from python_jvm.heap import Heap, NegativeArraySizeError, OutOfMemoryError, PrimitiveArray, ReferenceArray
+from python_jvm.natives import ArrayIndexOutOfBoundsError, ArrayStoreError, NullPointerError, find_native
+
+
+def _random(n, seed):
+    a = []
+    for _ in range(n):
+        seed = ((seed * 1103515245 + 12345 + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+        a.append(((seed & 0xFFFFFFFF) >> 16) & 0x7FFF)
+    return a
+
+
+def _checksum(a):
+    h = 0
+    for v in a:
+        h = ((31 * h + v + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+    return h
+
+
+def test_new_array():
+    heap = Heap()
+    ints = heap.new_array('[I', 1000000)
+    assert isinstance(ints, PrimitiveArray) and (ints.typecode, ints.itemsize) == ('i', 4)
+    assert ints.buffer_info()[1] == 1000000 and ints[999999] == 0
+    assert heap.bytes_live == 16 + 4000000
+    assert heap.new_array('[Z', 3).typecode == 'B'
+    assert heap.new_array('[D', 2).tolist() == [0.0, 0.0]
+    strings = heap.new_array('[Ljava/lang/String;', 2)
+    assert isinstance(strings, ReferenceArray) and list(strings) == [None, None]
+    assert strings.descriptor == '[Ljava/lang/String;'
+    assert heap.new_array('[I', 0) is not heap.new_array('[I', 0)
+    with pytest.raises(NegativeArraySizeError):
+        heap.new_array('[I', -1)
+    with pytest.raises(OutOfMemoryError):
+        Heap(max_bytes=1000).new_array('[J', 1000)
+
+
+def test_gc():
+    heap = Heap()
+    outer = heap.new_array('[[I', 2)
+    outer[1] = inner = heap.new_array('[I', 10)
+    heap.new_array('[I', 10)
+    heap.roots.append([outer])
+    assert heap.collect().objects_live == 2
+    assert heap.objects == [outer, inner]
+    assert heap.bytes_live == outer.size + inner.size
+
+
+def test_array_natives():
+    heap = Heap()
+    a = heap.new_array('[I', 6)
+    a[:] = PrimitiveArray('i', range(6))
+    arraycopy = find_native('java/lang/System', 'arraycopy', '(Ljava/lang/Object;ILjava/lang/Object;II)V').fn
+    arraycopy(a, 0, a, 1, 4)
+    assert a.tolist() == [0, 0, 1, 2, 3, 5]
+    with pytest.raises(ArrayIndexOutOfBoundsError):
+        arraycopy(a, 3, a, 0, 4)
+    with pytest.raises(ArrayStoreError):
+        arraycopy(a, 0, heap.new_array('[J', 6), 0, 1)
+    with pytest.raises(NullPointerError):
+        arraycopy(None, 0, a, 0, 1)
+
+    find_native('java/util/Arrays', 'fill', '([IIII)V').fn(a, 1, 3, 7)
+    assert a.tolist() == [0, 7, 7, 2, 3, 5]
+    find_native('java/util/Arrays', 'sort', '([I)V').fn(a)
+    assert a.tolist() == [0, 2, 3, 5, 7, 7]
+    d = PrimitiveArray('d', [float('nan'), 0.0, -0.0, -1.0])
+    find_native('java/util/Arrays', 'sort', '([D)V').fn(d)
+    assert find_native('java/util/Arrays', 'toString', '([D)Ljava/lang/String;').fn(d) == '[-1.0, -0.0, 0.0, NaN]'
+    assert find_native('java/util/Arrays', 'equals', '([I[I)Z').fn(a, PrimitiveArray('i', [0, 2, 3, 5, 7, 7]))
+
+
+def test_java_arrays():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+
+    def call(name, descriptor, *args):
+        return thread.invoke(resolve_method(cfs, 'ArrayKernels', name, descriptor, False), list(args))
+
+    assert call('sumSquares', '(I)I', 1000) == sum(i * i for i in range(1000))
+    expected = _checksum(sorted(_random(500, 7)))
+    assert call('insertionSort', '(II)I', 500, 7) == expected
+    assert call('nativeSort', '(II)I', 500, 7) == expected
+    assert call('histogram', '(Ljava/lang/String;)I', 'mississippi') == 8004  # 4 x i
+    assert call('bytes', '(I)I', 50) == 0xFFFF + sum(((i * 7 + 0x80) & 0xFF) - 0x80 for i in range(50))
+    assert call('trace', '(I)I', 5) == 60
+    assert call('copy', '(I)Ljava/lang/String;', 5) == '[0, 0, 5, 5, 5]'
+    assert call('badArguments', '(I)I', 4) == 1111  # caught as NullPointerException and IllegalArgumentException
+    with pytest.raises(ArrayIndexOutOfBoundsError):
+        call('outOfBounds', '(I)I', 4)
+    with pytest.raises(ArrayIndexOutOfBoundsError):
+        call('outOfBounds', '(I)I', -1)
+
+
+def test_main(capsys):
+    cfs = load_classes('./tests/java/*.class')
+    natives.flush()
+    capsys.readouterr()
+    run_main(cfs, 'ArrayKernels', ['a', 'b'])
+    natives.flush()
+    assert capsys.readouterr().out == '2\na\nb\n'
@@ -0,0 +1,67 @@
+import json
+import shutil
+from python_jvm.batch import BatchRunner, main, run_batch
+from python_jvm.executer import load_classes
+
+
+def _collatz(n):
+    steps = 0
+    while n != 1:
+        n = n // 2 if n % 2 == 0 else 3 * n + 1
+        steps += 1
+    return steps
+
+
+def test_run_batch():
+    cfs = load_classes('./tests/java/*.class')
+    results = run_batch(cfs, 'Kernels', 'collatz', [[n] for n in range(1, 200)], workers=2)
+    assert [r.index for r in results] == list(range(199))
+    assert [r.result for r in results] == [_collatz(n) for n in range(1, 200)]
+    assert len({r.worker for r in results}) <= 2
+
+
+def test_runner():
+    cfs = load_classes('./tests/java/*.class')
+    with BatchRunner(cfs, 'Recursion', 'sum', '(I)I', workers=2, chunksize=4) as runner:
+        assert runner.linked > 10
+        results = list(runner.run([[n] for n in [10, 100000, 20, 30]], ordered=False))
+        assert sorted(r.index for r in results) == [0, 1, 2, 3]
+        failed = next(r for r in results if r.index == 1)
+        assert failed.error.startswith('StackOverflowError')
+        # the pool is reused
+        assert [r.result for r in runner.run([[3], [4]])] == [6, 10]
+    assert sum(s.inputs for s in runner.stats.values()) == 6
+    assert sum(s.errors for s in runner.stats.values()) == 1
+    assert all(s.throughput > 0 for s in runner.stats.values())
+
+    # in this process
+    with BatchRunner(cfs, 'HelloWorld', 'show', workers=1) as runner:
+        assert [r.stdout for r in runner.run([[], []])] == ['show string\n'] * 2
+
+
+def test_arguments():
+    cfs = load_classes('./tests/java/*.class')
+    # json lists are java arrays, the arguments are converted by the descriptor
+    with BatchRunner(cfs, 'ArrayKernels', 'main', '([Ljava/lang/String;)V', workers=1) as runner:
+        results = list(runner.run([[['zebra']], [['a', 'b']], [[]], ['zebra'], [[1]], []]))
+    assert [r.stdout for r in results[:3]] == ['1\nzebra\n', '2\na\nb\n', '0\n']
+    assert [r.error for r in results[3:]] == [
+        "ArgumentError: 'zebra' is not a [Ljava/lang/String;",
+        "ArgumentError: 1 is not a Ljava/lang/String;",
+        'ArgumentError: ArrayKernels.main([Ljava/lang/String;)V takes 1 arguments, not 0']
+    with BatchRunner(cfs, 'ArrayKernels', 'checksum', '([I)I', workers=1) as runner:
+        results = list(runner.run([[[1, 2, 3]], [[0x80000000]], [['1']]]))
+    assert results[0].result == (31 * 1 + 2) * 31 + 3
+    assert [r.error for r in results[1:]] == ['ArgumentError: 2147483648 is not a I', "ArgumentError: '1' is not a I"]
+
+
+def test_main(tmp_path, capsys):
+    classes = tmp_path / 'classes'
+    classes.mkdir()
+    shutil.copy('./tests/java/Kernels.class', classes)
+    inputs = tmp_path / 'inputs.jsonl'
+    inputs.write_text('[1071, 462]\n\n[10, 4]\n')
+    main(['-cp', str(classes), '-j', '2', 'Kernels.gcd(II)I', str(inputs)])
+    out = capsys.readouterr()
+    assert [json.loads(line) for line in out.out.splitlines()] == [{'index': 0, 'result': 21}, {'index': 1, 'result': 2}]
+    assert '2 inputs in' in out.err
@@ -1,5 +1,7 @@
+import glob
 from _pytest.config import main
 import pytest
+from python_jvm import natives
 from python_jvm.class_parser import read_classfile
 from python_jvm.executer import execute, find_code, find_method, load_classes
 import subprocess
@@ -18,31 +20,26 @@ def test_read_classfile(classfile_path):
     read_classfile(classfile_path)
 
 
-def test_load_classes():
-    actual = load_classes('./tests/java/*.class')
-    assert actual.keys() == {"HelloWorld", "Print", "java/lang/Object", "Person"}
+def test_index_classfile():
+    cf = read_classfile('./tests/java/Person.class')
+    assert cf.name == 'Person'
+    assert cf.method_index.keys() == {('<init>', '(Ljava/lang/String;I)V'), ('getName', '()Ljava/lang/String;')}
+    assert cf.field_index == {'name': 0, 'age': 1}
+    assert cf.method_index[('getName', '()Ljava/lang/String;')].code.max_locals == 1
 
 
-stdout = ""
+def test_load_classes():
+    actual = load_classes('./tests/java/*.class')
+    # one class per file, Object.class is java/lang/Object
+    assert len(actual) == len(glob.glob('./tests/java/*.class'))
+    assert {"HelloWorld", "Kernels", "java/lang/Object", "Person", "Point", "Point3"} <= actual.keys()
 
 
-def test_execute_classfile(classfile_path, mocker):
-    global stdout
+def test_execute_classfile(classfile_path, capsys):
     cfs = load_classes('./tests/java/*.class')
-    cf = read_classfile(classfile_path)
     main_method = find_method(cfs, 'HelloWorld', 'main')
 
-    stdout = ""
-
-    def append_stdout(text):
-        global stdout
-        stdout += str(text) + "\n"
     if main_method:
-        mocker.patch("python_jvm.executer.std_method", {
-            'java/io/PrintStream': {
-                'println': lambda x: append_stdout(x[0])
-            }
-        })
         target_class = ''.join(classfile_path.split('.')[:-1]).split('/')[-1]
         expected = subprocess.check_output(
             f'cd ./tests/java; java -cp . {target_class}',
@@ -50,5 +47,10 @@ def test_execute_classfile(classfile_path, mocker):
             # stderr=subprocess.STDOUT,
             cwd='.').decode()
         main_method_code = find_code(main_method, cfs, 'HelloWorld')
+        natives.flush()
+        capsys.readouterr()
         execute(main_method_code, cfs, 'HelloWorld', [None for _ in range(main_method_code.max_locals)], {})
-        assert stdout == expected
+        # System.out is buffered
+        assert capsys.readouterr().out == ''
+        natives.flush()
+        assert capsys.readouterr().out == expected
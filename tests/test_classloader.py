@@ -0,0 +1,55 @@
+import glob
+import os
+import zipfile
+import pytest
+from python_jvm.classloader import ClassLoader, bulk_load
+from python_jvm.class_parser import read_classfile
+from python_jvm.executer import execute, find_method
+
+
+@pytest.fixture(params=['jar', 'directory'])
+def classpath(request, tmp_path):
+    # lay the test classes out by their class names, as javac -d would
+    files = {read_classfile(f).name: f for f in glob.glob('./tests/java/*.class')}
+    if request.param == 'jar':
+        path = str(tmp_path / 'test.jar')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as jar:
+            for name, f in files.items():
+                jar.write(f, name + '.class')
+        return path
+    for name, f in files.items():
+        dst = tmp_path / (name + '.class')
+        os.makedirs(dst.parent, exist_ok=True)
+        dst.write_bytes(open(f, 'rb').read())
+    return str(tmp_path)
+
+
+def test_class_loader_is_lazy(classpath):
+    loader = ClassLoader(classpath)
+    assert len(set(loader)) == len(glob.glob('./tests/java/*.class'))
+    assert {"HelloWorld", "Kernels", "java/lang/Object", "Person", "Point", "Point3"} <= set(loader)
+    assert 'Person' in loader
+    assert 'Missing' not in loader
+    assert loader.loaded == {}
+
+    method = find_method(loader, 'HelloWorld', 'fibonacci', '(I)I')
+    assert execute(method.code, loader, 'HelloWorld', [10], {}) == 89
+    assert loader.loaded.keys() == {'HelloWorld'}
+
+    with pytest.raises(KeyError):
+        loader['Missing']
+    loader.close()
+
+
+def test_bulk_load(tmp_path):
+    broken = tmp_path / 'Broken.class'
+    broken.write_bytes(b'\xca\xfe\xba\xbe')
+    sources = [(f, None) for f in sorted(glob.glob('./tests/java/*.class'))] + [(str(broken), None)]
+    result = bulk_load(sources, workers=2)
+    assert len(result.classes) == len(sources) - 1
+    assert {"HelloWorld", "Kernels", "java/lang/Object", "Person", "Point", "Point3"} <= result.classes.keys()
+    assert result.failures.keys() == {str(broken)}
+    assert result.timings.keys() == {path for path, _ in sources}
+
+    method = find_method(result.classes, 'HelloWorld', 'fibonacci', '(I)I')
+    assert execute(method.code, result.classes, 'HelloWorld', [10], {}) == 89
@@ -0,0 +1,64 @@
+import pytest
+from python_jvm.executer import Thread, load_classes, resolve_method
+from python_jvm.memo import MethodCache
+
+
+@pytest.mark.parametrize('name, descriptor, args', [
+    ('sumTo', '(I)I', [1000]),
+    ('collatz', '(I)I', [27]),
+    ('gcd', '(II)I', [1071, 462]),
+    ('hash', '(I)I', [5000]),
+    ('season', '(I)I', [7]),
+    ('seasons', '(I)I', [100]),
+])
+def test_compiled_matches_interpreter(name, descriptor, args):
+    cfs = load_classes('./tests/java/*.class')
+    target = resolve_method(cfs, 'Kernels', name, descriptor, False)
+    expected = Thread(cfs, compile_threshold=None).invoke(target, args)
+    assert target.code.compiled is None
+
+    assert Thread(cfs, compile_threshold=1).invoke(target, args) == expected
+    assert target.code.compiled
+    assert Thread(cfs).invoke(target, args) == expected
+
+
+def test_not_compilable():
+    cfs = load_classes('./tests/java/*.class')
+    chain = resolve_method(cfs, 'Point', 'chain', '(I)I', False)
+    assert Thread(cfs, compile_threshold=1).invoke(chain, [50]) == 3 * sum(range(50))
+    assert chain.code.compiled is False
+
+
+def test_deep_compiled_recursion():
+    cfs = load_classes('./tests/java/*.class')
+    target = resolve_method(cfs, 'Recursion', 'sum', '(I)I', False)
+    thread = Thread(cfs, max_depth=5001, compile_threshold=1)
+    assert thread.invoke(target, [5000]) == 5000 * 5001 // 2
+    assert target.code.compiled and thread.compiled_depth == 0
+
+
+def test_on_stack_replacement():
+    cfs = load_classes('./tests/java/*.class')
+    target = resolve_method(cfs, 'Kernels', 'sumTo', '(I)I', False)
+    expected = Thread(cfs, compile_threshold=None).invoke(target, [2000])
+    # compiled at the 50th iteration of the first call, which continues in the compiled code
+    thread = Thread(cfs, compile_threshold=50)
+    assert thread.invoke(target, [2000]) == expected
+    assert target.code.compiled and target.code.invocations == 1
+    assert thread.frames == []
+    # the frame continued in the compiled code still records its result
+    target.code.memo = MethodCache(target.label)
+    assert thread.invoke(target, [2000]) == expected
+    assert dict(target.code.memo.entries) == {(2000,): expected}
+
+
+def test_division_order():
+    cfs = load_classes('./tests/java/*.class')
+    target = resolve_method(cfs, 'Kernels', 'divideFirst', '(II)I', False)
+    thread = Thread(cfs, compile_threshold=1)
+    assert thread.invoke(target, [7, 2]) == 4
+    assert target.code.compiled
+    c = cfs['Kernels']
+    with pytest.raises(ZeroDivisionError):
+        thread.invoke(target, [7, 0])
+    assert c.statics[c.static_layout.slots['ticks']] == 1
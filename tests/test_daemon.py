@@ -0,0 +1,62 @@
+import asyncio
+import contextlib
+import pytest
+from python_jvm.daemon import Client, Daemon, DaemonError, main
+from python_jvm.executer import load_classes
+
+
+def test_handle():
+    cfs = load_classes('./tests/java/*.class')
+    # compiled code is not interrupted by the timeout, collatz(0) has to stay interpreted
+    daemon = Daemon(cfs, timeout=1.0, compile_threshold=None)
+    assert daemon.warm_up() > 10
+
+    async def run():
+        return [await daemon.handle(r) for r in [
+            ['Kernels.gcd(II)I', 1071, 462],
+            ['HelloWorld.show'],
+            ['Point.chain(I)I', 100],
+            ['Kernels.collatz(I)I', 0],
+            ['Kernels.nothing'],
+            'Kernels.gcd',
+        ]]
+
+    gcd, show, chain, collatz, nothing, malformed = asyncio.run(run())
+    assert gcd['result'] == 21 and gcd['stdout'] == ''
+    assert show == {'result': None, 'stdout': 'show string\n', 'ms': show['ms']}
+    assert 'result' in chain
+    assert collatz['error'] == 'timed out after 1.0s'
+    assert 'not found' in nothing['error']
+    assert 'error' in malformed
+    assert (daemon.requests, daemon.errors) == (6, 3)
+    # every request allocated from a heap of its own
+    assert daemon.vm.heap.allocated == 0
+
+
+def test_socket(tmp_path, capsys):
+    cfs = load_classes('./tests/java/*.class')
+    daemon = Daemon(cfs)
+    path = str(tmp_path / 'jvm.sock')
+
+    def calls():
+        with Client(path) as client:
+            assert client.invoke('Kernels.sumTo(I)I', 10) == 285
+            assert client.invoke('HelloWorld.fibonacci', 15) == 987
+            with pytest.raises(DaemonError):
+                client.invoke('Nothing.run()V')
+        main(['call', path, 'HelloWorld.add(II)I', '1', '30'])
+
+    async def run():
+        ready = asyncio.Event()
+        server = asyncio.create_task(daemon.serve(path, ready))
+        await ready.wait()
+        try:
+            await asyncio.to_thread(calls)
+        finally:
+            server.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await server
+
+    asyncio.run(run())
+    assert capsys.readouterr().out == '31\n'
+    assert daemon.requests == 4
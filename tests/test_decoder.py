@@ -0,0 +1,31 @@
+import pytest
+from python_jvm.decoder import decode
+
+
+@pytest.mark.parametrize('code, expected', [
+    # iconst_1 istore_1 return
+    (bytes.fromhex('043cb1'), [(0, 0x04, 1), (1, 0x3c, 1), (2, 0xb1, None)]),
+    # bipush -1, sipush 1000
+    (bytes.fromhex('10ff1103e8'), [(0, 0x10, -1), (2, 0x11, 1000)]),
+    # iload_0 ifne +5 iconst_0 ireturn iconst_1 ireturn
+    (bytes.fromhex('1a9a000503ac04ac'), [(0, 0x1a, 0), (1, 0x9a, 4), (4, 0x03, 0), (5, 0xac, None), (6, 0x04, 1), (7, 0xac, None)]),
+    # goto 0 (backward branch)
+    (bytes.fromhex('00a7ffff'), [(0, 0x00, None), (1, 0xa7, 0)]),
+    # wide iinc 300 -2, wide iload 300
+    (bytes.fromhex('c484012cfffec415012c'), [(0, 0x84, (300, -2)), (6, 0x15, 300)]),
+])
+def test_decode(code, expected):
+    assert [tuple(ins) for ins in decode(code)] == expected
+
+
+def test_decode_tableswitch():
+    # iload_0 tableswitch(pad 2) default:+27 low:0 high:1 [+23, +24] ; nop x4 ; return
+    code = bytes.fromhex('1aaa0000' '0000001b' '00000000' '00000001' '00000017' '00000018' '00000000' 'b1')
+    instructions = decode(code)
+    assert instructions[1].operand == (6, 0, (2, 3))
+    assert instructions[6].pc == 28
+
+
+def test_decode_unknown_branch_target():
+    with pytest.raises(Exception):
+        decode(bytes.fromhex('a70002b1'))
@@ -0,0 +1,97 @@
+import pytest
+from python_jvm.executer import (InlineCache, Thread, TypeCheck, find_virtual, is_assignable, load_classes, resolve_method,
+                                 vtable_of)
+from python_jvm.heap import layout_of
+from python_jvm.natives import ClassCastError
+
+
+def _area(i):
+    return [i * i, i * 2, 3 * i * i][i % 3]
+
+
+def _caches(cfs, _class, name):
+    code = next(m.code for m in cfs[_class].methods if m.name == name)
+    return [operand for _, operand in code.instructions if isinstance(operand, InlineCache)]
+
+
+def test_hierarchy():
+    cfs = load_classes('./tests/java/*.class')
+    assert cfs['Rect'].super_name == 'Square'
+    assert cfs['Shape'].interface_names == ['Sized']
+    assert cfs['Sized'].interface_names == ['Named']
+    assert cfs['Sized'].is_interface and not cfs['Shape'].is_interface
+
+
+def test_vtables():
+    cfs = load_classes('./tests/java/*.class')
+    shape, square, rect = vtable_of(cfs, 'Shape'), vtable_of(cfs, 'Square'), vtable_of(cfs, 'Rect')
+    # an override takes the slot of the method it overrides
+    slot = shape.slots['name()Ljava/lang/String;']
+    assert square.slots['name()Ljava/lang/String;'] == rect.slots['name()Ljava/lang/String;'] == slot
+    assert shape.methods[slot].label == 'Shape.name()Ljava/lang/String;'
+    assert rect.methods[slot].label == 'Rect.name()Ljava/lang/String;'
+    assert shape.lookup('area()I') is None  # abstract
+    assert rect.lookup('corners()I').label == 'Square.corners()I'
+    assert rect.lookup('hashCode()I').native is not None  # from java/lang/Object
+    # the default method of an interface
+    assert rect.lookup('label()Ljava/lang/String;').label == 'Named.label()Ljava/lang/String;'
+    assert set(rect.itables) == {'Sized', 'Named'}
+    named = vtable_of(cfs, 'Named')
+    assert [t.label for t in rect.itables['Named']] == [rect.lookup(s).label for s in named.slots]
+    assert vtable_of(cfs, 'Circle').lookup('secret()I') is None  # private
+
+
+def test_virtual_calls():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs, compile_threshold=None)
+
+    def call(name, descriptor, *args):
+        return thread.invoke(resolve_method(cfs, 'Shapes', name, descriptor, False), list(args))
+
+    assert call('total', '(I)I', 30) == sum(_area(i) for i in range(30))
+    assert call('totalSized', '(I)I', 30) == sum(_area(i) for i in range(30))
+    assert call('squares', '(I)I', 50) == sum(i * i for i in range(50))
+    assert call('labels', '()Ljava/lang/String;') == '<square><shape><rect of square>'
+    assert [call('doubled', '(I)I', i) for i in range(3)] == [0, 4, 24]
+    assert call('sides', '()I') == 4
+    assert call('reveal', '(I)I', 7) == 7
+
+    # every call site has its own inline cache
+    [total] = _caches(cfs, 'Shapes', 'total')
+    [squares] = _caches(cfs, 'Shapes', 'squares')
+    assert total.call is squares.call
+    assert total.misses == 30  # the receiver class changes on every call
+    assert squares.misses == 1
+    assert squares.target.label == 'Square.area()I'
+
+
+def test_type_checks():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+
+    def call(name, descriptor, *args):
+        return thread.invoke(resolve_method(cfs, 'Shapes', name, descriptor, False), list(args))
+
+    # a subclass, a subclass of a subclass and an interface of a superclass
+    assert call('kinds', '(I)I', 6) == 2 * (101 + 111 + 1100)
+    assert [call('side', '(I)I', i) for i in (3, 4)] == [3, 4]
+    with pytest.raises(ClassCastError) as e:
+        call('side', '(I)I', 5)
+    assert str(e.value) == 'class Circle cannot be cast to class Square'
+    assert call('nulls', '()I') == 10  # null passes checkcast and is no instance
+    assert call('arrays', '()I') == 2101
+    assert is_assignable(cfs, '[[LRect;', '[[LNamed;') and not is_assignable(cfs, '[I', '[J')
+    assert is_assignable(cfs, 'Sized', 'Named') and not is_assignable(cfs, 'Named', 'Sized')
+    # the result for the class of the last object is kept
+    [check] = [op for _, op in cfs['Shapes'].method_index[('side', '(I)I')].code.instructions if isinstance(op, TypeCheck)]
+    assert check.class_name == 'Square' and check.layout is layout_of(cfs, 'Circle') and check.result is False
+
+
+def test_find_virtual():
+    cfs = load_classes('./tests/java/*.class')
+    assert find_virtual(cfs, 'abc', 'hashCode', '()I').native('abc') == 96354
+    square = Thread(cfs).heap.new(layout_of(cfs, 'Square'))
+    assert find_virtual(cfs, square, 'area', '()I').label == 'Square.area()I'
+    assert find_virtual(cfs, square, 'hashCode', '()I').label == 'java/lang/Object.hashCode()I'
+    with pytest.raises(Exception):
+        find_virtual(cfs, None, 'area', '()I')
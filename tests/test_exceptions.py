@@ -0,0 +1,87 @@
+import pytest
+from python_jvm.compiler import compile_method
+from python_jvm.exceptions import JavaThrowable, index_handlers, java_class
+from python_jvm.executer import StackOverflowError, Thread, find_virtual, load_classes, resolve_method
+from python_jvm.heap import layout_of
+from python_jvm.natives import IndexOutOfBoundsError
+
+
+def _method(cfs, name, descriptor):
+    return resolve_method(cfs, 'Exceptions', name, descriptor, False)
+
+
+def test_exception_table():
+    cfs = load_classes('./tests/java/*.class')
+    code = cfs['Exceptions'].method_index[('divide', '(II)I')].code
+    assert len(code.code) == code.code_length  # the exception table is not part of the bytecode
+    [entry] = code.exception_table
+    assert (entry.start_pc, entry.end_pc, entry.handler_pc) == (0, 4, 4)
+    # try { try { ... } finally { ... } } catch (RuntimeException e)
+    target = _method(cfs, 'finallyCount', '(I)I')
+    handlers = index_handlers(target.c, target.code)
+    assert handlers is target.code.handlers
+    decoded = target.code.decoded
+    athrow = next(i for i, ins in enumerate(decoded) if ins.opcode == 0xbf)
+    runtime = layout_of(cfs, 'java/lang/RuntimeException')
+    assert decoded[handlers.find(athrow, runtime)].opcode == 0x4e  # astore_3 of the finally handler
+    assert handlers.find(0, runtime) is None
+
+
+def test_catch():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    assert thread.invoke(_method(cfs, 'divide', '(II)I'), [7, 2]) == 3
+    assert thread.invoke(_method(cfs, 'divide', '(II)I'), [7, 0]) == -1
+    assert thread.invoke(_method(cfs, 'countInvalid', '(I)I'), [10]) == 4
+    assert thread.invoke(_method(cfs, 'finallyCount', '(I)I'), [5]) == 35
+    # the inner handler does not match, ArrayIndexOutOfBoundsException is an IndexOutOfBoundsException
+    assert thread.invoke(_method(cfs, 'nested', '(I)I'), [1]) == 0
+    assert thread.invoke(_method(cfs, 'nested', '(I)I'), [5]) == -2
+    assert thread.invoke(_method(cfs, 'nameLength', '(LPerson;)I'), [None]) == -1
+    assert thread.invoke(_method(cfs, 'nulls', '(LExceptions;[I[Ljava/lang/String;)I'), [None, None, None]) == 8
+    assert thread.invoke(_method(cfs, 'parseInt', '(Ljava/lang/String;)I'), ['x1']) == 0
+    cast = _method(cfs, 'cast', '(I)Ljava/lang/String;')
+    assert [thread.invoke(cast, [i]) for i in (3, 5)] == ['3', 'class Circle cannot be cast to class Square']
+    assert [thread.invoke(_method(cfs, 'kind', '(I)I'), [i]) for i in range(3)] == [11, 100, 11]
+    assert thread.frames == []
+
+
+def test_unwind():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    assert thread.invoke(_method(cfs, 'parseOr', '(Ljava/lang/String;)I'), ['123']) == 123
+    assert thread.invoke(_method(cfs, 'parseOr', '(Ljava/lang/String;)I'), ['12x4']) == -2
+    # ParseError extends java/lang/Exception
+    message = _method(cfs, 'message', '(Ljava/lang/String;)Ljava/lang/String;')
+    assert thread.invoke(message, ['12x4']) == 'not a digit'
+    assert thread.invoke(message, ['1']) == 'ok'
+    assert thread.invoke(_method(cfs, 'cause', '(I)Ljava/lang/String;'), [0]) == 'wrapped: / by zero'
+    assert thread.invoke(_method(cfs, 'deep', '(I)I'), [500]) == 7
+    assert Thread(cfs, max_depth=100).invoke(_method(cfs, 'overflow', '()I'), []) == -1
+
+
+def test_uncaught():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    with pytest.raises(JavaThrowable) as e:
+        thread.invoke(_method(cfs, 'thrower', '(I)I'), [3])
+    assert str(e.value) == 'ParseError: deep'
+    assert e.value.throwable.get('position') == 7
+    assert find_virtual(cfs, e.value.throwable, 'getMessage', '()Ljava/lang/String;').native(e.value.throwable) == 'deep'
+    assert thread.frames == []
+    # errors of the vm are raised as they are
+    with pytest.raises(IndexOutOfBoundsError):
+        thread.invoke(_method(cfs, 'digit', '(Ljava/lang/String;I)I'), ['12', 2])
+    with pytest.raises(StackOverflowError):
+        Thread(cfs, max_depth=100).invoke(_method(cfs, 'recurse', '(I)I'), [0])
+    # a TypeError on None is a bug of the vm, not a NullPointerException
+    assert java_class(TypeError("'NoneType' object is not subscriptable")) is None
+
+
+def test_not_compiled():
+    cfs = load_classes('./tests/java/*.class')
+    target = _method(cfs, 'divide', '(II)I')
+    assert compile_method(cfs, target) is None
+    assert target.code.compiled is False
+    thread = Thread(cfs, compile_threshold=1)
+    assert [thread.invoke(target, [10, b]) for b in (5, 0, 2)] == [2, -1, 5]
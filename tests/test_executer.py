@@ -0,0 +1,42 @@
+import sys
+import pytest
+from python_jvm.executer import StackOverflowError, Thread, execute, find_method, fusion_report, load_classes, resolve_method
+
+
+@pytest.fixture
+def cfs():
+    return load_classes('./tests/java/*.class')
+
+
+def test_deep_recursion(cfs):
+    # deeper than the python recursion limit
+    n = sys.getrecursionlimit() * 2
+    method = find_method(cfs, 'Recursion', 'sum', '(I)I')
+    assert execute(method.code, cfs, 'Recursion', [n], {}, max_depth=n + 1) == n * (n + 1) // 2
+
+
+def test_stack_overflow(cfs):
+    thread = Thread(cfs, max_depth=100)
+    forever = resolve_method(cfs, 'Recursion', 'forever', '(I)I', False)
+    with pytest.raises(StackOverflowError):
+        thread.invoke(forever, [0])
+    assert thread.frames == []
+
+    # the thread is usable after the error
+    sum_ = resolve_method(cfs, 'Recursion', 'sum', '(I)I', False)
+    assert thread.invoke(sum_, [99]) == 4950
+    with pytest.raises(StackOverflowError):
+        thread.invoke(sum_, [100])
+
+
+def test_superinstructions(cfs):
+    target = resolve_method(cfs, 'Kernels', 'sumTo', '(I)I', False)
+    code = target.code
+    assert code.fusions == {'iload_iload_imul': 1, 'iload_iload_if_icmplt': 1}
+    # instruction indexes are unchanged, so branch targets and pcs still match the decoded code
+    assert len(code.instructions) == len(code.unfused) == len(code.decoded)
+    assert Thread(cfs, compile_threshold=None).invoke(target, [100]) == sum(i * i for i in range(100))
+
+    report = fusion_report(cfs)
+    assert report['Kernels.sumTo(I)I'] == code.fusions
+    assert 'Kernels.collatz(I)I' not in report  # not linked yet
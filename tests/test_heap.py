@@ -0,0 +1,60 @@
+import pytest
+from python_jvm.executer import Thread, load_classes, resolve_method
+from python_jvm.heap import Heap, JavaObject, OutOfMemoryError, layout_of
+
+
+def test_layout():
+    cfs = load_classes('./tests/java/*.class')
+    point = layout_of(cfs, 'Point')
+    assert point.names == ('x', 'y', 'next')
+    assert point.defaults == (0, 0, None)
+    point3 = layout_of(cfs, 'Point3')
+    assert point3.super is point
+    assert point3.names == ('x', 'y', 'next', 'z')
+    assert point3.slots == {'x': 0, 'y': 1, 'next': 2, 'z': 3}
+    assert layout_of(cfs, 'java/lang/Object').names == ()
+
+    a, b = JavaObject(point), JavaObject(point)
+    assert a is not b and a != b  # references compare by identity
+    assert a.get('y') == 0
+
+
+def test_missing_superclass(caplog):
+    cfs = load_classes('./tests/java/*.class')
+    del cfs['java/lang/Object'], cfs['Point']
+    # java/lang/Object is the implicit root, only other missing superclasses are reported
+    point3 = layout_of(cfs, 'Point3')
+    assert point3.names == ('z',)
+    assert point3.super is None
+    assert layout_of(cfs, 'Person').super.name == 'java/lang/Object'
+    assert [r.getMessage() for r in caplog.records] == ['superclass Point of Point3 is not loaded']
+
+
+def test_objects():
+    cfs = load_classes('./tests/java/*.class')
+    heap = Heap()
+    thread = Thread(cfs, heap)
+    chain = resolve_method(cfs, 'Point', 'chain', '(I)I', False)
+    assert thread.invoke(chain, [100]) == 3 * sum(range(100))
+    assert heap.allocated == 100
+
+    sum3 = resolve_method(cfs, 'Point', 'sum3', '(III)I', False)
+    assert thread.invoke(sum3, [1, 20, 300]) == 321
+
+
+def test_gc():
+    cfs = load_classes('./tests/java/*.class')
+    heap = Heap(max_bytes=1000)
+    thread = Thread(cfs, heap)
+    churn = resolve_method(cfs, 'Point', 'churn', '(I)I', False)
+    assert thread.invoke(churn, [10000]) == sum(range(10000))
+    assert heap.stats.collections > 0
+    assert heap.stats.objects_freed > 9000
+    assert heap.bytes_live <= 1000
+
+    # a list of 1000 points is reachable until the end
+    chain = resolve_method(cfs, 'Point', 'chain', '(I)I', False)
+    with pytest.raises(OutOfMemoryError):
+        thread.invoke(chain, [1000])
+    assert thread.frames == []
+    assert heap.collect().objects_live == 0
@@ -0,0 +1,68 @@
+import pytest
+from python_jvm import natives
+from python_jvm.executer import Lambda, Thread, load_classes, resolve_method
+from python_jvm.heap import Heap, layout_of
+from python_jvm.natives import IndexOutOfBoundsError, StringBuilder, concat_formatter, find_native, intern
+
+IUO = 'Ljava/util/function/IntUnaryOperator;'
+
+
+def test_concat_formatter():
+    # the calling thread comes first
+    greet = concat_formatter('Hello \1, you are \1!', ['Ljava/lang/String;', 'I'])
+    assert greet(None, 'Ann', 3) == 'Hello Ann, you are 3!'
+    describe = concat_formatter('\1/\1/\1', ['C', 'Z', 'Ljava/lang/Object;'])
+    assert describe(None, ord('x'), 1, None) == 'x/true/null'
+    assert concat_formatter('\1\2y', ['Ljava/lang/String;'], ['K'])(None, 'x') == 'xKy'
+    assert concat_formatter('\1\1', ['D', 'J'])(None, 1e20, 7) == '1.0E207'
+    # objects and arrays are converted by to_str on the thread
+    tagged = concat_formatter('\1:\1', ['[I', 'LPoint;'], (), lambda thread, value, descriptor: f'{thread}{descriptor}')
+    assert tagged('t', None, None) == 't[I:tLPoint;'
+
+
+def test_string_builder():
+    sb = StringBuilder()
+    append = find_native('java/lang/StringBuilder', 'append', '(I)Ljava/lang/StringBuilder;').fn
+    assert append(sb, 12) is sb
+    find_native('java/lang/StringBuilder', 'append', '(Z)Ljava/lang/StringBuilder;').fn(sb, 0)
+    assert (sb.toString(), sb.length) == ('12false', 7)
+    assert find_native('java/lang/StringBuilder', 'reverse', '()Ljava/lang/StringBuilder;').fn(sb).toString() == 'eslaf21'
+    with pytest.raises(IndexOutOfBoundsError):
+        find_native('java/lang/StringBuilder', 'charAt', '(I)C').fn(sb, 7)
+    assert natives.to_string(sb) == 'eslaf21'
+    assert intern(''.join(['a', 'b'])) is intern('ab')
+
+
+def test_java_string_builder():
+    cfs = load_classes('./tests/java/*.class')
+    join = resolve_method(cfs, 'Text', 'join', '(I)Ljava/lang/String;', False)
+    assert Thread(cfs).invoke(join, [4]) == '[0,1,2,3]'
+
+
+def test_lambdas():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+
+    def call(name, descriptor, *args):
+        return thread.invoke(resolve_method(cfs, 'Lambdas', name, descriptor, False), list(args))
+
+    assert call('greet', '(Ljava/lang/String;I)Ljava/lang/String;', 'Ann', 3) == 'Hello Ann, you are 3!'
+    assert call('describe', '(CZLjava/lang/Object;)Ljava/lang/String;', ord('x'), 1, None) == 'x/true/null'
+    assert call('twice', '(I)I', 21) == 42
+    assert call('scale', '(II)I', 3, 5) == 15
+    # a lambda capturing nothing is linked once, to one instance
+    op = call('twiceOp', f'(){IUO}')
+    assert isinstance(op, Lambda) and op is call('twiceOp', f'(){IUO}')
+    assert (op.interface, op.name) == ('java/util/function/IntUnaryOperator', 'applyAsInt')
+    # the synthetic method javac generates for the lambda body, its number depends on the compiler
+    assert op.target.c.name == 'Lambdas' and op.target.name.startswith('lambda$') and op.target.descriptor == '(I)I'
+
+
+def test_lambda_captures_are_live():
+    cfs = load_classes('./tests/java/*.class')
+    heap = Heap()
+    point = layout_of(cfs, 'Point')
+    held, _ = heap.new(point), heap.new(point)
+    heap.roots.append([Lambda('java/lang/Runnable', 'run', None, (held,))])
+    assert heap.collect().objects_live == 1
+    assert heap.objects == [held]
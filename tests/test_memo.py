@@ -0,0 +1,71 @@
+import pytest
+from python_jvm.executer import Thread, load_classes, resolve_method
+from python_jvm.memo import MethodCache, is_pure, memoize, memoize_pure_methods, unmemoize
+
+
+def test_is_pure():
+    cfs = load_classes('./tests/java/*.class')
+    assert is_pure(cfs, 'HelloWorld', 'fibonacci', '(I)I')
+    assert is_pure(cfs, 'HelloWorld', 'add', '(II)I')
+    assert is_pure(cfs, 'Kernels', 'seasons', '(I)I')
+    assert not is_pure(cfs, 'HelloWorld', 'show', '()V')
+    assert not is_pure(cfs, 'HelloWorld', 'main', '([Ljava/lang/String;)V')
+    assert not is_pure(cfs, 'Point', 'chain', '(I)I')  # allocates
+    assert not is_pure(cfs, 'Person', 'getName', '()Ljava/lang/String;')
+
+
+def test_memoize():
+    cfs = load_classes('./tests/java/*.class')
+    cache = memoize(cfs, 'HelloWorld', 'fibonacci', '(I)I', maxsize=100)
+    fibonacci = resolve_method(cfs, 'HelloWorld', 'fibonacci', '(I)I', False)
+    # exponential without the cache, 2504730781961 wrapped to int
+    assert Thread(cfs).invoke(fibonacci, [60]) == 764848393
+    assert cache.misses == 61
+    assert cache.hits == 58
+    assert len(cache.entries) == 61
+
+    assert Thread(cfs).invoke(fibonacci, [60]) == 764848393
+    assert cache.hits == 59
+
+    with pytest.raises(Exception):
+        memoize(cfs, 'Point', 'chain', '(I)I')
+
+    unmemoize(cfs, 'HelloWorld', 'fibonacci', '(I)I')
+    assert Thread(cfs).invoke(fibonacci, [15]) == 987
+
+
+def test_lru():
+    cache = MethodCache('test', maxsize=2)
+    cache.put((1,), 1)
+    cache.put((2,), 2)
+    assert cache.get((1,)) == 1
+    cache.put((3,), 3)  # evicts (2,)
+    assert cache.get((2,)) is None
+    assert list(cache.entries) == [(1,), (3,)]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memoize_pure_methods():
+    cfs = load_classes('./tests/java/*.class')
+    caches = memoize_pure_methods(cfs)
+    assert 'HelloWorld.fibonacci(I)I' in caches
+    assert 'Kernels.gcd(II)I' in caches
+    assert 'Point.chain(I)I' not in caches
+    sum_ = resolve_method(cfs, 'Recursion', 'sum', '(I)I', False)
+    assert Thread(cfs).invoke(sum_, [3000]) == 3000 * 3001 // 2
+
+
+def test_mutual_recursion():
+    cfs = load_classes('./tests/java/*.class')
+    # b is only pure if a is, and a is not: it calls c, which writes a static field
+    results = {}
+    assert not is_pure(cfs, 'Recursion', 'a', '(I)I', results)
+    assert results[('Recursion', 'a', '(I)I')] is False
+    assert not is_pure(cfs, 'Recursion', 'b', '(I)I', results)
+    assert not is_pure(cfs, 'Recursion', 'b', '(I)I')
+    assert is_pure(cfs, 'Recursion', 'even', '(I)I')
+    caches = memoize_pure_methods(cfs)
+    assert 'Recursion.a(I)I' not in caches and 'Recursion.b(I)I' not in caches
+    assert 'Recursion.even(I)I' in caches and 'Recursion.odd(I)I' in caches
+    even = resolve_method(cfs, 'Recursion', 'even', '(I)I', False)
+    assert Thread(cfs).invoke(even, [10]) == 1
@@ -0,0 +1,110 @@
+import io
+import re
+import pytest
+from python_jvm import natives
+from python_jvm.executer import Thread, load_classes, resolve_method
+from python_jvm.memo import is_pure
+from python_jvm.natives import IndexOutOfBoundsError, NumberFormatError, PrintStream, find_native, java_format, to_string
+
+
+def test_registry():
+    n = find_native('java/lang/Math', 'max', '(II)I')
+    assert n.fn(3, 7) == 7
+    assert (n.arg_count, n.static, n.pure) == (2, True, True)
+    assert find_native('java/lang/String', 'charAt', '(I)C').arg_count == 2  # with the object ref
+    assert find_native('java/lang/Math', 'max', '(III)I') is None
+    assert is_pure({}, 'java/lang/Math', 'abs', '(I)I')
+    assert not is_pure({}, 'java/lang/System', 'nanoTime', '()J')
+
+
+def test_natives():
+    n = natives.natives
+    assert n['java/lang/Integer']['parseInt(Ljava/lang/String;)I'].fn('-42') == -42
+    assert n['java/lang/Integer']['toString(II)Ljava/lang/String;'].fn(-255, 16) == '-ff'
+    with pytest.raises(NumberFormatError):
+        n['java/lang/Integer']['parseInt(Ljava/lang/String;)I'].fn('1_000')
+    with pytest.raises(NumberFormatError):
+        n['java/lang/Integer']['parseInt(Ljava/lang/String;)I'].fn('2147483648')
+    assert n['java/lang/Math']['abs(I)I'].fn(-2147483648) == -2147483648
+    assert n['java/lang/String']['hashCode()I'].fn('hello world') == 1794106052
+    assert n['java/lang/String']['compareTo(Ljava/lang/String;)I'].fn('apple', 'apricot') == -2
+    with pytest.raises(IndexOutOfBoundsError):
+        n['java/lang/String']['charAt(I)C'].fn('abc', 3)
+
+    src, dest = [1, 2, 3, 4], [0, 0, 0, 0, 0]
+    arraycopy = n['java/lang/System']['arraycopy(Ljava/lang/Object;ILjava/lang/Object;II)V'].fn
+    arraycopy(src, 1, dest, 2, 3)
+    assert dest == [0, 0, 2, 3, 4]
+    arraycopy(src, 0, src, 1, 3)  # overlapping
+    assert src == [1, 1, 2, 3]
+    with pytest.raises(IndexOutOfBoundsError):
+        arraycopy(src, 2, dest, 0, 3)
+
+
+def test_to_string():
+    assert to_string(None) == 'null'
+    assert to_string(1, 'Z') == 'true'
+    assert to_string(65, 'C') == 'A'
+    assert to_string(1.0, 'D') == '1.0'
+    assert to_string(1e20, 'D') == '1.0E20'
+    assert to_string(1.5e-5, 'D') == '1.5E-5'
+    assert to_string(0.1, 'F') == '0.1'
+    assert java_format('%d items, %5.2f%%, %-4s| %x%n', [3, 12.345, 'ab', -1]) == '3 items, 12.35%, ab  | ffffffff\n'
+    assert java_format('%2$s %1$s %b', ['a', 'b']) == 'b a true'
+
+
+def test_buffered_print(capsys):
+    stream = PrintStream('test', lambda: out)
+    out = io.StringIO()
+    stream.write('a')
+    assert out.getvalue() == ''
+    stream.write('b' * natives.BUFFER_SIZE)
+    assert out.getvalue() == 'a' + 'b' * natives.BUFFER_SIZE
+    stream.write('c')
+    stream.flush()
+    assert out.getvalue().endswith('bc')
+
+    cfs = load_classes('./tests/java/*.class')
+    natives.flush()
+    capsys.readouterr()
+    report = resolve_method(cfs, 'Text', 'report', '(IZC)V', False)
+    Thread(cfs).invoke(report, [7, 1, ord('x')])
+    natives.flush()
+    assert capsys.readouterr() == ('n=7\ntrue\nx\n', 'done\n')
+
+    # to the stdout of the thread
+    thread = Thread(cfs)
+    thread.stdout = io.StringIO()
+    thread.invoke(report, [8, 0, ord('y')])
+    assert thread.stdout.getvalue() == 'n=8\nfalse\ny\n'
+    natives.flush()
+    assert capsys.readouterr() == ('', 'done\n')
+
+
+def test_object_strings():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    thread.stdout = io.StringIO()
+
+    def call(name, descriptor='()Ljava/lang/String;'):
+        return thread.invoke(resolve_method(cfs, 'Labels', name, descriptor, False), [])
+
+    # the toString() of the class of the object
+    assert call('concat') == 'x=label a'
+    assert call('valueOf') == 'label b'
+    assert call('format') == 'label c|null'
+    assert re.fullmatch('label d Plain@[0-9a-f]+', call('append'))
+    assert call('caught') == 'java.lang.IllegalStateException: boom'
+    call('print', '()V')
+    assert thread.stdout.getvalue() == 'label e\nlabel f\njava.lang.IllegalStateException: boom\n'
+    assert thread.frames == []
+
+
+def test_java_natives():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    assert thread.invoke(resolve_method(cfs, 'Text', 'parse', '(Ljava/lang/String;)I', False), ['-12']) == 243
+    checksum = resolve_method(cfs, 'Text', 'checksum', '(Ljava/lang/String;)I', False)
+    assert thread.invoke(checksum, ['hello world']) == 1794106052
+    shout = resolve_method(cfs, 'Text', 'shout', '(Ljava/lang/String;)Ljava/lang/String;', False)
+    assert thread.invoke(shout, ['  hello ']) == 'ELLO'
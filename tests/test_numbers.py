@@ -0,0 +1,76 @@
+import math
+import struct
+import time
+from python_jvm.exceptions import java_class
+from python_jvm.executer import Thread, load_classes, resolve_method
+from python_jvm.heap import Heap, layout_of
+from python_jvm.natives import intern
+
+
+def _f32(value):
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def _invoker(cfs):
+    thread = Thread(cfs)
+    return lambda name, descriptor, *args: thread.invoke(resolve_method(cfs, 'Numbers', name, descriptor, False), list(args))
+
+
+def test_long():
+    cfs = load_classes('./tests/java/*.class')
+    invoke = _invoker(cfs)
+    assert invoke('factorial', '(I)J', 25) == 7034535277573963776  # wrapped to 64 bits
+    assert invoke('compare', '(JJ)I', 1 << 40, 1 << 41) == -1
+    assert invoke('compare', '(JJ)I', -5, -5) == 0
+    assert invoke('bits', '(J)J', 123456789) == -101256197
+    assert invoke('divide', '(JJ)J', 10 ** 18, 7) == 857142870
+    assert invoke('divide', '(JJ)J', -7, 2) == -3  # toward zero
+    assert invoke('divide', '(JJ)J', 1, 0) == -1  # ArithmeticException
+    assert invoke('chain', '(J)J', 41) == 84  # dup2 of a long
+    numbers = resolve_method(cfs, 'Numbers', 'add', '(J)J', True)
+    obj = Heap().new(layout_of(cfs, 'Numbers'))
+    thread = Thread(cfs)
+    assert [thread.invoke(numbers, [obj, 1 << 40]) for _ in range(2)] == [1 << 40, 1 << 41]
+
+
+def test_double():
+    cfs = load_classes('./tests/java/*.class')
+    invoke = _invoker(cfs)
+    xs = Heap().new_array('[D', 3)
+    xs[0], xs[1], xs[2] = 1.0, 2.0, 4.5
+    assert invoke('mean', '([D)D', xs) == 2.5
+    assert invoke('divide', '(DD)D', 1.0, 0.0) == math.inf
+    assert invoke('divide', '(DD)D', -1.0, 0.0) == -math.inf
+    assert math.isnan(invoke('divide', '(DD)D', 0.0, 0.0))
+    assert invoke('remainder', '(DD)D', -7.5, 2.0) == -1.5
+    assert math.isnan(invoke('remainder', '(DD)D', 1.0, 0.0))
+    assert invoke('truncate', '(D)I', 1e20) == 2147483647
+    assert invoke('truncate', '(D)I', math.nan) == 0
+    assert invoke('truncate', '(D)I', -2.7) == -2
+    assert invoke('round', '(D)J', 2.5) == 3
+    assert invoke('less', '(DD)Z', math.nan, 1.0) == 0
+    assert invoke('less', '(DD)Z', 0.5, 1.0) == 1
+    assert invoke('average', '(FF)F', _f32(0.1), _f32(0.2)) == _f32(_f32(_f32(0.1) + _f32(0.2)) / 2)
+    assert invoke('describe', '(JDF)Ljava/lang/String;', 12, 2.5, 0.5) == intern('12 2.5 0.5')
+
+
+def test_natives():
+    cfs = load_classes('./tests/java/*.class')
+    invoke = _invoker(cfs)
+    assert invoke('elapsed', '()J') >= 0
+    assert abs(invoke('millis', '()J') - time.time() * 1000) < 60000
+    assert invoke('discard', '(I)I', 4) == 4  # pop2 of the long nanoTime() returns
+    assert invoke('hypot', '(DD)D', 3.0, 4.0) == 5.0
+    # overflow gives infinities as in java, not an ArithmeticException
+    assert invoke('power', '(DD)D', 10.0, 400.0) == math.inf
+    assert invoke('power', '(DD)D', -10.0, 401.0) == -math.inf
+    assert math.isnan(invoke('power', '(DD)D', -2.0, 0.5))
+    assert invoke('exp', '(D)D', 1000.0) == math.inf
+    assert invoke('addExact', '(II)I', 0x7FFFFFFF, 1) == -1
+    assert java_class(OverflowError()) is None
+    # NaN wins, and 0.0 is greater than -0.0
+    assert math.isnan(invoke('larger', '(DD)D', math.nan, 1.0))
+    assert math.isnan(invoke('smaller', '(FF)F', 1.0, math.nan))
+    assert math.copysign(1.0, invoke('larger', '(DD)D', -0.0, 0.0)) == 1.0
+    assert math.copysign(1.0, invoke('smaller', '(FF)F', 0.0, -0.0)) == -1.0
+    assert (invoke('larger', '(DD)D', 2.5, -3.0), invoke('smaller', '(FF)F', 2.5, -3.0)) == (2.5, -3.0)
@@ -0,0 +1,91 @@
+import pytest
+from python_jvm.exceptions import java_class
+from python_jvm.executer import Thread, load_classes, resolve_method
+from python_jvm.monitor import DeadlockError
+from python_jvm.scheduler import TERMINATED, Scheduler
+
+
+def test_producer_consumer():
+    cfs = load_classes('./tests/java/*.class')
+    scheduler = Scheduler(cfs, quantum=50)
+    main = scheduler.spawn(resolve_method(cfs, 'Workers', 'pipeline', '(I)I', False), [100])
+    scheduler.run()
+    assert main.result == 5050
+    assert all(g.state == TERMINATED for g in scheduler.threads)
+    assert scheduler.stats.threads == 4
+    assert scheduler.heap.monitors == {}
+
+
+@pytest.mark.parametrize('locking, expected', [(True, 200), (False, None)])
+def test_monitors(locking, expected):
+    cfs = load_classes('./tests/java/*.class')
+    results = []
+    for _ in range(2):
+        scheduler = Scheduler(cfs, quantum=7, deterministic=True)
+        main = scheduler.spawn(resolve_method(cfs, 'Workers', 'count', '(IZ)I', False), [100, locking])
+        scheduler.run()
+        results.append(main.result)
+    # deterministic runs interleave the same way
+    assert results[0] == results[1]
+    if expected is not None:
+        assert results[0] == expected
+    else:
+        assert results[0] < 200  # updates are lost without the monitor
+
+
+def test_seed():
+    cfs = load_classes('./tests/java/*.class')
+    count = resolve_method(cfs, 'Workers', 'count', '(IZ)I', False)
+
+    def run(seed, locking):
+        scheduler = Scheduler(cfs, quantum=20, seed=seed)
+        main = scheduler.spawn(count, [50, locking])
+        scheduler.run()
+        return main.result
+
+    assert run(1, False) == run(1, False)
+    assert {run(seed, True) for seed in range(5)} == {100}
+
+
+def test_deadlock():
+    cfs = load_classes('./tests/java/*.class')
+    scheduler = Scheduler(cfs)
+    scheduler.spawn(resolve_method(cfs, 'Workers', 'deadlock', '()V', False), [])
+    with pytest.raises(DeadlockError):
+        scheduler.run()
+
+
+def test_synchronized_without_scheduler():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    assert thread.invoke(resolve_method(cfs, 'Workers', 'twice', '(I)I', False), [21]) == 42
+    assert thread.heap.monitors == {}
+    with pytest.raises(Exception):
+        thread.invoke(resolve_method(cfs, 'Workers', 'pipeline', '(I)I', False), [4])
+    assert thread.frames == []
+
+
+def test_uncaught():
+    cfs = load_classes('./tests/java/*.class')
+    scheduler = Scheduler(cfs, quantum=5, deterministic=True)
+    main = scheduler.spawn(resolve_method(cfs, 'Workers', 'failing', '(I)I', False), [20])
+    scheduler.run()
+    # the failing thread stops alone, main is woken up by its join
+    assert main.result == 20
+    assert main.error is None
+    [failer] = [g for g in scheduler.threads if g.error is not None]
+    assert java_class(failer.error) == 'java/lang/ArithmeticException'  # rethrown by the synchronized block
+    assert failer.state == TERMINATED
+    assert all(g.state == TERMINATED for g in scheduler.threads)
+    assert scheduler.heap.monitors == {}
+
+
+def test_sleep():
+    cfs = load_classes('./tests/java/*.class')
+    scheduler = Scheduler(cfs, deterministic=True)
+    # Thread.sleep(J) from an int, a long literal and a long local, then Object.wait(J)
+    main = scheduler.spawn(resolve_method(cfs, 'Workers', 'sleeper', '(I)I', False), [20])
+    scheduler.run()
+    assert main.result == 20
+    assert 35 <= scheduler.now() < 36  # virtual time, the clock skipped the sleeps
+    assert scheduler.stats.blocks == 4
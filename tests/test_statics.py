@@ -0,0 +1,94 @@
+import pytest
+from python_jvm.compiler import compile_method
+from python_jvm.executer import (ExceptionInInitializerError, NoClassDefFoundError, StaticField, Thread, link_statics,
+                                 load_classes, resolve_method)
+
+
+def _method(cfs, name, descriptor):
+    return resolve_method(cfs, 'Statics', name, descriptor, False)
+
+
+def _fields(code):
+    return [operand for _, operand in code.unfused if operand.__class__ is StaticField]
+
+
+def test_layout():
+    cfs = load_classes('./tests/java/*.class')
+    c = cfs['Statics']
+    statics = link_statics(c)
+    assert statics is c.statics
+    # constants start with their ConstantValue, the other fields with the default of their type
+    assert statics[c.static_layout.slots['LIMIT']] == 100
+    assert statics[c.static_layout.slots['NAME']] == 'statics'
+    assert statics[c.static_layout.slots['squares']] is None
+    assert c.initialized is None
+
+
+def test_initialize():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    next_ = _method(cfs, 'next', '()I')
+    assert [thread.invoke(next_, []) for _ in range(3)] == [6, 7, 8]  # <clinit> sets counter to 5
+    c = cfs['Statics']
+    assert c.initialized is True
+    assert thread.invoke(_method(cfs, 'square', '(I)I'), [7]) == 49
+    # the instructions index the static values directly from now on
+    fields = _fields(next_.code)
+    assert all(f.values is c.statics and f.index == c.static_layout.slots['counter'] for f in fields)
+    # superclass first, a static field of the superclass through the subclass
+    assert thread.invoke(_method(cfs, 'order', '()Ljava/lang/String;'), []) == '2 1 Base;Derived;'
+    assert thread.invoke(_method(cfs, 'table', '(I)I'), [2]) == 4  # the field of an interface
+    assert cfs['Limits'].initialized is True
+    assert thread.invoke(_method(cfs, 'count', '(I)I'), [3]) == 13  # new initializes Counted
+    assert thread.frames == []
+
+
+def test_lazy():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    assert thread.invoke(_method(cfs, 'lazy', '(Z)I'), [0]) == 0
+    assert cfs['Broken'].initialized is None
+    assert cfs['Derived'].initialized is None
+
+
+def test_initializer_error():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    # caught as java exceptions: ExceptionInInitializerError the first time, NoClassDefFoundError later
+    broken = _method(cfs, 'broken', '()I')
+    assert [thread.invoke(broken, []) for _ in range(2)] == [-1, -2]
+
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    lazy = _method(cfs, 'lazy', '(Z)I')
+    with pytest.raises(ExceptionInInitializerError) as e:
+        thread.invoke(lazy, [1])
+    assert isinstance(e.value.__cause__, ZeroDivisionError)
+    with pytest.raises(NoClassDefFoundError):
+        thread.invoke(lazy, [1])
+    assert thread.frames == []
+
+
+def test_gc_root():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    assert thread.invoke(_method(cfs, 'square', '(I)I'), [3]) == 9
+    c = cfs['Statics']
+    assert c.statics in thread.heap.roots
+    squares = c.statics[c.static_layout.slots['squares']]
+    thread.heap.collect()
+    assert squares in thread.heap.objects
+
+
+def test_compiled():
+    cfs = load_classes('./tests/java/*.class')
+    thread = Thread(cfs)
+    accumulate = _method(cfs, 'accumulate', '(I)I')
+    assert thread.invoke(accumulate, [10]) == 45
+    fn = compile_method(cfs, accumulate)
+    assert fn is not None
+    c = cfs['Statics']
+    assert '_statics' not in fn.source  # linked when compiled, the values are a constant of the function
+    assert fn(thread, 10) == 90
+    assert c.statics[c.static_layout.slots['total']] == 90
+    assert thread.invoke(accumulate, [1]) == 90
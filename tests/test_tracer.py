@@ -0,0 +1,31 @@
+from python_jvm.decoder import mnemonic
+from python_jvm.executer import execute, find_method, load_classes
+from python_jvm.tracer import FileTracer, RingBufferTracer, read_trace
+
+
+def test_ring_buffer_tracer():
+    cfs = load_classes('./tests/java/*.class')
+    method = find_method(cfs, 'HelloWorld', 'fibonacci', '(I)I')
+    tracer = RingBufferTracer(1000)
+    assert execute(method.code, cfs, 'HelloWorld', [3], {}, tracer=tracer) == 3
+    events = tracer.events()
+    assert events[0].method == 'HelloWorld.fibonacci(I)I'
+    assert events[0].pc == 0 and events[0].stack_depth == 0
+    assert mnemonic(events[-1].opcode) == 'ireturn'
+    assert tracer.methods == ['HelloWorld.fibonacci(I)I']
+
+    # the same method runs untraced afterwards
+    assert execute(method.code, cfs, 'HelloWorld', [10], {}) == 89
+
+
+def test_file_tracer(tmp_path):
+    cfs = load_classes('./tests/java/*.class')
+    method = find_method(cfs, 'HelloWorld', 'fibonacci', '(I)I')
+    ring = RingBufferTracer()
+    execute(method.code, cfs, 'HelloWorld', [5], {}, tracer=ring)
+
+    path = str(tmp_path / 'trace.bin')
+    tracer = FileTracer(path, buffer_size=64)
+    execute(method.code, cfs, 'HelloWorld', [5], {}, tracer=tracer)
+    tracer.close()
+    assert list(read_trace(path)) == ring.events()
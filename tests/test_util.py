@@ -1,5 +1,5 @@
 import pytest
-from python_jvm.util import parse_arg_num
+from python_jvm.util import parse_arg_num, parse_method, parse_method_descriptor
 
 
 @pytest.mark.parametrize('descriptor, expected', [
@@ -18,3 +18,21 @@ def test_parse_arg_num(descriptor, expected):
     see https://docs.oracle.com/javase/specs/jvms/se8/html/jvms-4.html#jvms-4.3
     '''
     assert parse_arg_num(descriptor) == expected
+
+
+@pytest.mark.parametrize('descriptor, expected', [
+    ('()V', ([], 'V')),
+    ('(II)I', (['I', 'I'], 'I')),
+    ('(JD)J', (['J', 'D'], 'J')),
+    ('([Ljava/lang/String;)V', (['[Ljava/lang/String;'], 'V')),
+    ('(Ljava/lang/String;I[[I)Ljava/lang/Object;', (['Ljava/lang/String;', 'I', '[[I'], 'Ljava/lang/Object;')),
+])
+def test_parse_method_descriptor(descriptor, expected):
+    assert parse_method_descriptor(descriptor) == expected
+
+
+def test_parse_method():
+    assert parse_method('Kernels.gcd(II)I') == ('Kernels', 'gcd', '(II)I')
+    assert parse_method('java/lang/Math.abs') == ('java/lang/Math', 'abs', None)
+    with pytest.raises(ValueError):
+        parse_method('gcd(II)I')
@@ -0,0 +1,52 @@
+import pytest
+from python_jvm.executer import Thread, load_classes, resolve_method
+
+np = pytest.importorskip('numpy')
+from python_jvm.vector import BatchExecutor, execute_batch  # noqa: E402
+
+
+def scalar(cfs, name, descriptor, *args):
+    target = resolve_method(cfs, 'Kernels', name, descriptor, False)
+    return [Thread(cfs, compile_threshold=None).invoke(target, list(map(int, row))) for row in zip(*args)]
+
+
+@pytest.mark.parametrize('name, descriptor, args', [
+    ('sumTo', '(I)I', [np.arange(0, 3000, 7)]),  # overflows for the larger lanes
+    ('collatz', '(I)I', [np.arange(1, 300)]),
+    ('gcd', '(II)I', [np.arange(1, 200) * 7, np.arange(1, 200) * 3]),
+    ('hash', '(I)I', [np.arange(0, 400, 3)]),
+    ('season', '(I)I', [np.arange(-3, 20)]),
+    ('seasons', '(I)I', [np.arange(0, 200, 5)]),
+])
+def test_batch_matches_interpreter(name, descriptor, args):
+    cfs = load_classes('./tests/java/*.class')
+    results = execute_batch(cfs, 'Kernels', name, descriptor, *args)
+    assert results.dtype == np.int32
+    assert results.tolist() == scalar(cfs, name, descriptor, *args)
+
+
+def test_lanes():
+    cfs = load_classes('./tests/java/*.class')
+    executor = BatchExecutor(cfs)
+    assert executor.run('Kernels', 'sumTo', '(I)I', np.full(100, 1000)).tolist() == [332833500] * 100
+    assert executor.stats.splits == 0 and executor.stats.scalar_lanes == 0
+
+    # lanes leaving the loop wait for the others, the last few finish in the interpreter
+    executor = BatchExecutor(cfs, min_lanes=4)
+    executor.run('Kernels', 'sumTo', '(I)I', np.arange(100))
+    assert executor.stats.merges > 0
+    assert executor.stats.scalar_lanes == 3
+
+    # recursive calls are made per lane
+    executor = BatchExecutor(cfs)
+    assert executor.run('Kernels', 'gcd', '(II)I', np.array([12, 35, 81] * 4), 6).tolist() == [6, 1, 3] * 4
+    assert executor.stats.scalar_calls == 12
+
+
+def test_not_batchable():
+    cfs = load_classes('./tests/java/*.class')
+    with pytest.raises(Exception):
+        execute_batch(cfs, 'Person', 'getName', '()Ljava/lang/String;')
+    # objects are not vectorized, the lanes run in the interpreter
+    results = execute_batch(cfs, 'Point', 'sum3', '(III)I', np.arange(10), 1, 2)
+    assert results.tolist() == list(range(3, 13))